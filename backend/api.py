@@ -1,16 +1,30 @@
-from fastapi import FastAPI, Query, HTTPException
+from fastapi import FastAPI, Query, HTTPException, Header, Depends, Response
 from fastapi.middleware.cors import CORSMiddleware
-import pandas as pd
-import os, traceback
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.metrics.pairwise import cosine_similarity
-from sklearn.feature_extraction import text
+from fastapi.responses import StreamingResponse
+from starlette.concurrency import run_in_threadpool
+from contextlib import asynccontextmanager
+import os, traceback, hmac, uuid, json, base64, csv, io
+from datetime import datetime, timezone
 from dotenv import load_dotenv
 
+from catalog import CatalogManager
+from scoring import (
+    score_all, score_batch, top_k_rows, iter_ranked_rows, iter_reranked_rows, rerank, SORT_MODES,
+)
+from similar_index import neighbours
+from model_store import SIMILAR_K
+from incidence import normalize_ingredient
+from skin_conditions import condition_key
+from ingredient_index import SUGGEST_MAX
+from result_cache import ResultCache
+import metrics
+
 # 🔹 NEW: imports for database + models
-import psycopg2
-from psycopg2.extras import RealDictCursor, Json
-from pydantic import BaseModel
+from psycopg2 import sql
+from psycopg2.extras import Json
+from db import ConnectionPool, PoolTimeout
+from history_writer import HistoryWriter, QueueFull
+from pydantic import BaseModel, Field
 from typing import List, Dict, Any, Optional
 
 # ================================================================
@@ -21,15 +35,49 @@ from typing import List, Dict, Any, Optional
 load_dotenv()
 FRONTEND_URL = os.getenv("FRONTEND_URL", "http://localhost:5173")
 DATABASE_URL = os.getenv("DATABASE_URL")
+RECOMMEND_CACHE_SIZE = int(os.getenv("RECOMMEND_CACHE_SIZE", "1024"))
+RECOMMEND_CACHE_TTL = float(os.getenv("RECOMMEND_CACHE_TTL", "600"))
+RECOMMEND_BATCH_MAX = int(os.getenv("RECOMMEND_BATCH_MAX", "10000"))
+RERANK_POOL = int(os.getenv("RERANK_POOL", "200"))  # best-similarity candidates re-sorted by `sort`
+EXPORT_CHUNK = int(os.getenv("EXPORT_CHUNK", "1000"))  # rows ranked, serialized and sent at a time
+CATALOG_WATCH_INTERVAL = float(os.getenv("CATALOG_WATCH_INTERVAL", "0"))
+CATALOG_REFIT_INTERVAL = float(os.getenv("CATALOG_REFIT_INTERVAL", "3600"))  # folds product edits into the model
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN")
+
+# 🔹 Pooled connections to Supabase Postgres (opened on first use)
+db_pool = ConnectionPool(
+    DATABASE_URL,
+    minconn=int(os.getenv("DB_POOL_MIN", "1")),
+    maxconn=int(os.getenv("DB_POOL_MAX", "10")),
+    timeout=float(os.getenv("DB_POOL_TIMEOUT", "5")),
+    max_lifetime=float(os.getenv("DB_POOL_MAX_LIFETIME", "1800")),
+    check_after=float(os.getenv("DB_POOL_CHECK_AFTER", "30")),
+)
+
+# 🔹 Optional write-behind batching for POST /history
+HISTORY_WRITE_BEHIND = os.getenv("HISTORY_WRITE_BEHIND", "0").lower() in ("1", "true", "yes")
+history_writer = HistoryWriter(
+    db_pool,
+    max_queue=int(os.getenv("HISTORY_QUEUE_SIZE", "10000")),
+    batch_size=int(os.getenv("HISTORY_BATCH_SIZE", "200")),
+    flush_interval=float(os.getenv("HISTORY_FLUSH_INTERVAL", "0.5")),
+    enqueue_timeout=float(os.getenv("HISTORY_ENQUEUE_TIMEOUT", "0.5")),
+)
+
 
-# 🔹 NEW: simple helper to connect to Supabase Postgres
-def get_db_connection():
-    if not DATABASE_URL:
-        raise RuntimeError("DATABASE_URL is not set in environment variables.")
-    return psycopg2.connect(DATABASE_URL, cursor_factory=RealDictCursor)
+@asynccontextmanager
+async def lifespan(app):
+    catalog.start_watcher(CATALOG_WATCH_INTERVAL)
+    catalog.start_refit_timer(CATALOG_REFIT_INTERVAL)
+    if HISTORY_WRITE_BEHIND:
+        history_writer.start()
+    yield
+    catalog.stop_watcher()
+    history_writer.stop()  # drains queued history rows before the pool closes
+    db_pool.close()
 
 
-app = FastAPI(title="VeiBelle Skincare Recommender API")
+app = FastAPI(title="VeiBelle Skincare Recommender API", lifespan=lifespan)
 
 # --- Allow CORS for frontend ---
 app.add_middleware(
@@ -45,110 +93,46 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["Server-Timing"],
 )
 
-# ================================================================
-# 📦 Load Datasets
-# ================================================================
-BASE_DIR = os.path.dirname(os.path.abspath(__file__))
-PROCESSED = os.path.join(BASE_DIR, "processed")
-
-paths = {
-    "products": os.path.join(PROCESSED, "products_clean.csv"),
-    "ingredients": os.path.join(PROCESSED, "ingredients_cleaned_preprocessed.csv"),
-    "product_ingredients": os.path.join(PROCESSED, "product_ingredients.csv"),
-    "product_allergens": os.path.join(PROCESSED, "product_allergens.csv"),
-}
-
-try:
-    products_df = pd.read_csv(paths["products"])
-    ingredients_df = pd.read_csv(paths["ingredients"])
-    product_ing = pd.read_csv(paths["product_ingredients"])
-    product_allergens = pd.read_csv(paths["product_allergens"])
-    print("✅ All datasets loaded successfully.")
-except Exception as e:
-    print("❌ Failed to load one or more datasets:", e)
-    traceback.print_exc()
-    products_df = ingredients_df = product_ing = product_allergens = None
-
-# ================================================================
-# 🧠 Improved TF-IDF Training (Model C)
-# ================================================================
-# Category synonyms to strengthen semantic signal
-CATEGORY_SYNONYMS = {
-    "cleanser": ["cleanser", "face wash", "foam cleanser", "gel cleanser"],
-    "toner": ["toner", "lotion", "skin softener"],
-    "serum": ["serum", "ampoule", "essence serum"],
-    "essence": ["essence", "treatment essence", "treatment lotion"],
-    "moisturizer": ["moisturizer", "cream", "gel cream", "lotion"],
-    "sunscreen": ["sunscreen", "sunblock", "uv protection", "spf"],
-}
+# --- Product edits made through another worker: applied before serving ---
+class EditSyncMiddleware:
+    """
+    Each uvicorn worker holds its own catalog. Before a request, a stat of
+    the edit log tells whether another worker appended edits; if so they
+    are applied (off the event loop) before the request reads the catalog.
+    """
 
-def expand_category_words(label: str) -> str:
-    if not label:
-        return ""
-    label_lower = label.lower()
-    base = [label_lower]
-    extra = []
-    for key, syns in CATEGORY_SYNONYMS.items():
-        if key in label_lower:
-            extra.extend(syns)
-    return " ".join(base + extra)
-
-# Domain-specific stopwords (extra noise words in skincare ingredients)
-domain_stopwords = {
-    "extract", "leaf", "root", "flower", "oil", "water",
-    "juice", "powder", "seed", "kernel", "fruit",
-}
+    def __init__(self, app):
+        self.app = app
 
-MY_STOP_WORDS = list(text.ENGLISH_STOP_WORDS.union(domain_stopwords))
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http" and catalog.current is not None and catalog.edits_behind():
+            await run_in_threadpool(catalog.sync_edits)
+        await self.app(scope, receive, send)
 
-if products_df is not None:
-    for col in ["ingredients", "Label", "brand", "name"]:
-        if col not in products_df.columns:
-            products_df[col] = ""
 
-    def build_search_text(row):
-        ingredients = str(row.get("ingredients", "")).lower()
-        label = str(row.get("Label", "")).lower()
-        brand = str(row.get("brand", "")).lower()
-        name = str(row.get("name", "")).lower()
+app.add_middleware(EditSyncMiddleware)
 
-        # clean label like "Serum/Essence"
-        category_clean = (
-            label.replace("/", " ")
-                 .replace("-", " ")
-                 .replace(",", " ")
-        )
-        category_expanded = expand_category_words(label)
-
-        parts = [
-            (ingredients + " ") * 2,        # ingredients, medium weight
-            (category_clean + " ") * 4,     # category words, strong weight
-            (category_expanded + " ") * 4,  # synonyms, strong weight
-            (label + " ") * 4,              # raw label repeated
-            brand,
-            name,
-        ]
-        return " ".join(parts)
-
-    products_df["search_text"] = products_df.apply(build_search_text, axis=1)
-
-    vectorizer = TfidfVectorizer(
-        stop_words=MY_STOP_WORDS,
-        ngram_range=(1, 2),
-        min_df=2,
-        max_df=0.85,
-        sublinear_tf=True,
-        norm="l2",
-        lowercase=True,
-        smooth_idf=True,
-    )
-    full_tfidf = vectorizer.fit_transform(products_df["search_text"].fillna(""))
+# --- Per-stage timings: Server-Timing header + /metrics ---
+if metrics.METRICS_ENABLED:
+    app.add_middleware(metrics.MetricsMiddleware, fastapi_app=app)
 
-    print("✅ Improved TF-IDF (Model C) search_text created and vectorized successfully.")
-else:
-    vectorizer, full_tfidf = None, None
+# ================================================================
+# 📦 Load Datasets + TF-IDF Model (Model C)
+# ================================================================
+# The datasets, model and filter index live in one immutable snapshot.
+# It comes from the prebuilt artifact (`python model_store.py build`)
+# when that matches the CSVs in processed/, otherwise the model is fitted
+# in-process. Reloads swap in a whole new snapshot; see catalog.py.
+catalog = CatalogManager()
+try:
+    snapshot = catalog.load_initial()
+    print(f"✅ Catalog snapshot {snapshot.version} loaded ({snapshot.source}).")
+except Exception as e:
+    print("❌ Failed to load datasets or model:", e)
+    traceback.print_exc()
 
 # ================================================================
 # 🧴 Concern Synonyms
@@ -187,63 +171,226 @@ SKIN_TYPE_MAPPING = {
     "Sensitive Skin": "Sensitive",
 }
 
-def get_recommendations(
-    skin_type=None,
-    product_type=None,
-    concerns=None,
-    allergens_list=None,
-    pregnancy_safe=None,
-    top_n=5,
-):
-    if products_df is None:
-        return []
+DEFAULT_CONCERN_TEXT = "hydrating soothing gentle"
+
 
-    df = products_df.copy()
+def filter_mask(snap, skin_type=None, product_type=None, allergens_list=None, pregnancy_safe=None,
+                include_ingredients=None, exclude_ingredients=None,
+                min_price=None, max_price=None, min_rank=None, skin_conditions=None):
+    """Boolean mask of products in `snap` that pass every requested filter."""
+    filter_index = snap.filter_index
+    mask = filter_index.all_rows()
 
     # --- Skin type filter ---
     if skin_type:
         col_name = SKIN_TYPE_MAPPING.get(skin_type)
-        if col_name and col_name in df.columns:
-            df = df[df[col_name] == 1]
+        skin_mask = filter_index.skin_type_mask(col_name) if col_name else None
+        if skin_mask is not None:
+            mask &= skin_mask
 
     # --- Product type filter ---
     if product_type:
         types = [t.strip() for t in product_type.replace("/", ",").split(",")]
-        df = df[df["Label"].str.lower().apply(lambda x: any(t.lower() in x for t in types))]
+        mask &= filter_index.product_type_mask(types)
 
     # --- Allergens filter ---
-    if allergens_list and product_allergens is not None:
-        allergens_lower = [a.lower() for a in allergens_list]
-        bad_products = product_allergens[
-            product_allergens["allergen_name"].str.lower().isin(allergens_lower)
-        ]["product_id"].unique()
-        df = df[~df.index.isin(bad_products)]
+    if allergens_list and snap.product_allergens is not None:
+        mask &= ~filter_index.allergen_mask(allergens_list)
+
+    # --- Skin condition filter (precompiled avoidance masks) ---
+    if skin_conditions:
+        mask &= ~filter_index.condition_avoid_mask(skin_conditions)
 
     # --- Pregnancy-safe filter ---
-    if pregnancy_safe and pregnancy_safe.lower() == "yes" and ingredients_df is not None:
-        unsafe_ing = ingredients_df[
-            ingredients_df["who_should_avoid"].str.contains("Pregnancy", case=False, na=False)
-        ]["name"].str.lower().tolist()
-        df = df[~df["ingredients"].fillna("").str.lower().apply(
-            lambda x: any(u in x for u in unsafe_ing)
-        )]
-        print("🍼 Pregnancy-safe filter applied.")
-
-    if df.empty:
+    if pregnancy_safe and pregnancy_safe.lower() == "yes" and snap.ingredients_df is not None:
+        with metrics.stage("pregnancy"):
+            mask &= ~filter_index.pregnancy_unsafe
+
+    # --- Ingredient include / exclude (product × ingredient incidence) ---
+    if include_ingredients:
+        mask &= snap.incidence.rows_with_all(include_ingredients)
+    if exclude_ingredients:
+        mask &= ~snap.incidence.rows_with_any(exclude_ingredients)
+
+    # --- Price / rank ranges (binary search on pre-sorted columns) ---
+    if min_price is not None or max_price is not None:
+        price_mask = filter_index.range_mask("price", min_price, max_price)
+        if price_mask is not None:
+            mask &= price_mask
+    if min_rank is not None:
+        rank_mask = filter_index.range_mask("rank", min_rank)
+        if rank_mask is not None:
+            mask &= rank_mask
+
+    return mask
+
+
+def check_skin_conditions(snap, skin_conditions):
+    """400 for a skin condition allergens_clean.csv doesn't list."""
+    if not skin_conditions or snap is None:
+        return
+    unknown = snap.filter_index.unknown_conditions(skin_conditions)
+    if unknown:
+        known = ", ".join(c.name for c in snap.filter_index.conditions.values())
+        raise HTTPException(status_code=400,
+                            detail=f"Unknown skin_condition {', '.join(unknown)}; known: {known} "
+                                   f"(see GET /skin-conditions for their ingredient terms)")
+
+
+def check_ingredients(snap, include_ingredients, exclude_ingredients):
+    """400 for an include / exclude name no product's ingredient list contains."""
+    if snap is None:
+        return
+    for param, names in (("include_ingredients", include_ingredients),
+                         ("exclude_ingredients", exclude_ingredients)):
+        unknown = snap.incidence.unknown(names or ())
+        if unknown:
+            raise HTTPException(status_code=400,
+                                detail=f"Unknown {param} {', '.join(unknown)}; no product lists it "
+                                       f"(see GET /ingredients/suggest for known names)")
+
+
+def boost_recommended(snap, scores, skin_conditions, recommended_boost):
+    """
+    `scores` with `recommended_boost` added for products that contain an
+    ingredient recommended for the skin conditions (a new array).
+    """
+    if not skin_conditions or not recommended_boost:
+        return scores
+    hits = snap.filter_index.condition_recommended_mask(skin_conditions)
+    return scores + recommended_boost * hits
+
+
+def select_rows(snap, scores, mask, top_n, sort="similarity", rank_weight=0.3, price_weight=0.2):
+    """
+    The `top_n` rows to return: best similarity first, or for another `sort`
+    the RERANK_POOL most similar candidates re-ordered on price / rank.
+    Equal similarities go to the more central product (recommender.py).
+    """
+    prior = snap.products.centrality
+    if sort == "similarity":
+        return top_k_rows(scores, mask, top_n, prior)
+    pool = top_k_rows(scores, mask, max(top_n, RERANK_POOL), prior)
+    with metrics.stage("rerank"):
+        order = rerank(scores[pool], snap.products.price[pool], snap.products.rank[pool],
+                       sort, rank_weight, price_weight)
+    return pool[order][:top_n]
+
+
+def build_records(snap, top, scores):
+    """Response dicts for the selected rows only; `scores` is aligned with `top`."""
+    return snap.products.records(top, scores)
+
+
+def get_recommendations(
+    skin_type=None,
+    product_type=None,
+    concerns=None,
+    allergens_list=None,
+    pregnancy_safe=None,
+    top_n=5,
+    include_ingredients=None,
+    exclude_ingredients=None,
+    min_price=None,
+    max_price=None,
+    min_rank=None,
+    sort="similarity",
+    rank_weight=0.3,
+    price_weight=0.2,
+    skin_conditions=None,
+    recommended_boost=0.0,
+):
+    snap = catalog.current
+    if snap is None:
+        return []
+
+    with metrics.stage("filter"):
+        mask = filter_mask(snap, skin_type, product_type, allergens_list, pregnancy_safe,
+                           include_ingredients, exclude_ingredients, min_price, max_price, min_rank,
+                           skin_conditions)
+    if not mask.any():
         return []
 
     # --- TF-IDF similarity ---
-    subset_indices = df.index.tolist()
-    subset_matrix = full_tfidf[subset_indices]
+    concern_text = expand_concerns(concerns) if concerns else DEFAULT_CONCERN_TEXT
+    with metrics.stage("transform"):
+        user_vector = snap.vectorizer.transform([concern_text])
+
+    with metrics.stage("score"):
+        scores = score_all(snap.full_tfidf, user_vector)
+        scores = boost_recommended(snap, scores, skin_conditions, recommended_boost)
+    with metrics.stage("top_k"):
+        top = select_rows(snap, scores, mask, top_n, sort, rank_weight, price_weight)
+    with metrics.stage("records"):
+        return build_records(snap, top, scores[top])
 
-    concern_text = expand_concerns(concerns) if concerns else "hydrating soothing gentle"
-    user_vector = vectorizer.transform([concern_text])
 
-    sims = cosine_similarity(user_vector, subset_matrix).flatten()
-    df["similarity"] = sims
-    df = df.sort_values(by="similarity", ascending=False).head(top_n)
+def get_batch_recommendations(profiles):
+    """
+    Recommendations for many profiles (dicts with get_recommendations'
+    keyword arguments) from one vectorizer.transform call and one sparse
+    matrix product. Profiles sharing filters share one mask.
+    """
+    snap = catalog.current
+    if snap is None:
+        return [[] for _ in profiles]
+
+    masks = {}
+    profile_masks = []
+    with metrics.stage("filter"):
+        for p in profiles:
+            key = (
+                p.get("skin_type"),
+                p.get("product_type"),
+                tuple(p.get("allergens_list") or ()),
+                p.get("pregnancy_safe"),
+                tuple(p.get("include_ingredients") or ()),
+                tuple(p.get("exclude_ingredients") or ()),
+                p.get("min_price"),
+                p.get("max_price"),
+                p.get("min_rank"),
+                tuple(p.get("skin_conditions") or ()),
+            )
+            if key not in masks:
+                masks[key] = filter_mask(snap, key[0], key[1], list(key[2]), key[3],
+                                         list(key[4]), list(key[5]), *key[6:9], list(key[9]))
+            profile_masks.append(masks[key])
 
-    return df[["Label", "brand", "name", "similarity"]].to_dict(orient="records")
+    texts = [
+        expand_concerns(p["concerns"]) if p.get("concerns") else DEFAULT_CONCERN_TEXT
+        for p in profiles
+    ]
+    with metrics.stage("transform"):
+        query_matrix = snap.vectorizer.transform(texts)
+
+    results = []
+    blocks = score_batch(snap.tfidf_t, query_matrix)
+    while True:
+        # score_batch is lazy: only producing the next block counts as "score"
+        with metrics.stage("score"):
+            item = next(blocks, None)
+            if item is not None:
+                start, block = item
+                block = [
+                    boost_recommended(snap, scores, profiles[start + offset].get("skin_conditions"),
+                                      profiles[start + offset].get("recommended_boost", 0.0))
+                    for offset, scores in enumerate(block)
+                ]
+        if item is None:
+            break
+        for offset, scores in enumerate(block):
+            i = start + offset
+            mask = profile_masks[i]
+            if not mask.any():
+                results.append([])
+                continue
+            p = profiles[i]
+            with metrics.stage("top_k"):
+                top = select_rows(snap, scores, mask, p.get("top_n", 5), p.get("sort", "similarity"),
+                                  p.get("rank_weight", 0.3), p.get("price_weight", 0.2))
+            with metrics.stage("records"):
+                results.append(build_records(snap, top, scores[top]))
+    return results
 
 # ================================================================
 # 🔹 NEW: Models & Endpoints for Recommendation History
@@ -259,95 +406,364 @@ class SaveHistoryRequest(BaseModel):
     user_id: Optional[str] = None  # Supabase auth user id (optional for now)
     quiz_answers: Dict[str, Any]
     recommendations: List[Dict[str, Any]]
+    client_id: Optional[uuid.UUID] = None  # idempotency key for write-behind mode
 
 
 @app.post("/history")
+@metrics.timed_handler
 def save_history(payload: SaveHistoryRequest):
     """
     Save one recommendation session into Supabase DB.
+    With HISTORY_WRITE_BEHIND on, the row is queued and written in a batch
+    shortly after; the response carries the session's client_id instead of
+    the database id.
     """
-    try:
-        conn = get_db_connection()
-        cur = conn.cursor()
+    if HISTORY_WRITE_BEHIND:
+        return queue_history(payload)
 
+    try:
         insert_query = """
             insert into recommendation_history (user_id, email, quiz_answers, recommendations)
             values (%s, %s, %s, %s)
             returning id, created_at;
         """
 
-        cur.execute(
-            insert_query,
-            (
-                payload.user_id,
-                payload.email,
-                Json(payload.quiz_answers),
-                Json(payload.recommendations),
-            ),
-        )
-        row = cur.fetchone()
-        conn.commit()
-        cur.close()
-        conn.close()
+        # "db" covers borrowing, querying, committing and returning the connection
+        with metrics.stage("db"), db_pool.connection() as conn:
+            with conn.cursor() as cur, metrics.stage("db_query"):
+                cur.execute(
+                    insert_query,
+                    (
+                        payload.user_id,
+                        payload.email,
+                        Json(payload.quiz_answers),
+                        Json(payload.recommendations),
+                    ),
+                )
+                row = cur.fetchone()
+            with metrics.stage("db_commit"):
+                conn.commit()
 
         return {
             "status": "success",
             "history_id": row["id"],
             "created_at": row["created_at"].isoformat(),
         }
+    except PoolTimeout as e:
+        print("❌ Database pool exhausted:", e)
+        raise HTTPException(status_code=503, detail="Database is busy, please retry")
     except Exception as e:
         print("❌ Error saving history:", e)
         traceback.print_exc()
         raise HTTPException(status_code=500, detail="Failed to save history")
 
 
+def queue_history(payload: SaveHistoryRequest):
+    client_id = payload.client_id or uuid.uuid4()
+    created_at = datetime.now(timezone.utc)
+    try:
+        history_writer.submit(
+            str(client_id),
+            payload.user_id,
+            payload.email,
+            payload.quiz_answers,
+            payload.recommendations,
+            created_at,
+        )
+    except QueueFull as e:
+        print("❌ History queue full:", e)
+        raise HTTPException(status_code=503, detail="History service is busy, please retry")
+
+    return {
+        "status": "queued",
+        "client_id": str(client_id),
+        "created_at": created_at.isoformat(),
+    }
+
+
+@app.get("/db/pool/stats")
+def db_pool_stats():
+    return {**db_pool.stats(), "history_writer": history_writer.stats()}
+
+
+HISTORY_FIELDS = ["id", "user_id", "email", "quiz_answers", "recommendations", "created_at"]
+HISTORY_DEFAULT_LIMIT = 50
+HISTORY_MAX_LIMIT = 200
+
+
+def encode_history_cursor(created_at, history_id) -> str:
+    raw = json.dumps([created_at.isoformat(), history_id]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_history_cursor(cursor: str):
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        created_at, history_id = json.loads(raw)
+        return datetime.fromisoformat(created_at), history_id
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
 @app.get("/history")
+@metrics.timed_handler
 def get_history(
     email: str = Query(..., description="User email to fetch history"),
+    limit: int = Query(HISTORY_DEFAULT_LIMIT, ge=1, le=HISTORY_MAX_LIMIT),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
+    fields: Optional[str] = Query(None, description="Comma-separated subset of history fields"),
 ):
     """
-    Fetch all past recommendation sessions for a given email.
+    Fetch past recommendation sessions for a given email, newest first.
+    Pages are keyset-paginated on (created_at, id): pass the returned
+    `next_cursor` to get the following page. `fields` skips heavy columns,
+    e.g. fields=id,created_at,quiz_answers for list views. The query is
+    served by the (email, created_at desc, id desc) index from
+    sql/recommendation_history.sql.
     Later we can switch to verifying JWT & using user_id.
     """
-    try:
-        conn = get_db_connection()
-        cur = conn.cursor()
+    if fields:
+        requested = [f.strip() for f in fields.split(",") if f.strip()]
+        unknown = sorted(set(requested) - set(HISTORY_FIELDS))
+        if unknown:
+            raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(unknown)}")
+        # id + created_at are always needed to build the cursor
+        columns = [f for f in HISTORY_FIELDS if f in requested or f in ("id", "created_at")]
+    else:
+        columns = HISTORY_FIELDS
+
+    after = decode_history_cursor(cursor) if cursor else None
 
-        select_query = """
-            select id, user_id, email, quiz_answers, recommendations, created_at
+    try:
+        select_query = sql.SQL("""
+            select {columns}
             from recommendation_history
-            where email = %s
-            order by created_at desc;
-        """
+            where email = %s {keyset}
+            order by created_at desc, id desc
+            limit %s;
+        """).format(
+            columns=sql.SQL(", ").join(map(sql.Identifier, columns)),
+            keyset=sql.SQL("and (created_at, id) < (%s, %s)" if after else ""),
+        )
+        params = (email, *after, limit + 1) if after else (email, limit + 1)
 
-        cur.execute(select_query, (email,))
-        rows = cur.fetchall()
-        cur.close()
-        conn.close()
-
-        history = []
-        for r in rows:
-            history.append(
-                {
-                    "id": r["id"],
-                    "user_id": r["user_id"],
-                    "email": r["email"],
-                    "quiz_answers": r["quiz_answers"],
-                    "recommendations": r["recommendations"],
-                    "created_at": r["created_at"].isoformat(),
-                }
-            )
+        with metrics.stage("db"), db_pool.connection() as conn:
+            with conn.cursor() as cur, metrics.stage("db_query"):
+                cur.execute(select_query, params)
+                rows = cur.fetchall()
+
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+        next_cursor = (
+            encode_history_cursor(rows[-1]["created_at"], rows[-1]["id"]) if has_more else None
+        )
+        history = [{**r, "created_at": r["created_at"].isoformat()} for r in rows]
 
-        return {"status": "success", "data": history}
+        return {"status": "success", "data": history, "next_cursor": next_cursor}
+    except PoolTimeout as e:
+        print("❌ Database pool exhausted:", e)
+        raise HTTPException(status_code=503, detail="Database is busy, please retry")
     except Exception as e:
         print("❌ Error fetching history:", e)
         traceback.print_exc()
         raise HTTPException(status_code=500, detail="Failed to load history")
 
+# ================================================================
+# 🧊 Recommendation Result Cache
+# ================================================================
+recommendation_cache = ResultCache(maxsize=RECOMMEND_CACHE_SIZE, ttl=RECOMMEND_CACHE_TTL)
+catalog.on_swap(lambda snapshot: recommendation_cache.invalidate())
+
+
+def recommendation_cache_key(skin_type, product_type, concerns, allergens_list, pregnancy_safe, top_n,
+                             include_ingredients=None, exclude_ingredients=None,
+                             min_price=None, max_price=None, min_rank=None,
+                             sort="similarity", rank_weight=0.3, price_weight=0.2,
+                             skin_conditions=None, recommended_boost=0.0):
+    """
+    Normalize request parameters so equivalent requests share one entry,
+    e.g. concerns "acne, dry" and "dry,acne". Only differences that cannot
+    change the result are normalized away.
+    """
+    conditions = tuple(sorted({condition_key(c) for c in skin_conditions or ()} - {""}))
+    types = ()
+    if product_type:
+        types = tuple(sorted({t.strip().lower() for t in product_type.replace("/", ",").split(",")}))
+    return (
+        SKIN_TYPE_MAPPING.get(skin_type) if skin_type else None,
+        types,
+        tuple(sorted({c.strip().lower() for c in concerns})) if concerns else (),
+        tuple(sorted({a.lower() for a in allergens_list})) if allergens_list else (),
+        bool(pregnancy_safe and pregnancy_safe.lower() == "yes"),
+        top_n,
+        tuple(sorted({normalize_ingredient(i) for i in include_ingredients or ()} - {""})),
+        tuple(sorted({normalize_ingredient(i) for i in exclude_ingredients or ()} - {""})),
+        min_price,
+        max_price,
+        min_rank,
+        sort,
+        (rank_weight, price_weight) if sort == "blend" else None,
+        conditions,
+        recommended_boost if conditions else 0.0,
+    )
+
+
+@app.get("/cache/stats")
+def cache_stats():
+    return recommendation_cache.stats()
+
+
+@app.get("/metrics")
+def prometheus_metrics():
+    """Request / stage histograms and counters in Prometheus text format."""
+    if not metrics.METRICS_ENABLED:
+        raise HTTPException(status_code=404, detail="Metrics are disabled")
+
+    status = catalog.status()
+    snap = status["snapshot"]
+    cache = recommendation_cache.stats()
+    pool = db_pool.stats()
+    lines = [
+        *metrics.gauge("veibelle_catalog_ready", "1 if a catalog snapshot is loaded.", int(status["ready"])),
+        *metrics.gauge("veibelle_catalog_reloads_total", "Catalog reloads since start.",
+                       status["reload_count"], kind="counter"),
+        *metrics.gauge("veibelle_cache_entries", "Cached /recommend results.", cache["size"]),
+        *metrics.gauge("veibelle_cache_hits_total", "Result cache hits.", cache["hits"], kind="counter"),
+        *metrics.gauge("veibelle_cache_misses_total", "Result cache misses.", cache["misses"], kind="counter"),
+        *metrics.gauge("veibelle_db_pool_in_use", "Database connections borrowed.", pool["in_use"]),
+        *metrics.gauge("veibelle_db_pool_timeouts_total", "Pool acquisitions that timed out.",
+                       pool["timeouts"], kind="counter"),
+    ]
+    if snap is not None:
+        lines += [
+            *metrics.gauge("veibelle_catalog_info", "Loaded catalog snapshot.", 1,
+                           {"version": snap["version"], "source": snap["source"]}),
+            *metrics.gauge("veibelle_catalog_products", "Products in the snapshot.", snap["n_products"]),
+            *metrics.gauge("veibelle_catalog_build_seconds", "Time taken to build the snapshot.",
+                           snap["build_seconds"]),
+        ]
+    return Response(metrics.render(lines), media_type=metrics.CONTENT_TYPE)
+
+# ================================================================
+# 🩺 Health + Catalog Admin
+# ================================================================
+def require_admin(x_admin_token: str = Header(None)):
+    """Admin endpoints are disabled unless ADMIN_TOKEN is configured."""
+    if not ADMIN_TOKEN:
+        raise HTTPException(status_code=403, detail="Admin API is disabled")
+    if not x_admin_token or not hmac.compare_digest(x_admin_token, ADMIN_TOKEN):
+        raise HTTPException(status_code=403, detail="Invalid admin token")
+
+
+@app.get("/health")
+def health():
+    return {"status": "ok", **catalog.status()}
+
+
+@app.get("/ready")
+def ready():
+    status = catalog.status()
+    if not status["ready"]:
+        raise HTTPException(status_code=503, detail="Catalog not loaded")
+    return status
+
+
+@app.post("/admin/reload", dependencies=[Depends(require_admin)])
+def reload_catalog(force: bool = Query(False)):
+    """Rebuild the catalog in the background and swap it in when ready."""
+    started = catalog.reload_async(force=force)
+    return {"status": "started" if started else "already_running", **catalog.status()}
+
+
+# --- Product upserts: vectorized with the live model, no refit (see catalog.py) ---
+class ProductIn(BaseModel):
+    """A product as stored in products_clean.csv; skin-type flags are 0 / 1."""
+    Label: str
+    brand: str
+    name: str
+    price: Optional[float] = Field(None, ge=0)
+    rank: Optional[float] = Field(None, ge=0, le=5)
+    ingredients: str = ""
+    Combination: int = Field(0, ge=0, le=1)
+    Dry: int = Field(0, ge=0, le=1)
+    Normal: int = Field(0, ge=0, le=1)
+    Oily: int = Field(0, ge=0, le=1)
+    Sensitive: int = Field(0, ge=0, le=1)
+
+
+def require_catalog():
+    snap = catalog.current
+    if snap is None:
+        raise HTTPException(status_code=503, detail="Catalog not loaded")
+    return snap
+
+
+@app.post("/admin/products", dependencies=[Depends(require_admin)], status_code=201)
+def create_product(product: ProductIn):
+    require_catalog()
+    product_id, snap = catalog.add_product(product.model_dump())
+    return {"product_id": product_id, "version": snap.version}
+
+
+@app.put("/admin/products/{product_id}", dependencies=[Depends(require_admin)])
+def replace_product(product_id: int, product: ProductIn):
+    require_catalog()
+    try:
+        snap = catalog.apply_product_edits({product_id: product.model_dump()})
+    except KeyError:
+        raise HTTPException(status_code=404, detail="Product not found")
+    return {"product_id": product_id, "version": snap.version}
+
+
+@app.delete("/admin/products/{product_id}", dependencies=[Depends(require_admin)])
+def delete_product(product_id: int):
+    require_catalog()
+    try:
+        snap = catalog.apply_product_edits({product_id: None})
+    except KeyError:
+        raise HTTPException(status_code=404, detail="Product not found")
+    return {"product_id": product_id, "deleted": True, "version": snap.version}
+
 # ================================================================
 # 🌐 FastAPI Endpoint – Recommendations
 # ================================================================
+def split_csv(value):
+    return [v.strip() for v in value.split(",")] if value else []
+
+
+SORT_PATTERN = "^(" + "|".join(SORT_MODES) + ")$"
+SKIN_CONDITION_HELP = ("Comma-separated skin conditions from allergens_clean.csv (e.g. Rosacea); "
+                       "products with an ingredient to avoid for them are excluded")
+RECOMMENDED_BOOST_HELP = ("Added to the similarity of products containing an ingredient "
+                          "recommended for skin_condition")
+
+
+class RecommendProfile(BaseModel):
+    """One quiz profile; same fields and formats as GET /recommend."""
+    skin_type: Optional[str] = None
+    product_type: Optional[str] = None
+    concerns: Optional[str] = None
+    allergens_list: Optional[str] = None
+    pregnancy_safe: Optional[str] = None
+    top_n: int = 5
+    include_ingredients: Optional[str] = None
+    exclude_ingredients: Optional[str] = None
+    min_price: Optional[float] = Field(None, ge=0)
+    max_price: Optional[float] = Field(None, ge=0)
+    min_rank: Optional[float] = Field(None, ge=0, le=5)
+    sort: str = Field("similarity", pattern=SORT_PATTERN)
+    rank_weight: float = Field(0.3, ge=0, le=1)
+    price_weight: float = Field(0.2, ge=0, le=1)
+    skin_condition: Optional[str] = None
+    recommended_boost: float = Field(0.0, ge=0, le=1)
+
+
+class BatchRecommendRequest(BaseModel):
+    profiles: List[RecommendProfile] = Field(..., max_length=RECOMMEND_BATCH_MAX)
+
+
 @app.get("/recommend")
+@metrics.timed_handler
 def recommend_products(
     skin_type: str = Query(None),
     product_type: str = Query(None),
@@ -355,18 +771,52 @@ def recommend_products(
     allergens_list: str = Query(None),
     pregnancy_safe: str = Query(None),
     top_n: int = Query(5),
+    include_ingredients: str = Query(None, description="Comma-separated; products must contain all"),
+    exclude_ingredients: str = Query(None, description="Comma-separated; products must contain none"),
+    min_price: float = Query(None, ge=0),
+    max_price: float = Query(None, ge=0),
+    min_rank: float = Query(None, ge=0, le=5),
+    sort: str = Query("similarity", pattern=SORT_PATTERN,
+                      description="similarity | rank | price (cheapest first) | blend"),
+    rank_weight: float = Query(0.3, ge=0, le=1, description="blend only"),
+    price_weight: float = Query(0.2, ge=0, le=1, description="blend only; similarity gets the rest"),
+    skin_condition: str = Query(None, description=SKIN_CONDITION_HELP),
+    recommended_boost: float = Query(0.0, ge=0, le=1, description=RECOMMENDED_BOOST_HELP),
 ):
+    condition_list = split_csv(skin_condition)
+    check_skin_conditions(catalog.current, condition_list)
+    include_list = split_csv(include_ingredients)
+    exclude_list = split_csv(exclude_ingredients)
+    check_ingredients(catalog.current, include_list, exclude_list)
     try:
-        concern_list = [c.strip() for c in concerns.split(",")] if concerns else []
-        allergen_list = [a.strip() for a in allergens_list.split(",")] if allergens_list else []
-
-        results = get_recommendations(
-            skin_type=skin_type,
-            product_type=product_type,
-            concerns=concern_list,
-            allergens_list=allergen_list,
-            pregnancy_safe=pregnancy_safe,
-            top_n=top_n,
+        concern_list = split_csv(concerns)
+        allergen_list = split_csv(allergens_list)
+
+        key = recommendation_cache_key(
+            skin_type, product_type, concern_list, allergen_list, pregnancy_safe, top_n,
+            include_list, exclude_list, min_price, max_price, min_rank,
+            sort, rank_weight, price_weight, condition_list, recommended_boost,
+        )
+        results = recommendation_cache.get_or_compute(
+            key,
+            lambda: get_recommendations(
+                skin_type=skin_type,
+                product_type=product_type,
+                concerns=concern_list,
+                allergens_list=allergen_list,
+                pregnancy_safe=pregnancy_safe,
+                top_n=top_n,
+                include_ingredients=include_list,
+                exclude_ingredients=exclude_list,
+                min_price=min_price,
+                max_price=max_price,
+                min_rank=min_rank,
+                sort=sort,
+                rank_weight=rank_weight,
+                price_weight=price_weight,
+                skin_conditions=condition_list,
+                recommended_boost=recommended_boost,
+            ),
         )
 
         if not results:
@@ -376,4 +826,294 @@ def recommend_products(
     except Exception as e:
         print("❌ Error in /recommend:", e)
         traceback.print_exc()
+        metrics.count_error("/recommend")
         return {"results": [], "message": "Error occurred during recommendation."}
+
+
+@app.post("/recommend/batch")
+@metrics.timed_handler
+def recommend_batch(payload: BatchRecommendRequest):
+    """
+    Score many quiz profiles at once (campaign precomputation, A/B tests).
+    `results[i]` answers `profiles[i]`.
+    """
+    for p in payload.profiles:
+        check_skin_conditions(catalog.current, split_csv(p.skin_condition))
+        check_ingredients(catalog.current, split_csv(p.include_ingredients),
+                          split_csv(p.exclude_ingredients))
+    try:
+        profiles = [
+            {
+                "skin_type": p.skin_type,
+                "product_type": p.product_type,
+                "concerns": split_csv(p.concerns),
+                "allergens_list": split_csv(p.allergens_list),
+                "pregnancy_safe": p.pregnancy_safe,
+                "top_n": p.top_n,
+                "include_ingredients": split_csv(p.include_ingredients),
+                "exclude_ingredients": split_csv(p.exclude_ingredients),
+                "min_price": p.min_price,
+                "max_price": p.max_price,
+                "min_rank": p.min_rank,
+                "sort": p.sort,
+                "rank_weight": p.rank_weight,
+                "price_weight": p.price_weight,
+                "skin_conditions": split_csv(p.skin_condition),
+                "recommended_boost": p.recommended_boost,
+            }
+            for p in payload.profiles
+        ]
+        return {"results": get_batch_recommendations(profiles)}
+    except Exception as e:
+        print("❌ Error in /recommend/batch:", e)
+        traceback.print_exc()
+        raise HTTPException(status_code=500, detail="Error occurred during batch recommendation.")
+
+# ================================================================
+# 📤 Export – the full ranked list, streamed
+# ================================================================
+EXPORT_COLUMNS = ["position", "product_id", "Label", "brand", "name", "price", "rank",
+                  "similarity", "pregnancy_unsafe_ingredients"]
+
+
+def _number(value):
+    return None if value != value else round(value, 2)  # NaN -> null
+
+
+def export_record(snap, row, position, score):
+    product = snap.products.row(row)
+    return {
+        "position": position,
+        "product_id": product.product_id,
+        **product.to_record(score),
+        "price": _number(product.price),
+        "rank": _number(product.rank),
+    }
+
+
+def ranked_chunks(snap, scores, mask, sort, rank_weight, price_weight):
+    """
+    Row arrays of at most EXPORT_CHUNK rows, in export order. Each chunk is
+    partitioned out of the rows not yet sent, so the first one goes out
+    after O(matches) work and later ones are only ranked if the client
+    keeps reading.
+    """
+    prior = snap.products.centrality
+    if sort == "similarity":
+        yield from iter_ranked_rows(scores, mask, EXPORT_CHUNK, prior)
+        return
+    # unlike /recommend (RERANK_POOL candidates), the whole matching set is re-ranked
+    yield from iter_reranked_rows(scores, mask, EXPORT_CHUNK, snap.products.price, snap.products.rank,
+                                  sort, rank_weight, price_weight, prior)
+
+
+def serialize_chunk(records, fmt, header):
+    if fmt == "ndjson":
+        return "".join(json.dumps(r, ensure_ascii=False) + "\n" for r in records).encode("utf-8")
+    out = io.StringIO()
+    writer = csv.DictWriter(out, fieldnames=EXPORT_COLUMNS)
+    if header:
+        writer.writeheader()
+    for r in records:
+        writer.writerow({**r, "pregnancy_unsafe_ingredients": "; ".join(r["pregnancy_unsafe_ingredients"])})
+    return out.getvalue().encode("utf-8")
+
+
+def export_stream(snap, scores, mask, fmt, sort, rank_weight, price_weight, limit):
+    """
+    Generator behind /recommend/export. It holds one chunk of records at a
+    time; Starlette stops pulling from it when the client disconnects, so
+    an abandoned export costs at most one more chunk.
+    """
+    position = 0
+    try:
+        for rows in ranked_chunks(snap, scores, mask, sort, rank_weight, price_weight):
+            if limit is not None:
+                rows = rows[:limit - position]
+            records = [export_record(snap, row, position + i + 1, scores[row])
+                       for i, row in enumerate(rows.tolist())]
+            yield serialize_chunk(records, fmt, header=position == 0)
+            position += len(records)
+            if limit is not None and position >= limit:
+                return
+        if position == 0 and fmt == "csv":
+            yield serialize_chunk([], fmt, header=True)
+    except Exception as e:
+        # the status line is already sent; the client sees a truncated body
+        print("❌ Error in /recommend/export stream:", e)
+        traceback.print_exc()
+        metrics.count_error("/recommend/export")
+        raise
+
+
+EXPORT_MEDIA_TYPES = {"ndjson": "application/x-ndjson", "csv": "text/csv; charset=utf-8"}
+
+
+@app.get("/recommend/export")
+def export_recommendations(
+    skin_type: str = Query(None),
+    product_type: str = Query(None),
+    concerns: str = Query(None),
+    allergens_list: str = Query(None),
+    pregnancy_safe: str = Query(None),
+    include_ingredients: str = Query(None, description="Comma-separated; products must contain all"),
+    exclude_ingredients: str = Query(None, description="Comma-separated; products must contain none"),
+    min_price: float = Query(None, ge=0),
+    max_price: float = Query(None, ge=0),
+    min_rank: float = Query(None, ge=0, le=5),
+    sort: str = Query("similarity", pattern=SORT_PATTERN,
+                      description="similarity | rank | price (cheapest first) | blend"),
+    rank_weight: float = Query(0.3, ge=0, le=1, description="blend only"),
+    price_weight: float = Query(0.2, ge=0, le=1, description="blend only; similarity gets the rest"),
+    limit: int = Query(None, ge=1, description="Stop after this many products (default: all)"),
+    fmt: str = Query("ndjson", alias="format", pattern="^(ndjson|csv)$"),
+    skin_condition: str = Query(None, description=SKIN_CONDITION_HELP),
+    recommended_boost: float = Query(0.0, ge=0, le=1, description=RECOMMENDED_BOOST_HELP),
+):
+    """
+    Every product matching the /recommend filters, in rank order, streamed
+    as NDJSON (one product per line) or CSV. For the full ranked catalog
+    use this instead of /recommend with a huge top_n: rows are ranked and
+    serialized EXPORT_CHUNK at a time, so memory stays flat and the first
+    rows go out after one partial sort. The stream reads one snapshot
+    throughout, even if the catalog is reloaded meanwhile.
+    """
+    snap = catalog.current
+    if snap is None:
+        raise HTTPException(status_code=503, detail="Catalog not loaded")
+    condition_list = split_csv(skin_condition)
+    check_skin_conditions(snap, condition_list)
+    include_list = split_csv(include_ingredients)
+    exclude_list = split_csv(exclude_ingredients)
+    check_ingredients(snap, include_list, exclude_list)
+
+    with metrics.stage("filter"):
+        mask = filter_mask(snap, skin_type, product_type, split_csv(allergens_list), pregnancy_safe,
+                           include_list, exclude_list,
+                           min_price, max_price, min_rank, condition_list)
+    concern_list = split_csv(concerns)
+    concern_text = expand_concerns(concern_list) if concern_list else DEFAULT_CONCERN_TEXT
+    with metrics.stage("transform"):
+        user_vector = snap.vectorizer.transform([concern_text])
+    with metrics.stage("score"):
+        scores = score_all(snap.full_tfidf, user_vector)
+        scores = boost_recommended(snap, scores, condition_list, recommended_boost)
+
+    headers = {}
+    if fmt == "csv":
+        headers["Content-Disposition"] = 'attachment; filename="recommendations.csv"'
+    return StreamingResponse(
+        export_stream(snap, scores, mask, fmt, sort, rank_weight, price_weight, limit),
+        media_type=EXPORT_MEDIA_TYPES[fmt],
+        headers=headers,
+    )
+
+# ================================================================
+# 🧬 Similar Products
+# ================================================================
+def live_neighbours(snap, row):
+    """
+    Neighbours of a product with no row in the precomputed graph (edited
+    since the last refit, or the model was fitted in-process), scored
+    against the whole catalog.
+    """
+    scores = score_all(snap.full_tfidf, snap.full_tfidf.getrow(row))
+    mask = snap.filter_index.all_rows()
+    mask[row] = False
+    rows = top_k_rows(scores, mask, SIMILAR_K)
+    return rows, scores[rows]
+
+
+@app.get("/products/{product_id}/similar")
+@metrics.timed_handler
+def similar_products(
+    product_id: int,
+    skin_type: str = Query(None),
+    product_type: str = Query(None),
+    allergens_list: str = Query(None),
+    pregnancy_safe: str = Query(None),
+    top_n: int = Query(5, ge=1),
+    min_price: float = Query(None, ge=0),
+    max_price: float = Query(None, ge=0),
+    min_rank: float = Query(None, ge=0, le=5),
+):
+    """
+    Products most similar to `product_id` (the product's row id, as used in
+    product_allergens), from the precomputed top-k neighbour graph. The same
+    filters as /recommend apply to the neighbours; at most SIMILAR_K
+    neighbours are stored per product, so heavy filtering can return fewer.
+    """
+    snap = catalog.current
+    if snap is None:
+        raise HTTPException(status_code=503, detail="Catalog not loaded")
+
+    row = snap.products.position(product_id)
+    if row < 0:
+        raise HTTPException(status_code=404, detail="Product not found")
+
+    with metrics.stage("filter"):
+        mask = filter_mask(snap, skin_type, product_type, split_csv(allergens_list), pregnancy_safe,
+                           min_price=min_price, max_price=max_price, min_rank=min_rank)
+    if row < snap.similar.shape[0]:
+        rows, scores = neighbours(snap.similar, row)
+    else:
+        rows, scores = live_neighbours(snap, row)
+    keep = mask[rows]
+    rows, scores = rows[keep][:top_n], scores[keep][:top_n]
+
+    with metrics.stage("records"):
+        return {
+            "product": snap.products.row(row).to_record(1.0),
+            "results": build_records(snap, rows, scores),
+        }
+
+# ================================================================
+# 🩹 Skin Conditions
+# ================================================================
+@app.get("/skin-conditions")
+@metrics.timed_handler
+def list_skin_conditions():
+    """
+    Every skin condition ?skin_condition= accepts, with the ingredient terms
+    its avoid / recommended filters search for and, under `unmatched`, the
+    terms no product in the catalog contains.
+    """
+    snap = require_catalog()
+    index = snap.filter_index
+    return [
+        {
+            "name": c.name,
+            "avoid": list(c.avoid),
+            "recommended": list(c.recommended),
+            "unmatched": list(index.unmatched.get(key, ())),
+        }
+        for key, c in index.conditions.items()
+    ]
+
+# ================================================================
+# 🔤 Ingredient Autocomplete + Lookup
+# ================================================================
+@app.get("/ingredients/suggest")
+@metrics.timed_handler
+def suggest_ingredients(
+    q: str = Query(..., min_length=1, max_length=200),
+    limit: int = Query(10, ge=1, le=SUGGEST_MAX),
+):
+    """
+    Ingredient names starting with `q` (names first, then names with a
+    later word starting with it), most used first, from the snapshot's
+    prefix index (see ingredient_index.py).
+    """
+    snap = require_catalog()
+    return {"query": q, "results": snap.ingredient_index.suggest(q, limit)}
+
+
+@app.get("/ingredients/{name}")
+@metrics.timed_handler
+def get_ingredient(name: str):
+    """An ingredient by name or scientific name (case and spacing don't matter)."""
+    snap = require_catalog()
+    entry = snap.ingredient_index.lookup(name)
+    if entry is None:
+        raise HTTPException(status_code=404, detail="Ingredient not found")
+    return snap.ingredient_index.describe(entry)
@@ -0,0 +1,64 @@
+"""
+Throughput of POST /recommend/batch scoring vs one get_recommendations call
+per profile (the in-process lower bound of sequential GET /recommend calls).
+
+Usage (from backend/):
+    python benchmarks/bench_batch.py [--sizes 10 100 1000] [--seed 0]
+"""
+import argparse
+import contextlib
+import io
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+with contextlib.redirect_stdout(io.StringIO()):
+    import api  # noqa: E402
+
+SKIN_TYPES = [None, *api.SKIN_TYPE_MAPPING]
+PRODUCT_TYPES = [None, "Moisturizer", "Cleanser", "Face Mask", "Treatment", "Eye cream", "Sun protect"]
+CONCERNS = list(api.CONCERN_SYNONYMS)
+ALLERGENS = ["niacinamide", "allantoin", "sulfur", "aloe vera", "kojic acid"]
+
+
+def random_profile(rng):
+    return {
+        "skin_type": rng.choice(SKIN_TYPES),
+        "product_type": rng.choice(PRODUCT_TYPES),
+        "concerns": rng.sample(CONCERNS, rng.randint(0, 3)),
+        "allergens_list": rng.sample(ALLERGENS, rng.randint(0, 2)),
+        "pregnancy_safe": rng.choice([None, "yes"]),
+        "top_n": 5,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 100, 1000])
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    rng = random.Random(args.seed)
+
+    print(f"{'profiles':>9}{'sequential/s':>15}{'batch/s':>12}{'speedup':>10}")
+    for size in args.sizes:
+        profiles = [random_profile(rng) for _ in range(size)]
+        with contextlib.redirect_stdout(io.StringIO()):
+            start = time.perf_counter()
+            sequential = [api.get_recommendations(**p) for p in profiles]
+            seq_s = time.perf_counter() - start
+
+            start = time.perf_counter()
+            batch = api.get_batch_recommendations(profiles)
+            batch_s = time.perf_counter() - start
+
+        for a, b in zip(sequential, batch):
+            if [r["name"] for r in a] != [r["name"] for r in b]:
+                raise SystemExit("❌ Batch results differ from sequential results")
+        print(f"{size:>9}{size / seq_s:>15.0f}{size / batch_s:>12.0f}{seq_s / batch_s:>9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
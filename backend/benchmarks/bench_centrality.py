@@ -0,0 +1,73 @@
+"""
+Product centrality: the original cosine_similarity(X, X).mean(axis=1)
+vs the blocked mean-row job in recommender.py.
+
+Usage (from backend/):
+    python benchmarks/bench_centrality.py [--sizes 1000 5000 20000 100000] [--dense-max 10000]
+
+For each catalog size (synthetic products, see synthetic_catalog.py) the
+ingredient TF-IDF matrix is built once, then each method is timed and its
+peak traced memory reported. The N × N version is skipped above
+--dense-max products; where both run, the largest absolute difference
+between their scores is printed.
+"""
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+from sklearn.metrics.pairwise import cosine_similarity
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import recommender  # noqa: E402
+import synthetic_catalog  # noqa: E402
+
+
+def dense_centrality(matrix):
+    return cosine_similarity(matrix, matrix).mean(axis=1)
+
+
+def measure(fn, *args):
+    """(result, seconds, peak traced MB) of one call."""
+    start = time.perf_counter()
+    fn(*args)
+    seconds = time.perf_counter() - start
+    tracemalloc.start()  # separate run: tracing slows allocation-heavy code down
+    result = fn(*args)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return result, seconds, peak / 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 5000, 20000, 100000])
+    parser.add_argument("--dense-max", type=int, default=10000)
+    parser.add_argument("--block-rows", type=int, default=recommender.BLOCK_ROWS)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    profile = synthetic_catalog.CatalogProfile()
+    print(f"{'products':>9}{'method':>10}{'seconds':>10}{'peak MB':>10}{'max diff':>11}")
+    for n in args.sizes:
+        rng = np.random.default_rng(args.seed)
+        products = synthetic_catalog.generate_products(rng, profile, n)
+        matrix = recommender.ingredient_tfidf(products)
+
+        blocked, seconds, peak = measure(recommender.centrality_scores, matrix, args.block_rows)
+        print(f"{n:>9}{'blocked':>10}{seconds:>10.3f}{peak:>10.1f}{'':>11}")
+        _, seconds, peak = measure(recommender.label_centrality_scores, matrix, products["Label"], args.block_rows)
+        print(f"{n:>9}{'by label':>10}{seconds:>10.3f}{peak:>10.1f}{'':>11}")
+        if n <= args.dense_max:
+            dense, seconds, peak = measure(dense_centrality, matrix)
+            diff = float(np.abs(dense - blocked).max())
+            print(f"{n:>9}{'N × N':>10}{seconds:>10.3f}{peak:>10.1f}{diff:>11.1e}")
+
+
+if __name__ == "__main__":
+    main()
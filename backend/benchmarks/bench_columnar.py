@@ -0,0 +1,115 @@
+"""
+Compare dataset load time and resident memory: full CSV reads (the old
+loader) vs. column-pruned, compact-dtype reads from CSV and from Parquet.
+
+Usage (from backend/):
+    python benchmarks/bench_columnar.py [--scale 1 10 50] [--runs 3]
+
+`--scale N` repeats the processed catalog N times (relation ids shifted,
+product text made unique per copy) into a temp directory. Each measurement is a fresh
+interpreter; "rss MB" is VmRSS growth across the load.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+import pandas as pd
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+PROBE = """
+import contextlib, io, json, os, sys, time
+import pandas as pd
+import model_store
+
+def rss_mb():
+    with open("/proc/self/status") as f:
+        for line in f:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1]) / 1024
+
+paths = json.loads(os.environ["BENCH_PATHS"])
+before = rss_mb()
+t0 = time.perf_counter()
+with contextlib.redirect_stdout(io.StringIO()):
+    if sys.argv[1] == "legacy":
+        frames = {name: pd.read_csv(path) for name, path in paths.items()}
+    else:
+        frames = model_store.read_datasets(paths)
+seconds = time.perf_counter() - t0
+print(json.dumps({
+    "load_s": seconds,
+    "rss_mb": rss_mb() - before,
+    "frames_mb": sum(f.memory_usage(deep=True).sum() for f in frames.values()) / 2**20,
+}))
+"""
+
+MODES = {
+    "csv (old)": ("legacy", "csv"),
+    "csv pruned": ("pruned", "csv"),
+    "parquet pruned": ("pruned", "auto"),
+}
+
+
+def scaled_catalog(out_dir, scale):
+    """Write `scale` copies of the processed datasets into `out_dir`."""
+    import columnar
+    import model_store
+
+    paths = {}
+    n_products = len(pd.read_csv(model_store.DATASET_PATHS["products"], usecols=["name"]))
+    for name, src in model_store.DATASET_PATHS.items():
+        if not os.path.exists(src):
+            continue  # optional input (product centrality) not scored yet
+        frame = pd.read_csv(src)
+        if name == "ingredients":
+            copies = [frame]
+        elif "product_id" in frame.columns:
+            copies = [frame.assign(product_id=frame["product_id"] + i * n_products) for i in range(scale)]
+        else:
+            # distinct text per copy, so the CSV parser can't share string objects
+            copies = [
+                frame.assign(name=frame["name"] + f" #{i}", ingredients=frame["ingredients"] + f", lot {i}")
+                for i in range(scale)
+            ]
+        path = os.path.join(out_dir, os.path.basename(src))
+        pd.concat(copies, ignore_index=True).to_csv(path, index=False)
+        columnar.write_parquet(path)
+        paths[name] = path
+    return paths
+
+
+def probe(mode, dataset_format, paths):
+    env = dict(os.environ, BENCH_PATHS=json.dumps(paths), DATASET_FORMAT=dataset_format)
+    out = subprocess.run(
+        [sys.executable, "-c", PROBE, mode], cwd=BACKEND_DIR, env=env,
+        capture_output=True, text=True, check=True,
+    )
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--scale", type=int, nargs="+", default=[1, 10, 50])
+    parser.add_argument("--runs", type=int, default=3)
+    args = parser.parse_args()
+
+    sys.path.insert(0, BACKEND_DIR)
+    print(f"{'scale':>6}  {'mode':<16}{'load ms':>10}{'rss MB':>10}{'frames MB':>11}")
+    for scale in args.scale:
+        with tempfile.TemporaryDirectory() as tmp:
+            paths = scaled_catalog(tmp, scale)
+            for label, (mode, dataset_format) in MODES.items():
+                runs = [probe(mode, dataset_format, paths) for _ in range(args.runs)]
+                load = statistics.median(r["load_s"] for r in runs) * 1000
+                rss = statistics.median(r["rss_mb"] for r in runs)
+                frames = runs[0]["frames_mb"]
+                print(f"{scale:>6}  {label:<16}{load:>10.1f}{rss:>10.1f}{frames:>11.1f}")
+
+
+if __name__ == "__main__":
+    main()
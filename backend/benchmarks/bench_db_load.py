@@ -0,0 +1,95 @@
+"""
+Database load time: DataFrame.to_sql (what import_to_mysql.py did) vs
+bulk_load.py's chunked COPY into staging tables plus swap, on a local
+Postgres.
+
+Usage (from backend/):
+    python benchmarks/bench_db_load.py --database-url postgresql://localhost/veibelle_bench
+        [--products 100000] [--repeat 3] [--keep]
+
+Both loaders get the same synthetic processed catalog (see
+synthetic_catalog.py) and write into their own schema (bench_to_sql,
+bench_copy), which is dropped afterwards unless --keep is given. to_sql
+needs SQLAlchemy, and it loads without indexes, so its numbers are a
+lower bound for what the old script would cost with them.
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import pandas as pd
+import psycopg2
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import bulk_load  # noqa: E402
+import synthetic_catalog  # noqa: E402
+
+
+def load_to_sql(dsn, processed, schema):
+    from sqlalchemy import create_engine, text  # optional: only the baseline needs it
+
+    # psycopg2 like the rest of the backend; SQLAlchemy 2.1 defaults to psycopg 3
+    url = dsn.replace("postgres://", "postgresql://", 1).replace("postgresql://", "postgresql+psycopg2://", 1)
+    engine = create_engine(url)
+    rows = 0
+    with engine.begin() as conn:
+        conn.execute(text(f"create schema if not exists {schema}"))
+        for table in bulk_load.TABLES:
+            frame = pd.read_csv(os.path.join(processed, table.filename))
+            frame.to_sql(table.name, con=conn, schema=schema, if_exists="replace", index=False)
+            rows += len(frame)
+    engine.dispose()
+    return rows
+
+
+def load_copy(dsn, processed, schema):
+    return sum(bulk_load.load_postgres(dsn, schema=schema, processed=processed).values())
+
+
+def drop_schema(dsn, schema):
+    conn = psycopg2.connect(dsn)
+    try:
+        with conn, conn.cursor() as cur:
+            cur.execute(f"drop schema if exists {schema} cascade")
+    finally:
+        conn.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database-url", default=os.getenv("BENCH_DATABASE_URL"),
+                        help="a scratch local Postgres (default: BENCH_DATABASE_URL)")
+    parser.add_argument("--products", type=int, default=100000)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--keep", action="store_true", help="keep the bench schemas")
+    args = parser.parse_args()
+    if not args.database_url:
+        parser.error("pass --database-url (or set BENCH_DATABASE_URL) pointing at a scratch database")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        synthetic_catalog.generate(tmp, args.products, args.seed)
+        cases = [("to_sql", load_to_sql, "bench_to_sql"), ("COPY + swap", load_copy, "bench_copy")]
+        print(f"{'loader':<14}{'rows':>10}{'best s':>9}{'rows/s':>11}")
+        try:
+            for label, load, schema in cases:
+                best, rows = None, 0
+                for _ in range(args.repeat):
+                    start = time.perf_counter()
+                    rows = load(args.database_url, tmp, schema)
+                    elapsed = time.perf_counter() - start
+                    best = elapsed if best is None else min(best, elapsed)
+                print(f"{label:<14}{rows:>10}{best:>9.2f}{rows / best:>11.0f}")
+        finally:
+            if not args.keep:
+                for _, _, schema in cases:
+                    drop_schema(args.database_url, schema)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""
+Full ranked list for one profile: /recommend with a huge top_n vs the
+streamed /recommend/export (NDJSON).
+
+Usage (from backend/):
+    python benchmarks/bench_export.py [--products 20000] [--data-dir DIR]
+
+Reported per endpoint: time to first body byte, total time, body size and
+peak Python memory while serving (tracemalloc, in a separate run). Runs
+against a synthetic catalog (see synthetic_catalog.py) with the result
+cache disabled.
+"""
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--products", type=int, default=20000)
+    parser.add_argument("--data-dir", default=os.path.join(tempfile.gettempdir(), "veibelle-bench-export"))
+    return parser.parse_args()
+
+
+async def asgi_get(app, path, query):
+    """(time to first body byte, total time, body bytes) of one GET."""
+    scope = {
+        "type": "http", "method": "GET", "path": path, "raw_path": path.encode(),
+        "query_string": query.encode(), "headers": [], "http_version": "1.1",
+        "scheme": "http", "server": ("bench", 80), "client": ("bench", 1), "root_path": "",
+    }
+    done = asyncio.Event()
+    first = None
+    size = 0
+
+    async def receive():
+        await done.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        nonlocal first, size
+        if message["type"] == "http.response.body":
+            if first is None and message.get("body"):
+                first = time.perf_counter()
+            size += len(message.get("body", b""))
+            if not message.get("more_body"):
+                done.set()
+
+    start = time.perf_counter()
+    await app(scope, receive, send)
+    end = time.perf_counter()
+    return (first or end) - start, end - start, size
+
+
+def main():
+    args = parse_args()
+    processed = os.path.join(args.data_dir, f"processed-{args.products}")
+    os.environ.update({
+        "PROCESSED_DIR": processed,
+        "MODEL_ARTIFACTS_DIR": os.path.join(args.data_dir, "artifacts"),
+        "RECOMMEND_CACHE_SIZE": "0",
+        "CATALOG_WATCH_INTERVAL": "0",
+        "CATALOG_REFIT_INTERVAL": "0",
+    })
+
+    import model_store
+    import synthetic_catalog
+    if not os.path.exists(os.path.join(processed, "products_clean.csv")):
+        profile = synthetic_catalog.CatalogProfile(os.path.join(BACKEND_DIR, "processed"))
+        synthetic_catalog.generate(processed, args.products, profile=profile)
+    model_store.build()
+
+    import api
+    query = "concerns=hydrating,dry"
+    cases = [
+        ("/recommend top_n=all", "/recommend", f"{query}&top_n={args.products}"),
+        ("/recommend/export", "/recommend/export", query),
+    ]
+    print(f"{'endpoint':<22}{'first byte ms':>14}{'total ms':>10}{'MB sent':>9}{'peak MB':>9}")
+    for label, path, q in cases:
+        asyncio.run(asgi_get(api.app, path, q))  # warm-up
+        first, total, size = asyncio.run(asgi_get(api.app, path, q))
+        tracemalloc.start()  # separate run: tracing slows allocation-heavy code down
+        asyncio.run(asgi_get(api.app, path, q))
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        print(f"{label:<22}{first * 1000:>14.1f}{total * 1000:>10.1f}{size / 1e6:>9.1f}{peak / 1e6:>9.1f}")
+
+
+if __name__ == "__main__":
+    main()
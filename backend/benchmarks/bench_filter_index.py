@@ -0,0 +1,73 @@
+"""
+Compare the indexed recommendation path against the original DataFrame path.
+
+Usage (from backend/):
+    python benchmarks/bench_filter_index.py [--repeat 200] [--top-n 5]
+
+Every filter combination is checked for identical results before timing.
+"""
+import argparse
+import contextlib
+import io
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+with contextlib.redirect_stdout(io.StringIO()):
+    import api  # noqa: E402
+
+from legacy import legacy_get_recommendations, same_ranking  # noqa: E402
+
+COMBINATIONS = {
+    "none": {},
+    "skin": {"skin_type": "Oily Skin"},
+    "product": {"product_type": "Moisturizer"},
+    "allergens": {"allergens_list": ["niacinamide", "aloe vera"]},
+    "pregnancy": {"pregnancy_safe": "yes"},
+    "skin+product": {"skin_type": "Dry Skin", "product_type": "Cleanser,Face Mask"},
+    "all": {
+        "skin_type": "Sensitive Skin",
+        "product_type": "Moisturizer/Treatment",
+        "concerns": ["acne", "dry"],
+        "allergens_list": ["niacinamide", "sulfur"],
+        "pregnancy_safe": "yes",
+    },
+}
+
+
+def time_call(fn, kwargs, repeat):
+    with contextlib.redirect_stdout(io.StringIO()):
+        start = time.perf_counter()
+        for _ in range(repeat):
+            fn(**kwargs)
+        elapsed = time.perf_counter() - start
+    return elapsed / repeat * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--repeat", type=int, default=200)
+    parser.add_argument("--top-n", type=int, default=5)
+    args = parser.parse_args()
+
+    def legacy(**kw):
+        return legacy_get_recommendations(api, **kw)
+
+    print(f"{'filters':<14}{'legacy ms':>12}{'indexed ms':>12}{'speedup':>10}")
+    for name, kwargs in COMBINATIONS.items():
+        kwargs = dict(kwargs, top_n=args.top_n)
+        with contextlib.redirect_stdout(io.StringIO()):
+            expected = legacy(**kwargs)
+            actual = api.get_recommendations(**kwargs)
+        if not same_ranking(expected, actual):
+            raise SystemExit(f"❌ Result mismatch for '{name}':\n{expected}\n{actual}")
+
+        before = time_call(legacy, kwargs, args.repeat)
+        after = time_call(api.get_recommendations, kwargs, args.repeat)
+        print(f"{name:<14}{before:>12.3f}{after:>12.3f}{before / after:>9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""
+Ingredient autocomplete: a linear scan over every name (what the front end
+does with the shipped ingredients CSV) vs the snapshot's prefix index.
+
+Usage (from backend/):
+    python benchmarks/bench_ingredient_suggest.py [--sizes 1000 10000 100000] [--repeat 2000]
+
+Per vocabulary size (the real ingredient names padded with synthetic
+variants; 100k products with Zipf-distributed ingredients give the counts):
+    build ms     build_ingredient_index() (once per snapshot)
+    scan µs      startswith over all names, then sort the hits by count
+    suggest µs   IngredientIndex.suggest(), averaged over the queries
+    lookup µs    IngredientIndex.lookup() of an exact name
+Whole-name suggestions are checked against the scan before timing.
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+from incidence import build_incidence, normalize_ingredient  # noqa: E402
+from ingredient_index import build_ingredient_index  # noqa: E402
+from model_store import DATASET_PATHS  # noqa: E402
+
+QUERIES = ["a", "ni", "hyal", "acid", "vitamin c", "sal", "zz"]
+SUFFIXES = ["extract", "oil", "butter", "ferment", "complex", "peptide", "acid", "ester", "water", "powder"]
+
+
+def vocabulary(base_names, n, rng):
+    names = list(dict.fromkeys(normalize_ingredient(x) for x in base_names if normalize_ingredient(x)))
+    while len(names) < n:
+        names.append(f"{rng.choice(names[:len(base_names)])} {rng.choice(SUFFIXES)} {len(names)}")
+    return names[:n]
+
+
+def scan(names, counts, query, limit):
+    prefix = normalize_ingredient(query)
+    hits = [i for i, name in enumerate(names) if name.startswith(prefix)]
+    hits.sort(key=lambda i: (-counts[i], names[i]))
+    return [names[i] for i in hits[:limit]]
+
+
+def timed(fn, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = fn()
+    return result, (time.perf_counter() - start) / repeat
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--products", type=int, default=100000)
+    parser.add_argument("--limit", type=int, default=10)
+    parser.add_argument("--repeat", type=int, default=2000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    base_names = pd.read_csv(DATASET_PATHS["ingredients"], usecols=["name"])["name"].dropna().tolist()
+    products = pd.DataFrame(index=pd.RangeIndex(1, args.products + 1, name="product_id"))
+
+    print(f"{'names':>8}{'build ms':>10}{'scan µs':>10}{'suggest µs':>12}{'lookup µs':>11}")
+    for n in args.sizes:
+        names = vocabulary(base_names, n, rng)
+        per_product = 8
+        picks = np.minimum(rng.zipf(1.3, args.products * per_product) - 1, n - 1)
+        relation = pd.DataFrame({
+            "product_id": np.repeat(products.index.to_numpy(), per_product),
+            "ingredient_name": np.asarray(names, dtype=object)[picks],
+        })
+        incidence = build_incidence(products, (relation, "ingredient_name"))
+        index, build_s = timed(lambda: build_ingredient_index(None, incidence), 1)
+
+        counts_by_name = incidence.product_counts()
+        counts = [counts_by_name.get(name, 0) for name in names]
+        for q in QUERIES:
+            expected = scan(names, counts, q, args.limit)
+            got = [r["name"] for r in index.suggest(q, args.limit)][:len(expected)]
+            assert got == expected, (q, got, expected)
+
+        scan_repeat = max(1, args.repeat // max(1, n // 1000))
+        scan_s = sum(timed(lambda: scan(names, counts, q, args.limit), scan_repeat)[1] for q in QUERIES)
+        suggest_s = sum(timed(lambda: index.suggest(q, args.limit), args.repeat)[1] for q in QUERIES)
+        _, lookup_s = timed(lambda: index.lookup(names[n // 2]), args.repeat)
+        print(f"{n:>8}{build_s * 1e3:>10.1f}{scan_s / len(QUERIES) * 1e6:>10.1f}"
+              f"{suggest_s / len(QUERIES) * 1e6:>12.1f}{lookup_s * 1e6:>11.2f}")
+
+
+if __name__ == "__main__":
+    main()
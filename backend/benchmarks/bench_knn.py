@@ -0,0 +1,75 @@
+"""
+Build time and peak memory of the sparse top-k neighbour graph at
+multiples of today's catalog size.
+
+Usage (from backend/):
+    python benchmarks/bench_knn.py [--scales 1 10 100] [--k 20] [--sample-rows 5000]
+
+Larger catalogs are synthesized by stacking copies of full_tfidf with
+per-row random reweighting (rows re-normalized). When a catalog has more
+than --sample-rows rows, only that many rows are queried and the full
+build time is extrapolated linearly (each row costs the same: one block
+product against the whole catalog). Peak memory is measured with
+tracemalloc, which tracks NumPy/SciPy buffers.
+"""
+import argparse
+import contextlib
+import io
+import os
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+import scipy.sparse as sp
+from sklearn.preprocessing import normalize
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+with contextlib.redirect_stdout(io.StringIO()):
+    import api  # noqa: E402
+
+from similar_index import build_knn  # noqa: E402
+
+
+def synthetic_catalog(base, scale, rng):
+    if scale == 1:
+        return base.tocsr().astype(np.float32)
+    stacked = sp.vstack([base] * scale).tocsr().astype(np.float32)
+    stacked.data *= rng.uniform(0.5, 1.5, size=stacked.data.shape).astype(np.float32)
+    return normalize(stacked)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--scales", type=int, nargs="+", default=[1, 10, 100])
+    parser.add_argument("--k", type=int, default=20)
+    parser.add_argument("--sample-rows", type=int, default=5000)
+    parser.add_argument("--max-cells", type=int, default=8_000_000)
+    args = parser.parse_args()
+    rng = np.random.default_rng(0)
+    base = api.catalog.current.full_tfidf
+
+    print(f"{'products':>10}{'queried':>9}{'build s':>10}{'peak MB':>9}{'graph MB':>10}{'dense N×N MB':>14}")
+    for scale in args.scales:
+        matrix = synthetic_catalog(base, scale, rng)
+        n = matrix.shape[0]
+        queried = min(n, args.sample_rows)
+
+        tracemalloc.start()
+        start = time.perf_counter()
+        graph = build_knn(matrix, k=args.k, max_cells=args.max_cells, n_query=queried)
+        elapsed = time.perf_counter() - start
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+        estimated = elapsed * n / queried
+        graph_mb = (graph.data.nbytes + graph.indices.nbytes) * n / queried / 1e6 + (n + 1) * 8 / 1e6
+        dense_mb = n * n * 8 / 1e6
+        label = f"{estimated:.2f}" + ("*" if queried < n else "")
+        print(f"{n:>10}{queried:>9}{label:>10}{peak / 1e6:>9.1f}{graph_mb:>10.1f}{dense_mb:>14.0f}")
+    print("* extrapolated from the queried rows")
+
+
+if __name__ == "__main__":
+    main()
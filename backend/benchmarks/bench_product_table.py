@@ -0,0 +1,112 @@
+"""
+Compare the array-backed ProductTable with products_df: memory held, and
+per-request time and allocations for turning the top rows into response
+dicts.
+
+Usage (from backend/):
+    python benchmarks/bench_product_table.py [--repeat 2000] [--top-n 5 50]
+
+Record builders compared:
+    to_dict   df.iloc[top][cols].to_dict(orient="records")  (original)
+    columns   per-request products_df[col].to_numpy() + dicts (previous)
+    table     ProductTable row views                         (current)
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import api  # noqa: E402
+from legacy import snapshot_model  # noqa: E402
+
+COLUMNS = ["Label", "brand", "name", "pregnancy_unsafe_ingredients"]
+
+
+def to_dict_records(df, top, scores):
+    out = df.iloc[top][COLUMNS].copy()
+    out["similarity"] = scores
+    return out.to_dict(orient="records")
+
+
+def column_records(df, top, scores):
+    columns = [df[col].to_numpy() for col in COLUMNS]
+    return [
+        {**{col: values[i] for col, values in zip(COLUMNS, columns)}, "similarity": float(s)}
+        for i, s in zip(top.tolist(), scores)
+    ]
+
+
+def measure(fn, repeat):
+    """(median µs per call, bytes allocated per call)"""
+    fn()
+    times = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - t0)
+
+    tracemalloc.start()
+    fn()
+    tracemalloc.reset_peak()
+    before = tracemalloc.get_traced_memory()[0]
+    fn()
+    peak = tracemalloc.get_traced_memory()[1] - before
+    tracemalloc.stop()
+    return statistics.median(times) * 1e6, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--repeat", type=int, default=2000)
+    parser.add_argument("--top-n", type=int, nargs="+", default=[5, 50])
+    args = parser.parse_args()
+
+    snap = api.catalog.current
+    table = snap.products
+    df = snapshot_model(snap).products_df
+
+    df_bytes = df.memory_usage(deep=True).sum()
+    df_served = df[COLUMNS].memory_usage(deep=True).sum()
+    print(f"products_df (all columns)     {df_bytes / 2**20:8.2f} MB")
+    print(f"products_df (record columns)  {df_served / 2**20:8.2f} MB")
+    print(f"ProductTable                  {table.nbytes() / 2**20:8.2f} MB")
+    print()
+
+    rng = np.random.default_rng(0)
+    print(f"{'top_n':>6}  {'builder':<9}{'µs/call':>10}{'peak alloc KB':>15}")
+    for k in args.top_n:
+        top = rng.choice(len(table), size=min(k, len(table)), replace=False)
+        scores = rng.random(len(top))
+        builders = {
+            "to_dict": lambda: to_dict_records(df, top, scores),
+            "columns": lambda: column_records(df, top, scores),
+            "table": lambda: table.records(top, scores),
+        }
+        expected = builders["columns"]()
+        assert builders["table"]() == expected, "ProductTable records differ from products_df"
+        for name, fn in builders.items():
+            us, peak = measure(fn, args.repeat)
+            print(f"{k:>6}  {name:<9}{us:>10.1f}{peak / 1024:>15.1f}")
+
+    print()
+    kwargs = dict(skin_type="Oily Skin", product_type="Moisturizer", concerns=["acne"])
+    now, _ = measure(lambda: api.get_recommendations(**kwargs), args.repeat // 4)
+    original = api.build_records
+    api.build_records = lambda snap, top, scores: column_records(df, top, scores)
+    try:
+        before, _ = measure(lambda: api.get_recommendations(**kwargs), args.repeat // 4)
+    finally:
+        api.build_records = original
+    print(f"get_recommendations  products_df records {before:8.1f} µs   ProductTable {now:8.1f} µs")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""
+Price / rank range filters: sorted-index binary search vs. scanning the
+column, and the cost of re-ranking a candidate pool.
+
+Usage (from backend/):
+    python benchmarks/bench_ranges.py [--sizes 10000 100000 1000000] [--repeat 200]
+
+Range masks compared (all give the same mask):
+    pandas    products_df["price"].between(lo, hi)
+    scan      (price >= lo) & (price <= hi) on the NumPy column
+    sorted    SortedColumn.range_mask: two searchsorted calls + a scatter
+              (falls back to the scan for ranges wider than 1/16 of rows)
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from filter_index import SortedColumn  # noqa: E402
+from scoring import SORT_MODES, rerank  # noqa: E402
+
+SELECTIVITY = [0.01, 0.1, 0.5]
+
+
+def time_us(fn, repeat):
+    fn()
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10000, 100000, 1000000])
+    parser.add_argument("--repeat", type=int, default=200)
+    parser.add_argument("--pool", type=int, default=200)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    print(f"{'products':>9}{'selected':>10}{'pandas µs':>12}{'scan µs':>10}{'sorted µs':>11}")
+    for n in args.sizes:
+        # long-tailed prices like the real catalog
+        price = np.round(rng.lognormal(3.8, 0.6, size=n)).astype(np.float32)
+        series = pd.Series(price)
+        index = SortedColumn(price)
+        for share in SELECTIVITY:
+            lo = float(np.quantile(price, 0.5 - share / 2))
+            hi = float(np.quantile(price, 0.5 + share / 2))
+            expected = ((price >= lo) & (price <= hi))
+            assert (index.range_mask(lo, hi) == expected).all()
+            t_pandas = time_us(lambda: series.between(lo, hi).to_numpy(), args.repeat)
+            t_scan = time_us(lambda: (price >= lo) & (price <= hi), args.repeat)
+            t_sorted = time_us(lambda: index.range_mask(lo, hi), args.repeat)
+            print(f"{n:>9}{expected.mean():>10.1%}{t_pandas:>12.1f}{t_scan:>10.1f}{t_sorted:>11.1f}")
+
+    print()
+    similarity = np.sort(rng.random(args.pool))[::-1]
+    price = rng.lognormal(3.8, 0.6, size=args.pool).astype(np.float32)
+    rank = rng.uniform(3, 5, size=args.pool).astype(np.float32)
+    for mode in SORT_MODES:
+        us = time_us(lambda: rerank(similarity, price, rank, mode), args.repeat)
+        print(f"rerank {mode:<11} pool {args.pool}: {us:8.1f} µs")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""
+Skin-condition filtering: the regex scan recommender.py used to run per
+call vs the avoidance masks compiled once per snapshot.
+
+Usage (from backend/):
+    python benchmarks/bench_skin_conditions.py [--sizes 1000 10000 100000] [--repeat 20]
+
+Per catalog size (synthetic products, see synthetic_catalog.py):
+    regex ms     lowercase allergens_clean.csv, build the \\b...\\b
+                 alternation and str.contains it over every product
+    build ms     condition_masks() for every condition (once per snapshot)
+    lookup µs    FilterIndex.condition_avoid_mask() for one condition
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import synthetic_catalog  # noqa: E402
+from filter_index import FilterIndex  # noqa: E402
+from skin_conditions import condition_masks, load_skin_conditions  # noqa: E402
+
+CONDITION = "Acne Vulgaris"
+
+
+def regex_filter(products, allergens, skin_condition):
+    """The per-call scan recommend_products() used to do."""
+    allergens = allergens.copy()
+    allergens.columns = allergens.columns.str.lower()
+    names = allergens[
+        allergens["skin_condition"].astype(str).str.lower() == skin_condition.lower()
+    ]["ingredient_name"].dropna().tolist()
+    pattern = "|".join([f"\\b{a}\\b" for a in names if isinstance(a, str)])
+    return ~products["ingredients"].str.contains(pattern, case=False, na=False, regex=True)
+
+
+def timed(fn, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = fn()
+    return result, (time.perf_counter() - start) / repeat
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    profile = synthetic_catalog.CatalogProfile()
+    allergens_csv = os.path.join(profile.source_dir, synthetic_catalog.FILES["allergens"])
+    allergens = pd.read_csv(allergens_csv)
+    conditions = load_skin_conditions(allergens_csv)
+
+    print(f"{'products':>9}{'regex ms':>10}{'build ms':>10}{'lookup µs':>11}")
+    for n in args.sizes:
+        products = synthetic_catalog.generate_products(np.random.default_rng(args.seed), profile, n)
+        _, regex_s = timed(lambda: regex_filter(products, allergens, CONDITION), max(1, args.repeat // 10))
+        (avoid, recommended, _), build_s = timed(lambda: condition_masks(products, conditions), 1)
+        index = FilterIndex(n, {}, {}, {}, np.zeros(n, dtype=bool), conditions=conditions,
+                            avoid_masks=avoid, recommended_masks=recommended)
+        _, lookup_s = timed(lambda: index.condition_avoid_mask([CONDITION]), args.repeat * 50)
+        print(f"{n:>9}{regex_s * 1e3:>10.1f}{build_s * 1e3:>10.1f}{lookup_s * 1e6:>11.1f}")
+
+
+if __name__ == "__main__":
+    main()
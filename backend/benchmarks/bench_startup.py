@@ -0,0 +1,63 @@
+"""
+Measure API startup with and without a prebuilt model artifact.
+
+Usage (from backend/):
+    python benchmarks/bench_startup.py [--runs 3]
+
+Each run is a fresh interpreter. "fit" points MODEL_ARTIFACTS_DIR at an
+empty directory so the model is fitted in-process; "artifact" builds the
+artifact first and loads it.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+PROBE = """
+import contextlib, io, json, time
+t0 = time.perf_counter()
+with contextlib.redirect_stdout(io.StringIO()):
+    import model_store
+    t1 = time.perf_counter()
+    model_store.load_model()
+    t2 = time.perf_counter()
+    import api
+    t3 = time.perf_counter()
+print(json.dumps({"load_model_s": t2 - t1, "import_api_s": t3 - t2}))
+"""
+
+
+def probe(artifacts_dir):
+    env = dict(os.environ, MODEL_ARTIFACTS_DIR=artifacts_dir)
+    out = subprocess.run(
+        [sys.executable, "-c", PROBE], cwd=BACKEND_DIR, env=env,
+        capture_output=True, text=True, check=True,
+    )
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--runs", type=int, default=3)
+    args = parser.parse_args()
+
+    sys.path.insert(0, BACKEND_DIR)
+    import model_store
+
+    with tempfile.TemporaryDirectory() as empty, tempfile.TemporaryDirectory() as built:
+        model_store.build(artifacts_dir=built)
+        print(f"{'mode':<10}{'load_model ms':>16}{'import api ms':>16}")
+        for mode, path in (("fit", empty), ("artifact", built)):
+            runs = [probe(path) for _ in range(args.runs)]
+            load = statistics.median(r["load_model_s"] for r in runs) * 1000
+            total = statistics.median(r["import_api_s"] for r in runs) * 1000
+            print(f"{mode:<10}{load:>16.1f}{total:>16.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,355 @@
+"""
+Offline performance suite: startup, per-filter latency, /recommend
+throughput and peak memory on synthetic catalogs of several sizes, written
+as JSON so two commits can be compared.
+
+Usage (from backend/):
+    python benchmarks/bench_suite.py [--sizes 1000 10000] [--out results.json]
+    python benchmarks/bench_suite.py --baseline before.json [--threshold 0.25]
+    python benchmarks/bench_suite.py --compare after.json --baseline before.json
+
+For every size a catalog is generated (synthetic_catalog.py, cached in
+--data-dir when given), the model artifact is built, and a fresh
+interpreter measures:
+
+    build_s           model_store.py build (fit + save the artifact)
+    startup_s         `import api` until the catalog snapshot is loaded
+    latency_ms        get_recommendations() p50/p95/p99 per filter combination
+    recommend_rps     GET /recommend through the ASGI app in-process
+                      (result cache off, --concurrency requests in flight)
+    peak_rss_mb       the interpreter's peak resident memory
+
+With --baseline, every metric is compared with the baseline run (same
+size, same name); a metric worse by more than --threshold (a fraction)
+is a regression and the run exits with status 1.
+"""
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+
+import numpy as np
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+BACKEND_DIR = os.path.dirname(BENCH_DIR)
+
+RESULTS_VERSION = 1
+
+# name -> get_recommendations keyword arguments (lists as the API passes them)
+COMBOS = {
+    "no_filters": {},
+    "skin_type": {"skin_type": "Oily Skin", "concerns": ["acne"]},
+    "product_type": {"product_type": "Moisturizer", "concerns": ["hydrating"]},
+    "skin_and_product": {"skin_type": "Dry Skin", "product_type": "Moisturizer", "concerns": ["dry", "wrinkle"]},
+    "allergens": {"allergens_list": ["niacinamide", "allantoin"], "concerns": ["acne"]},
+    "pregnancy_safe": {"pregnancy_safe": "yes", "concerns": ["pigmentation"]},
+    "ingredients": {"include_ingredients": ["squalane"], "exclude_ingredients": ["citric acid"], "concerns": ["sensitive"]},
+    "price_rank_blend": {
+        "min_price": 15, "max_price": 60, "min_rank": 4.0, "sort": "blend", "concerns": ["hydrating"],
+    },
+    "all_filters": {
+        "skin_type": "Sensitive Skin", "product_type": "Moisturizer, Treatment",
+        "concerns": ["sensitive", "hydrating"], "allergens_list": ["niacinamide"],
+        "pregnancy_safe": "yes", "exclude_ingredients": ["citric acid"],
+    },
+}
+
+# metrics where bigger is better; everything else is a time or a size
+HIGHER_IS_BETTER = {"recommend_rps"}
+
+
+# ================================================================
+# 🔬 Probe (runs in a fresh interpreter per catalog size)
+# ================================================================
+def percentiles(samples_s):
+    ms = np.asarray(samples_s) * 1000
+    return {f"p{q}": round(float(np.percentile(ms, q)), 4) for q in (50, 95, 99)}
+
+
+def query_string(kwargs):
+    from urllib.parse import urlencode
+
+    params = {k: ",".join(v) if isinstance(v, list) else v for k, v in kwargs.items()}
+    return urlencode(params)
+
+
+async def asgi_get(app, path, query):
+    """One GET through the ASGI app; returns the status code."""
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1",
+        "method": "GET", "scheme": "http", "path": path, "raw_path": path.encode(),
+        "root_path": "", "query_string": query.encode(), "headers": [(b"host", b"bench")],
+        "client": ("127.0.0.1", 0), "server": ("bench", 80),
+    }
+    status = None
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        nonlocal status
+        if message["type"] == "http.response.start":
+            status = message["status"]
+
+    await app(scope, receive, send)
+    return status
+
+
+async def asgi_throughput(app, queries, total, concurrency):
+    """Requests per second for `total` GET /recommend calls, `concurrency` at a time."""
+    counter = iter(range(total))
+    failures = []
+
+    async def client():
+        for i in counter:
+            status = await asgi_get(app, "/recommend", queries[i % len(queries)])
+            if status != 200:
+                failures.append(status)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+    if failures:
+        raise RuntimeError(f"/recommend failed: {failures[:5]}")
+    return total / elapsed
+
+
+def probe(args):
+    sys.path.insert(0, BACKEND_DIR)
+    t0 = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        import api
+        snap = api.catalog.current
+    startup = time.perf_counter() - t0
+    if snap is None:
+        raise RuntimeError("catalog failed to load")
+
+    latency = {}
+    with contextlib.redirect_stdout(io.StringIO()):
+        for name, kwargs in COMBOS.items():
+            for _ in range(args.warmup):
+                api.get_recommendations(top_n=args.top_n, **kwargs)
+            samples = []
+            for _ in range(args.requests):
+                start = time.perf_counter()
+                api.get_recommendations(top_n=args.top_n, **kwargs)
+                samples.append(time.perf_counter() - start)
+            latency[name] = percentiles(samples)
+
+        queries = [query_string({**kwargs, "top_n": args.top_n}) for kwargs in COMBOS.values()]
+        asyncio.run(asgi_throughput(api.app, queries, len(queries), args.concurrency))  # warm-up
+        rps = asyncio.run(asgi_throughput(api.app, queries, args.throughput_requests, args.concurrency))
+
+    print(json.dumps({
+        "products": len(snap.products),
+        "startup_s": round(startup, 4),
+        "latency_ms": latency,
+        "recommend_rps": round(rps, 2),
+        # ru_maxrss is KiB on Linux
+        "peak_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+    }))
+
+
+# ================================================================
+# 🏃 Runner
+# ================================================================
+def catalog_dir(args, root, size):
+    from synthetic_catalog import GENERATOR_VERSION
+
+    return os.path.join(root, f"catalog-{size}-seed{args.seed}-v{GENERATOR_VERSION}")
+
+
+def ensure_catalog(args, root, size, profile):
+    """Generate the catalog for `size` unless a cached copy exists; returns seconds spent."""
+    from synthetic_catalog import generate
+
+    out_dir = catalog_dir(args, root, size)
+    marker = os.path.join(out_dir, ".complete")
+    if os.path.exists(marker):
+        return 0.0
+    start = time.perf_counter()
+    generate(out_dir, size, seed=args.seed, profile=profile)
+    open(marker, "w").close()
+    return time.perf_counter() - start
+
+
+def run_size(args, root, size, profile):
+    generate_s = ensure_catalog(args, root, size, profile)
+    env = dict(
+        os.environ,
+        PROCESSED_DIR=catalog_dir(args, root, size),
+        MODEL_ARTIFACTS_DIR=os.path.join(root, f"artifacts-{size}"),
+        RECOMMEND_CACHE_SIZE="0",
+        CATALOG_WATCH_INTERVAL="0",
+    )
+
+    start = time.perf_counter()
+    subprocess.run(
+        [sys.executable, "model_store.py", "build", "--force"], cwd=BACKEND_DIR, env=env,
+        check=True, capture_output=True,
+    )
+    build_s = time.perf_counter() - start
+
+    probe_args = [
+        "--probe", "--requests", str(args.requests), "--warmup", str(args.warmup),
+        "--top-n", str(args.top_n), "--throughput-requests", str(args.throughput_requests),
+        "--concurrency", str(args.concurrency),
+    ]
+    out = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), *probe_args], cwd=BACKEND_DIR, env=env,
+        capture_output=True, text=True, check=True,
+    )
+    result = json.loads(out.stdout.strip().splitlines()[-1])
+    result["build_s"] = round(build_s, 4)
+    return result, generate_s
+
+
+def git_commit():
+    try:
+        out = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=BACKEND_DIR,
+            capture_output=True, text=True, check=True,
+        )
+        dirty = subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"],
+                               cwd=BACKEND_DIR, capture_output=True, text=True).stdout.strip()
+        return out.stdout.strip() + ("-dirty" if dirty else "")
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_suite(args):
+    from synthetic_catalog import CatalogProfile
+
+    profile = CatalogProfile()
+    results = {}
+    with contextlib.ExitStack() as stack:
+        root = args.data_dir or stack.enter_context(tempfile.TemporaryDirectory())
+        os.makedirs(root, exist_ok=True)
+        for size in args.sizes:
+            print(f"⏱️ {size} products...", flush=True)
+            result, generate_s = run_size(args, root, size, profile)
+            results[str(size)] = result
+            note = f" (generated in {generate_s:.1f}s)" if generate_s else ""
+            print(f"   startup {result['startup_s'] * 1000:.0f} ms, build {result['build_s']:.1f}s, "
+                  f"{result['recommend_rps']:.0f} req/s, peak {result['peak_rss_mb']:.0f} MB{note}")
+
+    return {
+        "version": RESULTS_VERSION,
+        "meta": {
+            "commit": git_commit(),
+            "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+            "seed": args.seed,
+            "requests": args.requests,
+            "throughput_requests": args.throughput_requests,
+            "concurrency": args.concurrency,
+            "top_n": args.top_n,
+        },
+        "results": results,
+    }
+
+
+# ================================================================
+# 📊 Report / Compare
+# ================================================================
+def flatten(result, prefix=""):
+    """{'latency_ms.skin_type.p95': 1.2, ...} for every numeric metric."""
+    flat = {}
+    for key, value in result.items():
+        name = f"{prefix}{key}"
+        if isinstance(value, dict):
+            flat.update(flatten(value, name + "."))
+        elif isinstance(value, (int, float)) and key != "products":
+            flat[name] = value
+    return flat
+
+
+def print_report(report):
+    for size, result in report["results"].items():
+        print(f"\n📦 {size} products")
+        print(f"{'filters':<20}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+        for name, p in result["latency_ms"].items():
+            print(f"{name:<20}{p['p50']:>10.3f}{p['p95']:>10.3f}{p['p99']:>10.3f}")
+
+
+def compare(report, baseline, threshold):
+    """Print metric-by-metric changes; returns the regressed metric names."""
+    regressions = []
+    print(f"\n📊 vs baseline {baseline['meta'].get('commit')} (threshold {threshold:.0%})")
+    print(f"{'size':>9}  {'metric':<34}{'baseline':>12}{'current':>12}{'change':>9}")
+    for size, result in report["results"].items():
+        if size not in baseline["results"]:
+            print(f"{size:>9}  (not in baseline)")
+            continue
+        old = flatten(baseline["results"][size])
+        for name, value in flatten(result).items():
+            if name not in old or not old[name]:
+                continue
+            change = value / old[name] - 1
+            worse = -change if name.split(".")[0] in HIGHER_IS_BETTER else change
+            flag = ""
+            if worse > threshold:
+                regressions.append(f"{size}:{name}")
+                flag = "  ❌"
+            print(f"{size:>9}  {name:<34}{old[name]:>12.4g}{value:>12.4g}{change:>+9.1%}{flag}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000],
+                        help="catalog sizes in products; 100000+ takes long to build "
+                             "(the similar-products graph is all-pairs)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--data-dir", help="keep generated catalogs here between runs")
+    parser.add_argument("--requests", type=int, default=300, help="timed calls per filter combination")
+    parser.add_argument("--warmup", type=int, default=20)
+    parser.add_argument("--top-n", type=int, default=5)
+    parser.add_argument("--throughput-requests", type=int, default=1000)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--out", help="write the results JSON here")
+    parser.add_argument("--baseline", help="results JSON to compare against")
+    parser.add_argument("--compare", metavar="RESULTS", help="compare this results JSON instead of running")
+    parser.add_argument("--threshold", type=float, default=float(os.getenv("BENCH_THRESHOLD", "0.25")),
+                        help="allowed slowdown as a fraction (0.25 = 25%%)")
+    parser.add_argument("--probe", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.probe:
+        probe(args)
+        return
+
+    if args.compare:
+        with open(args.compare) as f:
+            report = json.load(f)
+    else:
+        report = run_suite(args)
+        print_report(report)
+        if args.out:
+            with open(args.out, "w") as f:
+                json.dump(report, f, indent=2)
+            print(f"\n✅ Results written to {args.out}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare(report, baseline, args.threshold)
+        if regressions:
+            print(f"\n❌ {len(regressions)} metric(s) regressed by more than {args.threshold:.0%}")
+            sys.exit(1)
+        print("\n✅ No regressions")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""
+Admin product upserts: latency of one edit as the delta segment grows,
+and what serving from base + delta costs /recommend scoring.
+
+Usage (from backend/):
+    python benchmarks/bench_upserts.py [--products 10000] [--edits 500]
+
+Runs against a synthetic catalog in a temp directory (the real processed/
+and artifacts/ are never touched) and never triggers a refit.
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import catalog  # noqa: E402
+import model_store  # noqa: E402
+import synthetic_catalog  # noqa: E402
+from scoring import score_all, top_k_rows  # noqa: E402
+
+CHECKPOINTS = (1, 10, 100, 250, 500, 1000, 2500)
+
+
+def sample_product(rng, profile, i):
+    tokens = rng.choice(profile.tokens, size=int(rng.choice(profile.list_lengths)), p=profile.token_p)
+    return {
+        "Label": str(rng.choice(profile.labels, p=profile.label_p)),
+        "brand": str(rng.choice(profile.brands, p=profile.brand_p)),
+        "name": f"Bench Product {i}",
+        "price": float(rng.choice(profile.price)),
+        "rank": float(rng.choice(profile.rank)),
+        "ingredients": ", ".join(dict.fromkeys(tokens.tolist())),
+        "Dry": 1, "Oily": int(rng.integers(0, 2)),
+    }
+
+
+def score_us(snap, query, repeat=50):
+    mask = snap.filter_index.all_rows()
+    start = time.perf_counter()
+    for _ in range(repeat):
+        top_k_rows(score_all(snap.full_tfidf, query), mask, 5)
+    return (time.perf_counter() - start) / repeat * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--products", type=int, default=10000)
+    parser.add_argument("--edits", type=int, default=500)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        profile = synthetic_catalog.CatalogProfile()
+        paths = synthetic_catalog.generate(os.path.join(tmp, "processed"), args.products, args.seed, profile)
+        artifacts = os.path.join(tmp, "artifacts")
+        model_store.build(paths, artifacts)
+
+        catalog.DELTA_REFIT_PRODUCTS = 0  # measure the delta, never fold it into a refit
+        manager = catalog.CatalogManager(paths, artifacts)
+        base = manager.load_initial()
+        query = base.vectorizer.transform(["hydrating gentle moisturizer"])
+        rng = np.random.default_rng(args.seed)
+        base_ids = base.products.ids
+
+        print(f"{'edits':>6}{'upsert ms':>11}{'score µs':>10}{'(base µs)':>11}")
+        base_score = score_us(base, query)
+        latencies = []
+        for i in range(1, args.edits + 1):
+            if i % 4 == 0:  # every 4th edit replaces an existing product
+                changes = {int(rng.choice(base_ids)): sample_product(rng, profile, i)}
+                start = time.perf_counter()
+                manager.apply_product_edits(changes)
+            else:
+                product = sample_product(rng, profile, i)
+                start = time.perf_counter()
+                manager.add_product(product)
+            latencies.append((time.perf_counter() - start) * 1000)
+            if i in CHECKPOINTS or i == args.edits:
+                recent = latencies[-min(len(latencies), 20):]
+                print(f"{i:>6}{np.median(recent):>11.2f}{score_us(manager.current, query):>10.0f}"
+                      f"{base_score:>11.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""
+Host memory for N API workers, with the model artifact memory-mapped
+(MODEL_MMAP=1, shared page cache) vs. loaded into private memory
+(MODEL_MMAP=0).
+
+Usage (from backend/):
+    python benchmarks/bench_workers.py [--scale 20] [--workers 1 4 16]
+
+Each worker is a fresh interpreter that imports api (which loads the
+catalog) and then waits, like a uvicorn worker between requests. Memory
+is read from /proc/<pid>/smaps_rollup:
+    rss   resident set of one worker (shared pages counted in full)
+    pss   proportional set; summed over workers it is the host total
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+WORKER = """
+import contextlib, io, sys
+with contextlib.redirect_stdout(io.StringIO()):
+    import api
+    api.catalog.current
+print("ready", flush=True)
+sys.stdin.read()
+"""
+
+
+def smaps_rollup(pid):
+    """{'Rss': kB, 'Pss': kB, ...} for a running process."""
+    values = {}
+    with open(f"/proc/{pid}/smaps_rollup") as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) == 3 and parts[2] == "kB":
+                values[parts[0].rstrip(":")] = int(parts[1])
+    return values
+
+
+def build_artifact(processed_dir, artifacts_dir):
+    env = dict(os.environ, PROCESSED_DIR=processed_dir, MODEL_ARTIFACTS_DIR=artifacts_dir)
+    subprocess.run(
+        [sys.executable, "model_store.py", "build"], cwd=BACKEND_DIR, env=env,
+        check=True, capture_output=True,
+    )
+
+
+def measure(n, env):
+    """Start `n` workers, wait until all loaded, return (rss list MB, total pss MB)."""
+    workers = [
+        subprocess.Popen(
+            [sys.executable, "-c", WORKER], cwd=BACKEND_DIR, env=env,
+            stdin=subprocess.PIPE, stdout=subprocess.PIPE, text=True,
+        )
+        for _ in range(n)
+    ]
+    try:
+        for w in workers:
+            if w.stdout.readline().strip() != "ready":
+                raise RuntimeError("worker failed to load the catalog")
+        stats = [smaps_rollup(w.pid) for w in workers]
+    finally:
+        for w in workers:
+            w.stdin.close()
+            w.wait()
+    return [s["Rss"] / 1024 for s in stats], sum(s["Pss"] for s in stats) / 1024
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--scale", type=int, default=20)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 4, 16])
+    args = parser.parse_args()
+
+    sys.path.insert(0, BACKEND_DIR)
+    from bench_columnar import scaled_catalog
+
+    with tempfile.TemporaryDirectory() as tmp:
+        processed = os.path.join(tmp, "processed")
+        artifacts = os.path.join(tmp, "artifacts")
+        os.makedirs(processed)
+        scaled_catalog(processed, args.scale)
+        build_artifact(processed, artifacts)
+
+        print(f"{'mmap':>5}{'workers':>9}{'rss/worker MB':>15}{'host pss MB':>13}{'pss/worker MB':>15}")
+        for mmap in ("1", "0"):
+            env = dict(
+                os.environ, PROCESSED_DIR=processed, MODEL_ARTIFACTS_DIR=artifacts,
+                MODEL_MMAP=mmap, CATALOG_WATCH_INTERVAL="0",
+            )
+            for n in args.workers:
+                rss, pss = measure(n, env)
+                print(f"{mmap:>5}{n:>9}{statistics.median(rss):>15.1f}{pss:>13.1f}{pss / n:>15.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+"""
+Reference copy of the original pandas-based recommendation path.
+
+Kept for benchmarks only: it is the baseline the optimized code in
+`api.py` is timed against and must return identical results to.
+"""
+from sklearn.metrics.pairwise import cosine_similarity
+
+import model_store
+
+_models = {}
+
+
+def snapshot_model(snap):
+    """
+    The pandas frames behind `snap`. Snapshots only keep the array-backed
+    product table, so the baseline loads the same model artifact itself.
+    """
+    if snap.version not in _models:
+        _models.clear()
+        _models[snap.version] = model_store.load_model()
+    return _models[snap.version]
+
+
+def legacy_get_recommendations(
+    api,
+    skin_type=None,
+    product_type=None,
+    concerns=None,
+    allergens_list=None,
+    pregnancy_safe=None,
+    top_n=5,
+):
+    snap = api.catalog.current
+    products_df = snapshot_model(snap).products_df
+    product_allergens = snap.product_allergens
+    ingredients_df = snap.ingredients_df
+
+    if products_df is None:
+        return []
+
+    df = products_df.copy()
+
+    # --- Skin type filter ---
+    if skin_type:
+        col_name = api.SKIN_TYPE_MAPPING.get(skin_type)
+        if col_name and col_name in df.columns:
+            df = df[df[col_name] == 1]
+
+    # --- Product type filter ---
+    if product_type:
+        types = [t.strip() for t in product_type.replace("/", ",").split(",")]
+        df = df[df["Label"].str.lower().apply(lambda x: any(t.lower() in x for t in types))]
+
+    # --- Allergens filter ---
+    if allergens_list and product_allergens is not None:
+        allergens_lower = [a.lower() for a in allergens_list]
+        bad_products = product_allergens[
+            product_allergens["allergen_name"].str.lower().isin(allergens_lower)
+        ]["product_id"].unique()
+        df = df[~df.index.isin(bad_products)]
+
+    # --- Pregnancy-safe filter ---
+    if pregnancy_safe and pregnancy_safe.lower() == "yes" and ingredients_df is not None:
+        unsafe_ing = ingredients_df[
+            ingredients_df["who_should_avoid"].str.contains("Pregnancy", case=False, na=False)
+        ]["name"].str.lower().tolist()
+        df = df[~df["ingredients"].fillna("").str.lower().apply(
+            lambda x: any(u in x for u in unsafe_ing)
+        )]
+
+    if df.empty:
+        return []
+
+    # --- TF-IDF similarity ---
+    subset_indices = products_df.index.get_indexer(df.index)
+    subset_matrix = snap.full_tfidf[subset_indices]
+
+    concern_text = api.expand_concerns(concerns) if concerns else "hydrating soothing gentle"
+    user_vector = snap.vectorizer.transform([concern_text])
+
+    sims = cosine_similarity(user_vector, subset_matrix).flatten()
+    df["similarity"] = sims
+    df = df.sort_values(by="similarity", ascending=False).head(top_n)
+
+    return df[["Label", "brand", "name", "similarity"]].to_dict(orient="records")
+
+
+def same_ranking(expected, actual, tol=1e-9):
+    """
+    True if two result lists agree up to the order of tied scores.
+    The legacy path sorts with an unstable quicksort, so products sharing a
+    score may come back in any order; only the score sequence and the set of
+    products at each fully-included score level are compared.
+    """
+    if len(expected) != len(actual):
+        return False
+    for e, a in zip(expected, actual):
+        if abs(e["similarity"] - a["similarity"]) > tol:
+            return False
+    if not expected:
+        return True
+
+    def key(r):
+        return (r["Label"], r["brand"], r["name"])
+
+    cutoff = expected[-1]["similarity"]
+    exp = {key(r) for r in expected if r["similarity"] - cutoff > tol}
+    act = {key(r) for r in actual if r["similarity"] - cutoff > tol}
+    return exp == act
@@ -0,0 +1,190 @@
+"""
+Synthetic processed catalog for benchmarks: products_clean.csv and its
+relation files at any size, with distributions taken from the real
+processed data.
+
+Usage (from backend/):
+    python benchmarks/synthetic_catalog.py OUT_DIR --products 100000 [--seed 0]
+
+What is sampled from the real catalog:
+    Label, brand        empirical frequencies; new brands appear as the
+                        catalog grows (~sqrt(n)), with Zipf popularity
+    price, rank         empirical values, price with ±10% jitter
+    skin type flags     whole rows, so their correlations are kept
+    ingredients         list length from the empirical distribution,
+                        tokens by their real product frequency, plus a
+                        growing Zipf tail of rare tokens (~sqrt(n))
+    name                2-4 words from the real product names
+
+The ingredient and allergen reference files are copied unchanged, and the
+relation files are derived with the pipeline's own tokenizer, so their
+density follows from the generated ingredient lists as in production.
+Product centrality is scored with the offline job (recommender.py).
+Every file also gets its Parquet copy, as the pipeline would write.
+"""
+import argparse
+import os
+import shutil
+import sys
+import time
+from collections import Counter
+
+import numpy as np
+import pandas as pd
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+import columnar  # noqa: E402
+import model_store  # noqa: E402
+import recommender  # noqa: E402
+from pipeline import product_relations  # noqa: E402
+
+# bump when the generated data changes, so cached catalogs are regenerated
+GENERATOR_VERSION = 2
+
+FILES = {
+    "products": "products_clean.csv",
+    "ingredients": "ingredients_cleaned_preprocessed.csv",
+    "allergens": "allergens_clean.csv",
+    "product_ingredients": "product_ingredients.csv",
+    "product_allergens": "product_allergens.csv",
+    "centrality": "product_centrality.csv",
+}
+
+TAIL_SHARE = 0.08  # share of ingredient tokens drawn from the rare tail
+TAIL_WORDS = ["extract", "oil", "ferment", "peptide", "ester", "copolymer", "glucoside"]
+
+
+def empirical(values):
+    """(distinct values, probabilities) of a sequence."""
+    counts = Counter(values)
+    items = list(counts)
+    p = np.array([counts[v] for v in items], dtype=np.float64)
+    return items, p / p.sum()
+
+
+def zipf_weights(n, s=1.1):
+    w = 1.0 / np.arange(1, n + 1) ** s
+    return w / w.sum()
+
+
+class CatalogProfile:
+    """Distributions of the real processed catalog."""
+
+    def __init__(self, source_dir=model_store.PROCESSED):
+        self.source_dir = source_dir
+        products = pd.read_csv(os.path.join(source_dir, FILES["products"]))
+        products = products.dropna(subset=["ingredients"])
+
+        self.labels, self.label_p = empirical(products["Label"].dropna())
+        self.brands, self.brand_p = empirical(products["brand"].dropna())
+        self.price = products["price"].dropna().to_numpy(dtype=np.float64)
+        self.rank = products["rank"].dropna().to_numpy(dtype=np.float64)
+        self.flags = products[columnar.SKIN_FLAG_COLUMNS].fillna(0).to_numpy(dtype=np.uint8)
+
+        token_lists = [
+            [t.strip() for t in text.lower().split(",") if t.strip()]
+            for text in products["ingredients"]
+        ]
+        self.list_lengths = np.array([len(t) for t in token_lists if t])
+        self.tokens, self.token_p = empirical(t for tokens in token_lists for t in set(tokens))
+        self.name_words, self.name_word_p = empirical(
+            w for name in products["name"].dropna() for w in name.split()
+        )
+
+
+def sample_tokens(rng, profile, n):
+    """Ingredient token lists for `n` products, as (vocabulary, per-product index arrays)."""
+    tail_size = int(40 * np.sqrt(n))
+    vocabulary = np.array(
+        profile.tokens + [f"{TAIL_WORDS[k % len(TAIL_WORDS)]} {k}" for k in range(tail_size)],
+        dtype=object,
+    )
+    lengths = rng.choice(profile.list_lengths, size=n)
+    total = int(lengths.sum())
+
+    idx = rng.choice(len(profile.tokens), size=total, p=profile.token_p).astype(np.int32)
+    tail = rng.random(total) < TAIL_SHARE
+    idx[tail] = len(profile.tokens) + rng.choice(tail_size, size=int(tail.sum()), p=zipf_weights(tail_size))
+    return vocabulary, np.split(idx, np.cumsum(lengths)[:-1])
+
+
+def generate_products(rng, profile, n) -> pd.DataFrame:
+    n_brands = len(profile.brands) + int(3 * np.sqrt(n))
+    brands = profile.brands + [f"BRAND {k}" for k in range(n_brands - len(profile.brands))]
+    # real brands keep their relative popularity; the new ones form a Zipf tail
+    brand_p = np.concatenate([profile.brand_p * 0.8, zipf_weights(n_brands - len(profile.brands)) * 0.2])
+    brand_p /= brand_p.sum()
+
+    vocabulary, lists = sample_tokens(rng, profile, n)
+    ingredients = [", ".join(dict.fromkeys(vocabulary[idx].tolist())) for idx in lists]
+
+    word_counts = rng.integers(2, 5, size=n)
+    words = rng.choice(len(profile.name_words), size=int(word_counts.sum()), p=profile.name_word_p)
+    name_words = np.array(profile.name_words, dtype=object)
+    names = [" ".join(name_words[w].tolist()) for w in np.split(words, np.cumsum(word_counts)[:-1])]
+
+    price = rng.choice(profile.price, size=n) * rng.uniform(0.9, 1.1, size=n)
+    frame = pd.DataFrame({
+        "Label": np.array(profile.labels, dtype=object)[rng.choice(len(profile.labels), size=n, p=profile.label_p)],
+        "brand": np.array(brands, dtype=object)[rng.choice(n_brands, size=n, p=brand_p)],
+        "name": names,
+        "price": np.round(price, 0).astype(np.int64),
+        "rank": rng.choice(profile.rank, size=n),
+        "ingredients": ingredients,
+    })
+    flags = profile.flags[rng.integers(0, len(profile.flags), size=n)]
+    for i, col in enumerate(columnar.SKIN_FLAG_COLUMNS):
+        frame[col] = flags[:, i]
+    return frame
+
+
+def relation_frame(ingredients, vocabulary, name_column):
+    positions, names = product_relations(ingredients, vocabulary)
+    return pd.DataFrame({
+        "product_id": np.array(positions, dtype=np.int64) + 1,
+        name_column: pd.Series(names, dtype=object),
+    })
+
+
+def generate(out_dir, n_products, seed=0, profile=None):
+    """Write a synthetic processed catalog into `out_dir`; returns model_store-style paths."""
+    profile = profile or CatalogProfile()
+    rng = np.random.default_rng(seed)
+    os.makedirs(out_dir, exist_ok=True)
+    paths = {key: os.path.join(out_dir, filename) for key, filename in FILES.items()}
+
+    for key in ("ingredients", "allergens"):
+        shutil.copyfile(os.path.join(profile.source_dir, FILES[key]), paths[key])
+
+    products = generate_products(rng, profile, n_products)
+    products.to_csv(paths["products"], index=False)
+
+    ingredients = products["ingredients"].to_numpy()
+    ingredient_names = set(pd.read_csv(paths["ingredients"], usecols=["name"])["name"].dropna().str.lower())
+    allergen_names = set(pd.read_csv(paths["allergens"], usecols=["ingredient_name"])["ingredient_name"].dropna().str.lower())
+    relation_frame(ingredients, ingredient_names, "ingredient_name").to_csv(paths["product_ingredients"], index=False)
+    relation_frame(ingredients, allergen_names, "allergen_name").to_csv(paths["product_allergens"], index=False)
+
+    for key, path in paths.items():
+        if key != "centrality":
+            columnar.write_parquet(path)
+    recommender.build_centrality(out_dir)
+    return {key: paths[key] for key in model_store.DATASET_PATHS}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("out_dir")
+    parser.add_argument("--products", type=int, default=10000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    generate(args.out_dir, args.products, args.seed)
+    print(f"✅ Generated {args.products} products in {time.perf_counter() - start:.1f}s: {args.out_dir}")
+
+
+if __name__ == "__main__":
+    main()
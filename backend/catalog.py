@@ -0,0 +1,352 @@
+import os
+import subprocess
+import sys
+import threading
+import time
+import traceback
+from datetime import datetime, timezone
+
+from delta_segment import (
+    SegmentedFilterIndex, SegmentedIncidence, SegmentedMatrix, SegmentedProducts, build_delta,
+)
+from filter_index import build_filter_index
+from incidence import build_incidence
+from ingredient_index import build_ingredient_index
+from model_store import ARTIFACTS_DIR, DATASET_PATHS, load_model
+from scoring import transpose_segments
+from product_edits import ProductEdits, allergens_path, edits_path, locked, relation_vocabularies
+from skin_conditions import load_skin_conditions
+
+# ================================================================
+# 📚 Catalog Snapshots – immutable dataset + model bundles
+# ================================================================
+# Requests read `catalog.current` once and use that snapshot until they
+# finish. Reloads build a complete new snapshot off the request path and
+# publish it with a single reference assignment, so readers never take a
+# lock and never see a half-built catalog.
+#
+# Admin product edits don't refit anything: the edit is persisted, a new
+# delta segment (delta_segment.py) is built over the current fitted "base"
+# snapshot and published the same way. A full refit folds the edits into
+# the base once DELTA_REFIT_PRODUCTS products are pending, and every
+# CATALOG_REFIT_INTERVAL seconds while any are (0 = never on a timer).
+#
+# With several workers, each one has its own CatalogManager over the same
+# edit log. Writers serialize on the log's flock (product_edits.py) and
+# first apply what other workers appended, so ids and seqs never repeat;
+# `sync_edits` lets a worker pick up other workers' edits before it
+# serves a request.
+
+DELTA_REFIT_PRODUCTS = int(os.getenv("DELTA_REFIT_PRODUCTS", "500"))
+
+
+class CatalogSnapshot:
+    """Read-only bundle of everything one recommendation needs."""
+
+    __slots__ = (
+        "products", "ingredients_df", "product_ing", "product_allergens",
+        "vectorizer", "full_tfidf", "tfidf_t", "similar", "filter_index", "incidence", "ingredient_index",
+        "version", "source", "built_at", "build_seconds",
+        "base", "delta", "edits_seq", "relation_vocabularies",
+    )
+
+    def __init__(self, **fields):
+        for name in self.__slots__:
+            object.__setattr__(self, name, fields[name])
+
+    def __setattr__(self, name, value):
+        raise AttributeError("CatalogSnapshot is immutable")
+
+    def info(self) -> dict:
+        delta = self.delta
+        return {
+            "version": self.version,
+            "source": self.source,
+            "built_at": self.built_at,
+            "build_seconds": round(self.build_seconds, 3),
+            "n_products": len(self.products) - (delta.n_base - int(delta.alive.sum()) if delta else 0),
+            "edits_seq": self.edits_seq,
+            "pending_edits": {
+                "upserted": delta.n_upserts if delta else 0,
+                "deleted": delta.n_deleted if delta else 0,
+            },
+        }
+
+    @property
+    def fitted(self):
+        """The snapshot the TF-IDF model was fitted for (self if there is no delta)."""
+        return self.base or self
+
+
+def build_snapshot(paths=DATASET_PATHS, artifacts_dir=ARTIFACTS_DIR) -> CatalogSnapshot:
+    start = time.perf_counter()
+    model = load_model(paths, artifacts_dir)
+    filter_index = build_filter_index(model.products_df, model.product_allergens,
+                                      load_skin_conditions(allergens_path(paths)))
+    unmatched = sorted({t for terms in filter_index.unmatched.values() for t in terms})
+    if unmatched:
+        print(f"⚠️ Skin-condition terms no product contains: {', '.join(unmatched)}")
+    incidence = build_incidence(
+        model.products_df,
+        (model.product_ing, "ingredient_name"),
+        (model.product_allergens, "allergen_name"),
+    )
+    return CatalogSnapshot(
+        products=model.products_table,
+        ingredients_df=model.ingredients_df,
+        product_ing=model.product_ing,
+        product_allergens=model.product_allergens,
+        vectorizer=model.vectorizer,
+        full_tfidf=model.full_tfidf,
+        tfidf_t=transpose_segments(model.full_tfidf),
+        similar=model.similar,
+        filter_index=filter_index,
+        incidence=incidence,
+        ingredient_index=build_ingredient_index(model.ingredients_df, incidence),
+        version=f"{model.version}.e{model.edits_seq}" if model.edits_seq else model.version,
+        source=model.source,
+        built_at=datetime.now(timezone.utc).isoformat(),
+        build_seconds=time.perf_counter() - start,
+        base=None,
+        delta=None,
+        edits_seq=model.edits_seq,
+        relation_vocabularies=relation_vocabularies(paths, model.ingredients_df),
+    )
+
+
+def with_edits(base, edits, previous=None) -> CatalogSnapshot:
+    """
+    `base` plus a delta segment for the edits it was not fitted with;
+    `previous` is the live delta, whose vectorized products are reused.
+    """
+    changes = edits.since(base.edits_seq)
+    if not changes:
+        return base
+    start = time.perf_counter()
+    delta = build_delta(base, changes, base.relation_vocabularies, previous)
+    incidence = SegmentedIncidence(base.incidence, delta)
+    return CatalogSnapshot(
+        products=SegmentedProducts(base.products, delta),
+        ingredients_df=base.ingredients_df,
+        product_ing=base.product_ing,
+        product_allergens=base.product_allergens,
+        vectorizer=base.vectorizer,
+        full_tfidf=SegmentedMatrix(base.full_tfidf, delta),
+        tfidf_t=base.tfidf_t + transpose_segments(delta.tfidf),
+        similar=base.similar,
+        filter_index=SegmentedFilterIndex(base.filter_index, delta),
+        incidence=incidence,
+        ingredient_index=build_ingredient_index(base.ingredients_df, incidence),
+        version=f"{base.version}+e{edits.seq}",
+        source=base.source,
+        built_at=datetime.now(timezone.utc).isoformat(),
+        build_seconds=time.perf_counter() - start,
+        base=base,
+        delta=delta,
+        edits_seq=edits.seq,
+        relation_vocabularies=base.relation_vocabularies,
+    )
+
+
+class CatalogManager:
+    """
+    Holds the active snapshot and rebuilds it in the background.
+
+    Rebuilds first run `model_store.py build` in a child process so the
+    CPU-heavy TF-IDF fit does not compete with request threads for the GIL;
+    this process then only loads the finished artifact. Listeners registered
+    with `on_swap` run after each new snapshot is published.
+    """
+
+    def __init__(self, paths=DATASET_PATHS, artifacts_dir=ARTIFACTS_DIR):
+        self.paths = paths
+        self.artifacts_dir = artifacts_dir
+        self.current = None
+        self.edits = ProductEdits()
+        self.reloading = False
+        self.last_error = None
+        self.reload_count = 0
+        self._listeners = []
+        self._mtimes = {}
+        self._reload_lock = threading.Lock()
+        self._edit_lock = threading.Lock()
+        self._watcher = None
+        self._refitter = None
+        self._stop = threading.Event()
+
+    def load_initial(self):
+        base = build_snapshot(self.paths, self.artifacts_dir)
+        with self._edit_lock:
+            self.edits = ProductEdits.load(edits_path(self.paths))
+            self.current = with_edits(base, self.edits)
+        self._mtimes = self._input_mtimes()
+        return self.current
+
+    def on_swap(self, fn):
+        self._listeners.append(fn)
+
+    def _publish(self, snapshot):
+        self.current = snapshot
+        for fn in self._listeners:
+            fn(snapshot)
+
+    # --- product edits ---
+    def apply_product_edits(self, changes) -> CatalogSnapshot:
+        """
+        Record `changes` ({product id: product dict, or None to delete}) for
+        existing products and publish a snapshot that includes them. Raises
+        KeyError for an unknown or deleted id. The new delta is built before
+        anything is written, so a failed edit leaves both the file and the
+        live snapshot as they were.
+        """
+        with self._edit_lock, locked(edits_path(self.paths)):
+            self._catch_up_locked()
+            for product_id in changes:
+                if self.current.products.position(product_id) < 0:
+                    raise KeyError(product_id)
+            snapshot = self._apply_locked(changes)
+        self._refit_if_delta_is_large(snapshot)
+        return snapshot
+
+    def add_product(self, product):
+        """Store a new product under a fresh id; returns (product_id, snapshot)."""
+        with self._edit_lock, locked(edits_path(self.paths)):
+            self._catch_up_locked()
+            product_id = self.edits.next_id()
+            snapshot = self._apply_locked({product_id: product})
+        self._refit_if_delta_is_large(snapshot)
+        return product_id, snapshot
+
+    def _apply_locked(self, changes):
+        edits = self.edits.apply(changes)
+        snapshot = with_edits(self.current.fitted, edits, previous=self.current.delta)
+        edits.append(edits_path(self.paths), changes)
+        self.edits = edits
+        self._publish(snapshot)
+        return snapshot
+
+    def edits_behind(self) -> bool:
+        """True if another process appended edits this one has not applied."""
+        return self.edits.behind(edits_path(self.paths))
+
+    def sync_edits(self):
+        """Apply and publish edits other processes appended to the log."""
+        if self.edits_behind():
+            with self._edit_lock:
+                self._catch_up_locked()
+        return self.current
+
+    def _catch_up_locked(self):
+        edits = self.edits.read_new(edits_path(self.paths))
+        if edits.offset == self.edits.offset:
+            return
+        previous, self.edits = self.edits, edits
+        if self.current is not None and edits.seq != previous.seq:
+            current = self.current
+            self._publish(with_edits(current.fitted, edits, previous=current.delta))
+
+    def _refit_if_delta_is_large(self, snapshot):
+        delta = snapshot.delta
+        if delta is not None and delta.n_upserts + delta.n_deleted >= DELTA_REFIT_PRODUCTS > 0:
+            self.reload_async()
+
+    # --- reload ---
+    def reload_async(self, force=False) -> bool:
+        """Start a background rebuild; False if one is already running."""
+        if not self._reload_lock.acquire(blocking=False):
+            return False
+        self.reloading = True
+        threading.Thread(target=self._reload, args=(force,), daemon=True,
+                         name="catalog-reload").start()
+        return True
+
+    def _reload(self, force):
+        try:
+            self._mtimes = self._input_mtimes()
+            self._build_artifact_out_of_process()
+            base = build_snapshot(self.paths, self.artifacts_dir)
+            with self._edit_lock:
+                current = self.current
+                if not force and current is not None and base.version == current.fitted.version:
+                    print(f"ℹ️ Catalog unchanged ({base.version}), keeping current snapshot.")
+                    return
+                # edits made while the model was building stay in the delta
+                self._catch_up_locked()
+                snapshot = with_edits(base, self.edits)
+                self.reload_count += 1
+                self.last_error = None
+                print(f"✅ Catalog snapshot {snapshot.version} is live ({snapshot.source}).")
+                self._publish(snapshot)
+        except Exception as e:
+            self.last_error = f"{type(e).__name__}: {e}"
+            print("❌ Catalog reload failed, keeping previous snapshot:", e)
+            traceback.print_exc()
+        finally:
+            self.reloading = False
+            self._reload_lock.release()
+
+    def _build_artifact_out_of_process(self):
+        if self.paths is not DATASET_PATHS:
+            return  # the CLI only builds from the default dataset paths
+        script = os.path.join(os.path.dirname(os.path.abspath(__file__)), "model_store.py")
+        result = subprocess.run(
+            [sys.executable, script, "build", "--out", self.artifacts_dir],
+            capture_output=True, text=True,
+        )
+        if result.returncode != 0:
+            print("⚠️ Out-of-process model build failed, fitting in-process:", result.stderr[-500:])
+
+    # --- file watcher ---
+    def _input_mtimes(self):
+        mtimes = {}
+        for name, path in self.paths.items():
+            try:
+                mtimes[name] = os.stat(path).st_mtime_ns
+            except OSError:
+                mtimes[name] = None
+        return mtimes
+
+    def start_watcher(self, interval: float):
+        """Poll the dataset files every `interval` seconds and reload on change."""
+        if interval <= 0 or self._watcher is not None:
+            return
+        self._stop.clear()
+
+        def watch():
+            while not self._stop.wait(interval):
+                if self._input_mtimes() != self._mtimes:
+                    print("🔄 Dataset files changed, reloading catalog...")
+                    self.reload_async()
+
+        self._watcher = threading.Thread(target=watch, daemon=True, name="catalog-watcher")
+        self._watcher.start()
+
+    def start_refit_timer(self, interval: float):
+        """Every `interval` seconds, refit if product edits are waiting in a delta."""
+        if interval <= 0 or self._refitter is not None:
+            return
+        self._stop.clear()
+
+        def refit():
+            while not self._stop.wait(interval):
+                if self.current is not None and self.current.delta is not None:
+                    print("🔄 Folding pending product edits into a full refit...")
+                    self.reload_async()
+
+        self._refitter = threading.Thread(target=refit, daemon=True, name="catalog-refit")
+        self._refitter.start()
+
+    def stop_watcher(self):
+        self._stop.set()
+        self._watcher = None
+        self._refitter = None
+
+    def status(self) -> dict:
+        snapshot = self.current
+        return {
+            "ready": snapshot is not None,
+            "snapshot": snapshot.info() if snapshot is not None else None,
+            "reloading": self.reloading,
+            "reload_count": self.reload_count,
+            "last_error": self.last_error,
+        }
@@ -3,20 +3,20 @@ import os
 import ast
 import re
 
-def clean_ingredients():
-    print("🔹 Loading ingredients dataset...")
-
-    # Paths
-    data_dir = "data"
-    processed_dir = "processed"
-    ingredients_path = os.path.join(data_dir, "ingredients_clean.csv")
-
-    # Load
-    ingredients = pd.read_csv(ingredients_path)
-    print(f"Ingredients loaded: {ingredients.shape}")
+def clean_list_string(s):
+    if not isinstance(s, str):
+        return []
+    try:
+        lst = ast.literal_eval(s)
+        if isinstance(lst, list):
+            return [x.strip() for x in lst if x.strip() and x.strip() != ","]
+    except (ValueError, SyntaxError):
+        pass
+    return [s.strip()] if s.strip() else []
 
-    # --- Cleaning Steps ---
 
+def clean_ingredients_frame(ingredients):
+    """Row-wise ingredient cleaning; safe to apply chunk by chunk."""
     # 1. Trim column names
     ingredients.columns = ingredients.columns.str.strip()
 
@@ -43,33 +43,39 @@ def clean_ingredients():
             )
 
     # 4. Clean list-like strings
-    def clean_list_string(s):
-        if not isinstance(s, str):
-            return []
-        try:
-            lst = ast.literal_eval(s)
-            if isinstance(lst, list):
-                return [x.strip() for x in lst if x.strip() and x.strip() != ","]
-        except (ValueError, SyntaxError):
-            pass
-        return [s.strip()] if s.strip() else []
-
     if "who_is_it_good_for" in ingredients.columns:
         ingredients["who_is_it_good_for"] = ingredients["who_is_it_good_for"].apply(clean_list_string)
 
     if "who_should_avoid" in ingredients.columns:
         ingredients["who_should_avoid"] = ingredients["who_should_avoid"].apply(clean_list_string)
 
-    # 5. Clean URLs & remove duplicates
+    # 5. Clean URLs (duplicates are removed by the caller, across chunks)
     if "url" in ingredients.columns:
         ingredients["url"] = ingredients["url"].str.strip().str.replace(" ", "")
-    if "name" in ingredients.columns:
-        ingredients.drop_duplicates(subset=["name"], inplace=True)
 
     # 6. Remove any leftover HTML
     for col in ["short_description", "what_is_it", "what_does_it_do"]:
         if col in ingredients.columns:
             ingredients[col] = ingredients[col].str.replace(r"<.*?>", "", regex=True)
+    return ingredients
+
+
+def clean_ingredients():
+    print("🔹 Loading ingredients dataset...")
+
+    # Paths
+    data_dir = "data"
+    processed_dir = "processed"
+    ingredients_path = os.path.join(data_dir, "ingredients_clean.csv")
+
+    # Load
+    ingredients = pd.read_csv(ingredients_path)
+    print(f"Ingredients loaded: {ingredients.shape}")
+
+    # --- Cleaning Steps ---
+    ingredients = clean_ingredients_frame(ingredients)
+    if "name" in ingredients.columns:
+        ingredients.drop_duplicates(subset=["name"], inplace=True)
 
     # --- Save ---
     os.makedirs(processed_dir, exist_ok=True)
@@ -0,0 +1,184 @@
+import hashlib
+import os
+
+import numpy as np
+import pandas as pd
+
+# ================================================================
+# 🗜️ Columnar Storage – Parquet copies of the processed CSVs
+# ================================================================
+# The pipeline writes <name>.parquet next to every processed <name>.csv,
+# with compact dtypes (categorical labels, uint8 flags, float32 numbers).
+# read_table() loads only the requested columns from the Parquet copy
+# when it was written from the current CSV, and falls back to the CSV
+# (same pruning, same dtypes) otherwise. The CSV stays the source of truth.
+#
+# Parquet buys load time, not memory: from 10x the catalog it loads about
+# twice as fast, but each process that reads it keeps ~10 MB of Arrow
+# library pages plus ~10 MB of allocator arenas resident on top of the
+# frames (benchmarks/bench_columnar.py). DATASET_FORMAT=csv forces the CSV
+# path where resident memory matters more than startup.
+
+DATASET_FORMAT = os.getenv("DATASET_FORMAT", "auto").lower()
+
+SKIN_FLAG_COLUMNS = ["Combination", "Dry", "Normal", "Oily", "Sensitive"]
+ALLERGEN_FLAG_COLUMNS = [
+    "skin_type_sensitive", "skin_type_oily", "skin_type_dry",
+    "skin_type_combination", "skin_type_normal",
+]
+
+# file name -> column dtypes; columns not listed stay strings
+DTYPES = {
+    "products_clean.csv": {
+        "Label": "category",
+        "brand": "category",
+        "price": "float32",
+        "rank": "float32",
+        **{col: "uint8" for col in SKIN_FLAG_COLUMNS},
+    },
+    "allergens_clean.csv": {
+        "allergen_id": "int32",
+        "skin_condition": "category",
+        "ingredient_type": "category",
+        **{col: "uint8" for col in ALLERGEN_FLAG_COLUMNS},
+    },
+    "product_ingredients.csv": {"product_id": "int32", "ingredient_name": "category"},
+    "product_allergens.csv": {"product_id": "int32", "allergen_name": "category"},
+    "product_centrality.csv": {"product_id": "int32", "centrality": "float32", "label_centrality": "float32"},
+}
+
+SOURCE_HASH_KEY = b"veibelle.source_sha256"
+
+
+def arrow():
+    """
+    (pyarrow, pyarrow.parquet), or None when pyarrow isn't installed.
+    Imported on first use, so a worker that never touches a Parquet file
+    doesn't load pyarrow.parquet (~5 MB resident).
+    """
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:  # CSV-only: loaders still prune columns and compact dtypes
+        return None
+    return pa, pq
+
+
+def file_sha256(path):
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def parquet_path(csv_path):
+    return os.path.splitext(csv_path)[0] + ".parquet"
+
+
+def compact(frame, csv_path):
+    """Apply the compact dtypes registered for this file."""
+    for col, dtype in DTYPES.get(os.path.basename(csv_path), {}).items():
+        if col not in frame.columns:
+            continue
+        if dtype == "category":
+            frame[col] = frame[col].astype("category")
+        elif dtype.startswith("float"):
+            frame[col] = pd.to_numeric(frame[col], errors="coerce").astype(dtype)
+        else:
+            # flags / ids: missing or malformed values become 0
+            frame[col] = pd.to_numeric(frame[col], errors="coerce").fillna(0).astype(dtype)
+    return frame
+
+
+# ================================================================
+# ✍️ Writing
+# ================================================================
+def arrow_schema(pa, csv_path, columns):
+    fields = []
+    dtypes = DTYPES.get(os.path.basename(csv_path), {})
+    for col in columns:
+        dtype = dtypes.get(col)
+        if dtype == "category":
+            fields.append(pa.field(col, pa.dictionary(pa.int32(), pa.string())))
+        elif dtype is not None:
+            fields.append(pa.field(col, pa.from_numpy_dtype(np.dtype(dtype))))
+        else:
+            fields.append(pa.field(col, pa.string()))
+    return pa.schema(fields)
+
+
+def write_parquet(csv_path, chunksize=50000):
+    """
+    Stream `csv_path` into its Parquet copy, one row group per chunk.
+    Returns the Parquet path, or None when pyarrow isn't installed.
+    """
+    modules = arrow()
+    if modules is None:
+        return None
+    pa, pq = modules
+    out_path = parquet_path(csv_path)
+    tmp = out_path + ".tmp"
+    writer = None
+    try:
+        for chunk in pd.read_csv(csv_path, chunksize=chunksize, dtype=str, encoding="utf-8-sig"):
+            chunk = compact(chunk, csv_path)
+            if writer is None:
+                schema = arrow_schema(pa, csv_path, chunk.columns)
+                schema = schema.with_metadata({SOURCE_HASH_KEY: file_sha256(csv_path).encode()})
+                writer = pq.ParquetWriter(tmp, schema)
+            table = pa.Table.from_pandas(chunk, preserve_index=False)
+            writer.write_table(table.cast(writer.schema))
+        if writer is None:  # header-only CSV
+            return None
+        writer.close()
+        writer = None
+        os.replace(tmp, out_path)
+    finally:
+        if writer is not None:
+            writer.close()
+        if os.path.exists(tmp):
+            os.remove(tmp)
+    return out_path
+
+
+# ================================================================
+# 📖 Reading
+# ================================================================
+def parquet_is_current(csv_path, source_hash=None):
+    """True if the Parquet copy was written from the CSV as it is now."""
+    path = parquet_path(csv_path)
+    if DATASET_FORMAT == "csv" or not os.path.exists(path):
+        return False
+    modules = arrow()
+    if modules is None:
+        return False
+    _, pq = modules
+    metadata = pq.read_schema(path).metadata or {}
+    recorded = metadata.get(SOURCE_HASH_KEY, b"").decode()
+    return recorded == (source_hash or file_sha256(csv_path))
+
+
+def read_table(csv_path, columns=None, source_hash=None):
+    """
+    Load a processed dataset with only `columns` (all when None) and
+    compact dtypes. `source_hash` skips re-hashing a CSV the caller already
+    hashed. Columns missing from the file are skipped, as with CSV reads.
+    """
+    if parquet_is_current(csv_path, source_hash):
+        pa, pq = arrow()
+        path = parquet_path(csv_path)
+        if columns is not None:
+            available = set(pq.read_schema(path).names)
+            columns = [c for c in columns if c in available]
+        frame = pd.read_parquet(path, columns=columns)
+        # the Arrow buffers are garbage once converted; hand them back to the
+        # OS now instead of keeping them resident in every worker
+        pa.default_memory_pool().release_unused()
+        return frame
+
+    usecols = None if columns is None else (lambda c: c in columns)
+    frame = pd.read_csv(csv_path, usecols=usecols)
+    if columns is not None:
+        frame = frame[[c for c in columns if c in frame.columns]]
+    return compact(frame, csv_path)
@@ -1,6 +1,36 @@
 import pandas as pd
 import os
 
+YES_NO_COLUMNS = [
+    "skin_type_sensitive", "skin_type_oily", "skin_type_dry",
+    "skin_type_combination", "skin_type_normal"
+]
+
+
+def clean_products(products):
+    """Row-wise product cleaning; safe to apply chunk by chunk."""
+    if "ingredients" in products.columns:
+        products["ingredients"] = products["ingredients"].fillna("").astype(str).str.lower()
+
+    # Ensure numeric fields are correct
+    if "price" in products.columns:
+        products["price"] = pd.to_numeric(products["price"], errors="coerce")
+
+    if "rank" in products.columns:
+        products["rank"] = pd.to_numeric(products["rank"], errors="coerce")
+    return products
+
+
+def clean_allergens(allergens):
+    """Row-wise allergen cleaning; safe to apply chunk by chunk."""
+    # Convert Yes/No or 1/0 columns to integers
+    for col in YES_NO_COLUMNS:
+        if col in allergens.columns:
+            allergens[col] = allergens[col].fillna("No").astype(str).str.strip().str.lower()
+            allergens[col] = allergens[col].map({"yes": 1, "no": 0, "1": 1, "0": 0}).fillna(0).astype(int)
+    return allergens
+
+
 def preprocess():
     print("🔹 Loading datasets...")
 
@@ -16,27 +46,10 @@ def preprocess():
     print(f"Allergens loaded: {allergens.shape}")
 
     # --- Clean Products Dataset ---
-    if "ingredients" in products.columns:
-        products["ingredients"] = products["ingredients"].fillna("").astype(str).str.lower()
-
-    # Ensure numeric fields are correct
-    if "price" in products.columns:
-        products["price"] = pd.to_numeric(products["price"], errors="coerce")
-
-    if "rank" in products.columns:
-        products["rank"] = pd.to_numeric(products["rank"], errors="coerce")
+    products = clean_products(products)
 
     # --- Clean Allergens Dataset ---
-    # Convert Yes/No or 1/0 columns to integers
-    yes_no_columns = [
-        "skin_type_sensitive", "skin_type_oily", "skin_type_dry",
-        "skin_type_combination", "skin_type_normal"
-    ]
-
-    for col in yes_no_columns:
-        if col in allergens.columns:
-            allergens[col] = allergens[col].fillna("No").astype(str).str.strip().str.lower()
-            allergens[col] = allergens[col].map({"yes": 1, "no": 0, "1": 1, "0": 0}).fillna(0).astype(int)
+    allergens = clean_allergens(allergens)
 
     # --- Save Preprocessed Versions ---
     os.makedirs("processed", exist_ok=True)
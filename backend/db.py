@@ -0,0 +1,221 @@
+import threading
+import time
+from contextlib import contextmanager
+
+import psycopg2
+from psycopg2.extras import RealDictCursor
+
+# ================================================================
+# 🐘 Postgres Connection Pool
+# ================================================================
+# Reuses connections (and their TLS sessions) across requests instead of
+# calling psycopg2.connect() for every /history call.
+
+
+class PoolTimeout(Exception):
+    """No connection became available within the pool timeout."""
+
+
+class _PooledConn:
+    __slots__ = ("conn", "created_at", "last_used")
+
+    def __init__(self, conn):
+        self.conn = conn
+        self.created_at = self.last_used = time.monotonic()
+
+
+class ConnectionPool:
+    """
+    Thread-safe pool of psycopg2 connections.
+
+    - minconn/maxconn: connections opened on first use / hard upper bound
+    - timeout:         seconds to wait for a free connection before PoolTimeout
+    - max_lifetime:    connections older than this are closed and replaced
+    - check_after:     idle connections are pinged with `select 1` before reuse
+                       once they have been idle this long
+
+    `connect` is the connection factory, so the pool can be pointed at a
+    local Postgres or a stand-in in tests.
+    """
+
+    def __init__(self, dsn, minconn=1, maxconn=10, timeout=5.0,
+                 max_lifetime=1800.0, check_after=30.0, connect=None):
+        self.dsn = dsn
+        self.minconn = minconn
+        self.maxconn = maxconn
+        self.timeout = timeout
+        self.max_lifetime = max_lifetime
+        self.check_after = check_after
+        self._connect = connect or (
+            lambda: psycopg2.connect(self.dsn, cursor_factory=RealDictCursor)
+        )
+        self._idle = []
+        self._size = 0  # open + opening connections
+        self._in_use = 0
+        self._waiting = 0
+        self._opened = False
+        self._cond = threading.Condition()
+        self.acquisitions = 0
+        self.timeouts = 0
+        self.wait_seconds_total = 0.0
+        self.wait_seconds_max = 0.0
+        self.created = 0
+        self.recycled = 0
+        self.discarded = 0
+
+    def _new_conn(self):
+        if not self.dsn:
+            raise RuntimeError("DATABASE_URL is not set in environment variables.")
+        conn = self._connect()
+        with self._cond:
+            self.created += 1
+        return _PooledConn(conn)
+
+    def _open(self):
+        """Warm up `minconn` connections the first time the pool is used."""
+        with self._cond:
+            if self._opened:
+                return
+            self._opened = True
+            missing = max(self.minconn - self._size, 0)
+            self._size += missing
+        for _ in range(missing):
+            try:
+                pc = self._new_conn()
+            except Exception:
+                with self._cond:
+                    self._size -= 1
+                    self._opened = False
+                raise
+            with self._cond:
+                self._idle.append(pc)
+                self._cond.notify()
+
+    def _usable(self, pc) -> bool:
+        if pc.conn.closed:
+            return False
+        now = time.monotonic()
+        if now - pc.created_at > self.max_lifetime:
+            with self._cond:
+                self.recycled += 1
+            return False
+        if now - pc.last_used > self.check_after:
+            try:
+                with pc.conn.cursor() as cur:
+                    cur.execute("select 1")
+                pc.conn.rollback()
+            except Exception:
+                return False
+        return True
+
+    def _close_quietly(self, pc):
+        try:
+            pc.conn.close()
+        except Exception:
+            pass
+
+    def _acquire(self):
+        self._open()
+        start = time.monotonic()
+        deadline = start + self.timeout
+        while True:
+            pc = None
+            with self._cond:
+                while not self._idle and self._size >= self.maxconn:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self.timeouts += 1
+                        raise PoolTimeout(f"No database connection available after {self.timeout}s")
+                    self._waiting += 1
+                    try:
+                        self._cond.wait(remaining)
+                    finally:
+                        self._waiting -= 1
+                if self._idle:
+                    pc = self._idle.pop()  # LIFO keeps hot connections hot
+                else:
+                    self._size += 1
+                self._in_use += 1
+
+            if pc is None:
+                try:
+                    pc = self._new_conn()
+                except Exception:
+                    self._forget(in_use=True)
+                    raise
+            elif not self._usable(pc):
+                self._close_quietly(pc)
+                self._forget(in_use=True)
+                continue
+
+            waited = time.monotonic() - start
+            with self._cond:
+                self.acquisitions += 1
+                self.wait_seconds_total += waited
+                self.wait_seconds_max = max(self.wait_seconds_max, waited)
+            return pc
+
+    def _forget(self, in_use):
+        with self._cond:
+            self._size -= 1
+            if in_use:
+                self._in_use -= 1
+            self.discarded += 1
+            self._cond.notify()
+
+    def _release(self, pc, broken):
+        if not broken and not pc.conn.closed:
+            try:
+                pc.conn.rollback()  # never hand out a connection mid-transaction
+            except Exception:
+                broken = True
+        if broken or pc.conn.closed:
+            self._close_quietly(pc)
+            self._forget(in_use=True)
+            return
+        pc.last_used = time.monotonic()
+        with self._cond:
+            self._in_use -= 1
+            self._idle.append(pc)
+            self._cond.notify()
+
+    @contextmanager
+    def connection(self):
+        """Borrow a connection; it is rolled back and returned on exit."""
+        pc = self._acquire()
+        broken = False
+        try:
+            yield pc.conn
+        except (psycopg2.OperationalError, psycopg2.InterfaceError):
+            broken = True
+            raise
+        finally:
+            self._release(pc, broken)
+
+    def close(self):
+        with self._cond:
+            idle, self._idle = self._idle, []
+            self._size -= len(idle)
+            self._opened = False
+        for pc in idle:
+            self._close_quietly(pc)
+
+    def stats(self) -> dict:
+        with self._cond:
+            return {
+                "min_size": self.minconn,
+                "max_size": self.maxconn,
+                "size": self._size,
+                "in_use": self._in_use,
+                "idle": len(self._idle),
+                "waiting": self._waiting,
+                "acquisitions": self.acquisitions,
+                "timeouts": self.timeouts,
+                "wait_seconds_total": round(self.wait_seconds_total, 6),
+                "wait_seconds_max": round(self.wait_seconds_max, 6),
+                "wait_seconds_avg": round(self.wait_seconds_total / self.acquisitions, 6)
+                if self.acquisitions else 0.0,
+                "connections_created": self.created,
+                "connections_recycled": self.recycled,
+                "connections_discarded": self.discarded,
+            }
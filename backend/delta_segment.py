@@ -0,0 +1,271 @@
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+
+from filter_index import build_filter_index
+from incidence import build_incidence
+from ingredient_matcher import AhoCorasick, pregnancy_unsafe_ingredients
+from model_store import add_pregnancy_flags, build_search_text
+from product_edits import edits_frame, relation_frame
+from product_table import build_product_table
+
+# ================================================================
+# 🧩 Delta Segment – product edits served without refitting TF-IDF
+# ================================================================
+# The fitted snapshot (the "base") stays untouched. Products added or
+# replaced since it was built live in a small delta segment:
+#
+#   - vectorized with the base vectorizer (its vocabulary and IDF), so
+#     their rows are directly comparable with the base matrix
+#   - appended after the base rows: row i >= n_base is delta row i - n_base
+#   - edited and deleted base products are tombstoned in `alive`
+#
+# The Segmented* wrappers expose base + delta through the interfaces the
+# API already uses (ProductTable, FilterIndex, IngredientIncidence and the
+# TF-IDF matrix), so request code doesn't know about segments.
+#
+# Until the next full refit (see CatalogManager) folds them into the model,
+# terms missing from the base vocabulary are ignored for delta products,
+# and the precomputed similar-products graph only covers base rows: delta
+# products get their neighbours scored on request.
+
+
+class DeltaSegment:
+    """Products edited since the base snapshot was fitted."""
+
+    def __init__(self, base_version, n_base, alive, changes, products_df, tfidf,
+                 products, filter_index, incidence, matcher):
+        self.base_version = base_version
+        self.n_base = n_base
+        self.alive = alive
+        self.changes = changes  # product id -> product dict, None if deleted
+        self.products_df = products_df  # upserted products, rows aligned with tfidf
+        self.tfidf = tfidf
+        self.products = products
+        self.filter_index = filter_index
+        self.incidence = incidence
+        self.matcher = matcher  # pregnancy-unsafe ingredients of the base
+        self.n_upserts = len(products_df)
+        self.n_deleted = len(changes) - len(products_df)
+
+
+def vectorize(base, products, matcher):
+    """products_df rows (with pregnancy flags) and TF-IDF rows for {id: product}."""
+    products_df = edits_frame(products)
+    if len(products_df):
+        add_pregnancy_flags(products_df, base.ingredients_df, matcher)
+        search_text = [build_search_text(row) for _, row in products_df.iterrows()]
+        tfidf = base.vectorizer.transform(search_text).tocsr()
+    else:
+        tfidf = sp.csr_matrix((0, len(base.vectorizer.vocabulary_)), dtype=base.full_tfidf.dtype)
+    return products_df, tfidf
+
+
+def build_delta(base, changes, vocabularies, previous=None) -> DeltaSegment:
+    """
+    `base` is the fitted CatalogSnapshot, `changes` maps product id to its
+    latest product dict (None = deleted) for edits newer than the base.
+    Products already vectorized in `previous` (same base, same dict) are
+    reused, so one edit costs one vectorization however large the delta.
+    """
+    upserts = {pid: product for pid, product in changes.items() if product is not None}
+    reusable = previous is not None and previous.base_version == base.version
+    kept = [
+        pid for pid in (previous.products_df.index if reusable else ())
+        if upserts.get(pid) is previous.changes.get(pid)
+    ]
+    matcher = previous.matcher if reusable else AhoCorasick(pregnancy_unsafe_ingredients(base.ingredients_df))
+    fresh = {pid: upserts[pid] for pid in upserts.keys() - set(kept)}
+    fresh_df, fresh_tfidf = vectorize(base, fresh, matcher)
+    if kept:
+        kept_rows = previous.products_df.index.get_indexer(kept)
+        products_df = pd.concat([previous.products_df.iloc[kept_rows], fresh_df])
+        tfidf = sp.vstack([previous.tfidf[kept_rows], fresh_tfidf], format="csr")
+        order = np.argsort(products_df.index.to_numpy(), kind="stable")
+        products_df, tfidf = products_df.iloc[order], tfidf[order]
+    else:
+        products_df, tfidf = fresh_df, fresh_tfidf
+
+    ingredient_vocabulary, allergen_vocabulary = vocabularies
+    product_ing = relation_frame(products_df, ingredient_vocabulary, "ingredient_name")
+    product_allergens = relation_frame(products_df, allergen_vocabulary, "allergen_name")
+
+    alive = np.ones(base.products.n, dtype=bool)
+    for pid in changes:
+        row = base.products.position(pid)
+        if row >= 0:
+            alive[row] = False
+    alive.flags.writeable = False
+
+    return DeltaSegment(
+        base_version=base.version,
+        n_base=base.products.n,
+        alive=alive,
+        changes=changes,
+        products_df=products_df,
+        tfidf=tfidf,
+        products=build_product_table(products_df),
+        filter_index=build_filter_index(products_df, product_allergens, base.filter_index.conditions),
+        incidence=build_incidence(
+            products_df,
+            (product_ing, "ingredient_name"),
+            (product_allergens, "allergen_name"),
+        ),
+        matcher=matcher,
+    )
+
+
+def _concat(base_mask, delta_mask):
+    return np.concatenate([base_mask, delta_mask])
+
+
+# ================================================================
+# 🧱 Base + delta views
+# ================================================================
+class SegmentedProducts:
+    """ProductTable over base rows followed by delta rows."""
+
+    def __init__(self, base, delta):
+        self.base = base
+        self.delta = delta
+        self.n = base.n + delta.products.n
+        self.price = _concat(base.price, delta.products.price)
+        self.rank = _concat(base.rank, delta.products.rank)
+        self.centrality = _concat(base.centrality, delta.products.centrality)
+
+    def __len__(self):
+        return self.n
+
+    def position(self, product_id) -> int:
+        """Row of `product_id`: its delta row if edited, -1 if deleted or unknown."""
+        pos = self.delta.products.position(product_id)
+        if pos >= 0:
+            return self.base.n + pos
+        pos = self.base.position(product_id)
+        if pos >= 0 and self.delta.alive[pos]:
+            return pos
+        return -1
+
+    def row(self, i):
+        if i < self.base.n:
+            return self.base.row(i)
+        return self.delta.products.row(i - self.base.n)
+
+    def records(self, rows, scores):
+        return [self.row(i).to_record(s) for i, s in zip(rows.tolist(), scores)]
+
+    def nbytes(self) -> int:
+        own = self.price.nbytes + self.rank.nbytes + self.centrality.nbytes
+        return self.base.nbytes() + self.delta.products.nbytes() + own
+
+
+class SegmentedFilterIndex:
+    """FilterIndex whose masks cover base rows then delta rows; deleted rows are never set."""
+
+    def __init__(self, base, delta):
+        self.base = base
+        self.delta = delta
+        self.n_products = base.n_products + delta.filter_index.n_products
+        self.pregnancy_unsafe = _concat(base.pregnancy_unsafe, delta.filter_index.pregnancy_unsafe)
+        self.conditions = base.conditions
+        # a term is matched once either segment has a product containing it
+        self.unmatched = {
+            key: tuple(t for t in terms if t in set(delta.filter_index.unmatched.get(key, terms)))
+            for key, terms in base.unmatched.items()
+        }
+        self._all_rows = _concat(delta.alive, delta.filter_index.all_rows())
+        self.pregnancy_unsafe.flags.writeable = False
+        self._all_rows.flags.writeable = False
+
+    def all_rows(self) -> np.ndarray:
+        return self._all_rows.copy()
+
+    def no_rows(self) -> np.ndarray:
+        return np.zeros(self.n_products, dtype=bool)
+
+    def skin_type_mask(self, col_name):
+        base = self.base.skin_type_mask(col_name)
+        if base is None:
+            return None
+        delta = self.delta.filter_index.skin_type_mask(col_name)
+        return _concat(base, delta if delta is not None else self.delta.filter_index.no_rows())
+
+    def product_type_mask(self, types) -> np.ndarray:
+        return _concat(self.base.product_type_mask(types), self.delta.filter_index.product_type_mask(types))
+
+    def allergen_mask(self, allergens) -> np.ndarray:
+        return _concat(self.base.allergen_mask(allergens), self.delta.filter_index.allergen_mask(allergens))
+
+    def range_mask(self, column, lo=None, hi=None):
+        base = self.base.range_mask(column, lo, hi)
+        if base is None:
+            return None
+        return _concat(base, self.delta.filter_index.range_mask(column, lo, hi))
+
+    def unknown_conditions(self, names) -> list:
+        return self.base.unknown_conditions(names)
+
+    def condition_avoid_mask(self, names) -> np.ndarray:
+        return _concat(self.base.condition_avoid_mask(names),
+                       self.delta.filter_index.condition_avoid_mask(names))
+
+    def condition_recommended_mask(self, names) -> np.ndarray:
+        return _concat(self.base.condition_recommended_mask(names),
+                       self.delta.filter_index.condition_recommended_mask(names))
+
+
+class SegmentedIncidence:
+    """IngredientIncidence over base rows then delta rows."""
+
+    def __init__(self, base, delta):
+        self.base = base
+        self.delta = delta
+        self.n_products = base.n_products + delta.incidence.n_products
+        self.vocabulary = {**base.vocabulary}
+        for name in delta.incidence.vocabulary:
+            self.vocabulary.setdefault(name, len(self.vocabulary))
+        self.listed = base.listed | delta.incidence.listed
+
+    def unknown(self, names) -> list:
+        missing = set(self.delta.incidence.unknown(names))
+        return [n for n in self.base.unknown(names) if n in missing]
+
+    def rows_with_any(self, names) -> np.ndarray:
+        return _concat(self.base.rows_with_any(names), self.delta.incidence.rows_with_any(names))
+
+    def rows_with_all(self, names) -> np.ndarray:
+        return _concat(self.base.rows_with_all(names), self.delta.incidence.rows_with_all(names))
+
+    def product_counts(self) -> dict:
+        """Counts over live products: deleted / replaced base rows are left out."""
+        counts = self.base.product_counts()
+        dead = np.flatnonzero(~self.delta.alive)
+        if len(dead):
+            per_col = np.asarray(self.base.matrix[dead].sum(axis=0)).ravel()
+            for name, col in self.base.vocabulary.items():
+                counts[name] -= int(per_col[col])
+        for name, count in self.delta.incidence.product_counts().items():
+            counts[name] = counts.get(name, 0) + count
+        return counts
+
+
+class SegmentedMatrix:
+    """The TF-IDF matrix as base rows stacked on delta rows, without copying the base."""
+
+    def __init__(self, base, delta):
+        self.base = base
+        self.delta = delta.tfidf
+        self.shape = (base.shape[0] + self.delta.shape[0], base.shape[1])
+        self.dtype = base.dtype
+
+    def __matmul__(self, query):
+        return np.concatenate([
+            np.asarray(self.base @ query).ravel(),
+            np.asarray(self.delta @ query).ravel(),
+        ])
+
+    def getrow(self, i):
+        if i < self.base.shape[0]:
+            return self.base.getrow(i)
+        return self.delta.getrow(i - self.base.shape[0])
+
@@ -0,0 +1,189 @@
+import numpy as np
+
+from skin_conditions import condition_key, condition_masks
+
+# ================================================================
+# 🗂️ Filter Index – precomputed boolean masks over products_df rows
+# ================================================================
+# Built once when the datasets are loaded. Each request combines these
+# masks with & / | instead of copying and re-scanning the DataFrame.
+
+SKIN_TYPE_COLUMNS = ["Dry", "Oily", "Combination", "Normal", "Sensitive"]
+NUMERIC_COLUMNS = ["price", "rank"]
+
+
+class SortedColumn:
+    """
+    A numeric column sorted once, so any value range is two binary searches
+    plus a scatter of the matching positions. Missing values sort last and
+    never match a range. Bounds are compared in the column's own dtype, so
+    min_rank=4.2 matches a rank stored as float32 4.2.
+
+    Scattering is random access, so wide ranges (more than 1/SCAN_SHARE of
+    the rows) are answered with a plain sequential scan instead.
+    """
+
+    SCAN_SHARE = 16
+
+    def __init__(self, values):
+        values = np.asarray(values)
+        if values.dtype.kind != "f":
+            values = values.astype(np.float64)
+        self.n = len(values)
+        self.values = values
+        self.order = np.argsort(values, kind="stable")
+        self.sorted = values[self.order]
+        self.n_valid = int(np.count_nonzero(~np.isnan(values)))
+        for arr in (self.values, self.order, self.sorted):
+            arr.flags.writeable = False
+
+    def range_mask(self, lo=None, hi=None) -> np.ndarray:
+        """Rows with lo <= value <= hi (either bound optional)."""
+        valid = self.sorted[:self.n_valid]
+        cast = valid.dtype.type
+        start = 0 if lo is None else int(np.searchsorted(valid, cast(lo), side="left"))
+        stop = self.n_valid if hi is None else int(np.searchsorted(valid, cast(hi), side="right"))
+        if (stop - start) * self.SCAN_SHARE > self.n:
+            # same rows as the binary search: NaN fails both comparisons
+            mask = self.values >= valid[start]
+            if stop < self.n_valid:
+                mask &= self.values <= valid[stop - 1]
+            return mask
+        mask = np.zeros(self.n, dtype=bool)
+        mask[self.order[start:stop]] = True
+        return mask
+
+
+class FilterIndex:
+    """
+    Row masks aligned with the positional order of `products_df`.
+
+    - skin_masks:     skin-type column -> rows where the column == 1
+    - label_masks:    lowercased `Label` -> rows with that label
+    - allergen_masks: lowercased allergen name -> rows that contain it
+    - pregnancy_unsafe: rows containing an ingredient to avoid in pregnancy
+    - numeric:        column name -> SortedColumn for price / rank ranges
+    - conditions:     skin condition key -> SkinCondition (skin_conditions.py)
+    - avoid_masks / recommended_masks: skin condition key -> rows containing
+                      one of its avoid / recommended ingredients
+    - unmatched:      skin condition key -> its terms that no row contains
+    """
+
+    def __init__(self, n_products, skin_masks, label_masks, allergen_masks, pregnancy_unsafe,
+                 numeric=None, conditions=None, avoid_masks=None, recommended_masks=None,
+                 unmatched=None):
+        self.n_products = n_products
+        self.skin_masks = skin_masks
+        self.label_masks = label_masks
+        self.allergen_masks = allergen_masks
+        self.pregnancy_unsafe = pregnancy_unsafe
+        self.numeric = numeric or {}
+        self.conditions = conditions or {}
+        self.avoid_masks = avoid_masks or {}
+        self.recommended_masks = recommended_masks or {}
+        self.unmatched = unmatched or {}
+
+    def all_rows(self) -> np.ndarray:
+        return np.ones(self.n_products, dtype=bool)
+
+    def no_rows(self) -> np.ndarray:
+        return np.zeros(self.n_products, dtype=bool)
+
+    def skin_type_mask(self, col_name):
+        """Rows suitable for a skin-type column, or None if the column is unknown."""
+        return self.skin_masks.get(col_name)
+
+    def product_type_mask(self, types) -> np.ndarray:
+        """
+        Rows whose lowercased label contains any of `types` as a substring.
+        Matching runs against the handful of distinct labels, not every row.
+        """
+        wanted = [t.lower() for t in types]
+        mask = self.no_rows()
+        for label, label_mask in self.label_masks.items():
+            if any(t in label for t in wanted):
+                mask |= label_mask
+        return mask
+
+    def allergen_mask(self, allergens) -> np.ndarray:
+        """Rows containing at least one of the given allergens."""
+        mask = self.no_rows()
+        for a in allergens:
+            hit = self.allergen_masks.get(a.lower())
+            if hit is not None:
+                mask |= hit
+        return mask
+
+    def range_mask(self, column, lo=None, hi=None):
+        """Rows with lo <= column <= hi, or None if the column isn't indexed."""
+        index = self.numeric.get(column)
+        return index.range_mask(lo, hi) if index is not None else None
+
+    def unknown_conditions(self, names) -> list:
+        return [n for n in names if condition_key(n) not in self.conditions]
+
+    def condition_avoid_mask(self, names) -> np.ndarray:
+        """Rows containing an ingredient to avoid for any of the skin conditions."""
+        return self._condition_mask(self.avoid_masks, names)
+
+    def condition_recommended_mask(self, names) -> np.ndarray:
+        """Rows containing an ingredient recommended for any of the skin conditions."""
+        return self._condition_mask(self.recommended_masks, names)
+
+    def _condition_mask(self, masks, names):
+        mask = self.no_rows()
+        for name in names:
+            hit = masks.get(condition_key(name))
+            if hit is not None:
+                mask |= hit
+        return mask
+
+
+def build_filter_index(products_df, product_allergens=None, conditions=None) -> FilterIndex:
+    n = len(products_df)
+
+    skin_masks = {
+        col: (products_df[col].to_numpy() == 1)
+        for col in SKIN_TYPE_COLUMNS
+        if col in products_df.columns
+    }
+
+    label_masks = {}
+    labels = products_df["Label"].astype(object).fillna("").astype(str).str.lower()
+    for label, positions in labels.groupby(labels).indices.items():
+        mask = np.zeros(n, dtype=bool)
+        mask[positions] = True
+        label_masks[label] = mask
+
+    allergen_masks = {}
+    if product_allergens is not None and not product_allergens.empty:
+        # product_id refers to the products_df index label, not its position
+        rows = products_df.index.get_indexer(product_allergens["product_id"])
+        names = product_allergens["allergen_name"].astype(object).fillna("").astype(str).str.lower().to_numpy()
+        found = rows >= 0
+        for name, row in zip(names[found], rows[found]):
+            mask = allergen_masks.get(name)
+            if mask is None:
+                mask = allergen_masks[name] = np.zeros(n, dtype=bool)
+            mask[row] = True
+
+    if "pregnancy_unsafe" in products_df.columns:
+        pregnancy_unsafe = products_df["pregnancy_unsafe"].to_numpy(dtype=bool)
+    else:
+        pregnancy_unsafe = np.zeros(n, dtype=bool)
+
+    numeric = {
+        col: SortedColumn(products_df[col].to_numpy())
+        for col in NUMERIC_COLUMNS
+        if col in products_df.columns
+    }
+
+    conditions = conditions or {}
+    avoid_masks, recommended_masks, unmatched = condition_masks(products_df, conditions)
+
+    # masks are shared by concurrent requests; callers combine them into new arrays
+    for mask in [*skin_masks.values(), *label_masks.values(), *allergen_masks.values(), pregnancy_unsafe]:
+        mask.flags.writeable = False
+
+    return FilterIndex(n, skin_masks, label_masks, allergen_masks, pregnancy_unsafe, numeric,
+                       conditions, avoid_masks, recommended_masks, unmatched)
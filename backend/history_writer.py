@@ -0,0 +1,173 @@
+import queue
+import threading
+import time
+import traceback
+
+from psycopg2.extras import Json, execute_values
+
+import metrics
+
+# ================================================================
+# ✍️ Write-behind History Writer
+# ================================================================
+# Opt-in (HISTORY_WRITE_BEHIND=1). POST /history only enqueues the row;
+# a background thread inserts queued rows in multi-row batches once
+# `batch_size` rows are waiting or `flush_interval` seconds have passed.
+# Requires the client_id column from sql/recommendation_history.sql.
+
+INSERT_BATCH = """
+    insert into recommendation_history
+        (client_id, user_id, email, quiz_answers, recommendations, created_at)
+    values %s
+    on conflict (client_id) do nothing
+"""
+
+
+class QueueFull(Exception):
+    """The write-behind queue stayed full for the whole enqueue timeout."""
+
+
+class HistoryWriter:
+    def __init__(self, pool, max_queue=10000, batch_size=200, flush_interval=0.5,
+                 enqueue_timeout=0.5, max_retries=3):
+        self.pool = pool
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.enqueue_timeout = enqueue_timeout
+        self.max_retries = max_retries
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._stop = threading.Event()
+        self._cond = threading.Condition()  # guards _stop vs. submitters mid-put
+        self._submitting = 0
+        self._thread = None
+        self.enqueued = 0
+        self.rejected = 0
+        self.written = 0
+        self.batches = 0
+        self.failed_batches = 0
+        self.dropped = 0
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, daemon=True, name="history-writer")
+        self._thread.start()
+
+    def submit(self, client_id, user_id, email, quiz_answers, recommendations, created_at):
+        """
+        Queue one history row. Blocks for up to `enqueue_timeout` seconds when
+        the queue is full, then raises QueueFull so callers can shed load.
+        """
+        row = (client_id, user_id, email, Json(quiz_answers), Json(recommendations), created_at)
+        with self._cond:
+            if self._stop.is_set():
+                self.rejected += 1
+                raise QueueFull("History writer is shutting down")
+            self._submitting += 1
+        try:
+            self._queue.put(row, timeout=self.enqueue_timeout)
+        except queue.Full:
+            with self._cond:
+                self.rejected += 1
+            raise QueueFull("History write queue is full")
+        else:
+            with self._cond:
+                self.enqueued += 1
+        finally:
+            with self._cond:
+                self._submitting -= 1
+                self._cond.notify_all()
+
+    def _next_batch(self):
+        """Wait for the first row, then collect more until full or the interval ends."""
+        try:
+            batch = [self._queue.get(timeout=self.flush_interval)]
+        except queue.Empty:
+            return []
+        deadline = time.monotonic() + self.flush_interval
+        while len(batch) < self.batch_size:
+            remaining = deadline - time.monotonic()
+            try:
+                if remaining <= 0 or self._stop.is_set():
+                    batch.append(self._queue.get_nowait())
+                else:
+                    batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while not self._stop.is_set():
+            batch = self._next_batch()
+            if batch:
+                self._flush(batch)
+        # drain on shutdown, until the queue is empty and no submit() that
+        # was accepted before stop() is still putting its row
+        while True:
+            batch = self._next_batch_nowait()
+            if batch:
+                self._flush(batch)
+                continue
+            with self._cond:
+                if self._submitting == 0 and self._queue.empty():
+                    break
+                self._cond.wait(0.05)
+
+    def _next_batch_nowait(self):
+        batch = []
+        while len(batch) < self.batch_size:
+            try:
+                batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _flush(self, batch):
+        for attempt in range(1, self.max_retries + 1):
+            try:
+                with metrics.stage("history_flush"), self.pool.connection() as conn:
+                    with conn.cursor() as cur:
+                        execute_values(cur, INSERT_BATCH, batch, page_size=len(batch))
+                    conn.commit()
+                self.written += len(batch)
+                self.batches += 1
+                return
+            except Exception as e:
+                self.failed_batches += 1
+                print(f"❌ History batch insert failed (attempt {attempt}/{self.max_retries}):", e)
+                if attempt == self.max_retries:
+                    traceback.print_exc()
+                else:
+                    time.sleep(min(0.2 * 2 ** attempt, 5))
+        self.dropped += len(batch)
+        print(f"❌ Dropped {len(batch)} history rows after {self.max_retries} failed attempts.")
+
+    def stop(self, timeout=10.0):
+        """
+        Stop accepting work and flush everything still queued. If that takes
+        longer than `timeout`, the thread keeps draining and a later stop()
+        waits for it again.
+        """
+        if self._thread is None:
+            return
+        with self._cond:
+            self._stop.set()
+        self._thread.join(timeout)
+        if self._thread.is_alive():
+            print(f"❌ History writer still draining after {timeout}s: "
+                  f"{self._queue.qsize()} rows queued, not yet written.")
+            return
+        self._thread = None
+
+    def stats(self) -> dict:
+        return {
+            "queued": self._queue.qsize(),
+            "max_queue": self._queue.maxsize,
+            "enqueued": self.enqueued,
+            "rejected": self.rejected,
+            "written": self.written,
+            "batches": self.batches,
+            "failed_batches": self.failed_batches,
+            "dropped": self.dropped,
+        }
@@ -0,0 +1,128 @@
+import re
+
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+
+# ================================================================
+# 🧪 Product × Ingredient Incidence Matrix
+# ================================================================
+# Every product's comma-separated ingredient list, plus the
+# product_ingredients.csv and product_allergens.csv relations, compiled
+# into one sparse 0/1 matrix over a normalized ingredient vocabulary, so
+# "has niacinamide, no fragrance" is answered with column slices.
+#
+# A name matches every vocabulary entry containing it as whole words, so
+# "fragrance" also covers "parfum (fragrance)" and "fragrance.".
+
+_SPACES = re.compile(r"\s+")
+_WORDS = re.compile(r"\w+")
+
+
+def normalize_ingredient(name) -> str:
+    """Lowercase, trim and collapse inner whitespace."""
+    if not isinstance(name, str):
+        return ""
+    return _SPACES.sub(" ", name.strip().lower())
+
+
+class IngredientIncidence:
+    """
+    `matrix` is CSC with one row per product (positional, like products_df)
+    and one column per entry of `vocabulary` (normalized name -> column).
+    `listed` holds the names the relation files use, which the ingredient
+    autocomplete offers; the raw list tokens are only matched against.
+    """
+
+    def __init__(self, matrix, vocabulary, listed=frozenset()):
+        self.matrix = matrix
+        self.vocabulary = vocabulary
+        self.listed = frozenset(listed)
+        self.n_products = matrix.shape[0]
+        self._names = list(vocabulary)
+        self._by_word = {}  # word -> columns whose name contains it
+        for name, col in vocabulary.items():
+            for word in set(_WORDS.findall(name)):
+                self._by_word.setdefault(word, []).append(col)
+
+    def _rows(self, col):
+        start, stop = self.matrix.indptr[col], self.matrix.indptr[col + 1]
+        return self.matrix.indices[start:stop]
+
+    def columns(self, name) -> list:
+        """Vocabulary columns whose name contains `name` as whole words."""
+        key = normalize_ingredient(name)
+        words = _WORDS.findall(key)
+        if not words:
+            return []
+        candidates = min((self._by_word.get(w, ()) for w in words), key=len)
+        pattern = re.compile(rf"(?<!\w){re.escape(key)}(?!\w)")
+        return [c for c in candidates if pattern.search(self._names[c])]
+
+    def unknown(self, names) -> list:
+        """The names in `names` no product's ingredients contain."""
+        return [n for n in names if normalize_ingredient(n) and not self.columns(n)]
+
+    def rows_with_any(self, names) -> np.ndarray:
+        """Products containing at least one of `names`."""
+        mask = np.zeros(self.n_products, dtype=bool)
+        for name in names:
+            for col in self.columns(name):
+                mask[self._rows(col)] = True
+        return mask
+
+    def rows_with_all(self, names) -> np.ndarray:
+        """Products containing every one of `names` (none if any is unknown)."""
+        mask = np.ones(self.n_products, dtype=bool)
+        for name in names:
+            if normalize_ingredient(name):
+                mask &= self.rows_with_any([name])
+        return mask
+
+    def product_counts(self) -> dict:
+        """Number of products using each vocabulary entry."""
+        per_col = np.diff(self.matrix.indptr)
+        return {name: int(per_col[col]) for name, col in self.vocabulary.items()}
+
+
+def build_incidence(products_df, *relations) -> IngredientIncidence:
+    """
+    Build from products_df's `ingredients` lists and from (frame, name_column)
+    pairs whose `product_id` refers to the products_df index, e.g.
+    (product_ing, "ingredient_name").
+    """
+    vocabulary = {}
+    row_parts, col_parts = [], []
+    if "ingredients" in products_df.columns:
+        # vectorized normalize_ingredient over every list item
+        items = (products_df["ingredients"].fillna("").astype(str).reset_index(drop=True)
+                 .str.split(",").explode().str.strip().str.lower()
+                 .str.replace(_SPACES, " ", regex=True))
+        codes, uniques = pd.factorize(items)
+        ids = np.array([vocabulary.setdefault(n, len(vocabulary)) if n else -1 for n in uniques],
+                       dtype=np.int64)
+        cols = ids[codes] if len(ids) else np.full(len(codes), -1, dtype=np.int64)
+        found = (codes >= 0) & (cols >= 0)
+        row_parts.append(items.index.to_numpy()[found])
+        col_parts.append(cols[found])
+    listed = set()
+    for frame, name_col in relations:
+        if frame is None or frame.empty:
+            continue
+        rows = products_df.index.get_indexer(frame["product_id"])
+        names = [normalize_ingredient(n) for n in frame[name_col]]
+        listed.update(n for n in names if n)
+        cols = np.array([vocabulary.setdefault(n, len(vocabulary)) if n else -1 for n in names])
+        found = (rows >= 0) & (cols >= 0)
+        row_parts.append(rows[found])
+        col_parts.append(cols[found])
+
+    rows = np.concatenate(row_parts) if row_parts else np.empty(0, dtype=np.int64)
+    cols = np.concatenate(col_parts) if col_parts else np.empty(0, dtype=np.int64)
+    matrix = sp.csc_matrix(
+        (np.ones(len(rows), dtype=np.int8), (rows, cols)),
+        shape=(len(products_df), len(vocabulary)),
+    )
+    matrix.sum_duplicates()
+    matrix.data[:] = 1
+    return IngredientIncidence(matrix, vocabulary, listed)
@@ -0,0 +1,175 @@
+import os
+from bisect import bisect_left
+
+import numpy as np
+
+from clean_ingredients import clean_list_string
+from incidence import normalize_ingredient
+
+# ================================================================
+# 🔤 Ingredient Index – autocomplete + lookup by name
+# ================================================================
+# Every ingredient the catalog knows (ingredients_df "name" and
+# "scientific_name", plus every name products were matched to in
+# product_ingredients / product_allergens)
+# becomes one entry, ranked by how many products use it. Entries are
+# found through two sorted key arrays searched with bisect:
+#
+#   name keys    the normalized name / scientific name
+#   word keys    the same names from each later word on, so "acid" finds
+#                "salicylic acid"
+#
+# Suggestions are whole-name prefix matches first, then word-prefix
+# matches, each by product count. A suggestion is two bisects plus a
+# top-`limit` partition of the matching keys' precomputed ranks, except
+# for the shortest prefixes (which match the most names), whose answers
+# are ranked once at build time. An exact lookup is a dict get. Neither
+# touches the products.
+
+# Results for prefixes up to SHORT_PREFIX characters are ranked when the
+# index is built; SUGGEST_MAX is the most a single suggestion returns.
+SHORT_PREFIX = int(os.getenv("INGREDIENT_SHORT_PREFIX", "2"))
+SUGGEST_MAX = int(os.getenv("INGREDIENT_SUGGEST_MAX", "50"))
+
+DESCRIPTION_FIELDS = ("scientific_name", "short_description", "what_is_it", "what_does_it_do", "url")
+LIST_FIELDS = ("who_is_it_good_for", "who_should_avoid")
+
+
+def _text(value):
+    if not isinstance(value, str):
+        return None
+    value = value.strip()
+    return value or None
+
+
+class IngredientIndex:
+    """Sorted prefix index over ingredient names; see the module comment."""
+
+    def __init__(self, names, counts, details, name_keys, word_keys):
+        """`name_keys` / `word_keys` are (key, entry) pairs."""
+        self.names = names      # display name per entry (entries sorted by normalized name)
+        self.counts = counts    # products using each entry
+        self.details = details  # description fields per entry (None: only seen in products)
+        # an entry's rank is its place in the suggestion order: most used first, then by name
+        by_rank = np.lexsort((np.arange(len(names)), -np.asarray(counts, dtype=np.int64)))
+        rank = np.empty(len(names), dtype=np.int32)
+        rank[by_rank] = np.arange(len(names), dtype=np.int32)
+        self.by_rank = by_rank.tolist()
+        self.name_keys, self.name_ranks = self._sorted_keys(name_keys, rank)
+        self.word_keys, self.word_ranks = self._sorted_keys(word_keys, rank)
+        self._exact = {k: self.by_rank[r] for k, r in zip(self.name_keys, self.name_ranks.tolist())}
+        self._short = self._short_prefixes()
+
+    def __len__(self):
+        return len(self.names)
+
+    @staticmethod
+    def _sorted_keys(pairs, rank):
+        pairs = sorted(set(pairs))
+        return [k for k, _ in pairs], rank[np.array([e for _, e in pairs], dtype=np.int64)]
+
+    @staticmethod
+    def _matches(keys, ranks, prefix):
+        lo = bisect_left(keys, prefix)
+        hi = bisect_left(keys, prefix + "\uffff", lo)
+        return ranks[lo:hi]
+
+    @staticmethod
+    def _best(ranks, n, skip=()):
+        """The `n` best distinct ranks, in order, leaving out those in `skip`."""
+        want = n + len(skip)
+        if len(ranks) > want:
+            best = set(np.partition(ranks, want - 1)[:want].tolist())
+            if len(best) < want:  # an entry matched through several keys
+                best = set(ranks.tolist())
+        else:
+            best = set(ranks.tolist())
+        return sorted(best.difference(skip))[:n]
+
+    def _ranked(self, prefix, limit):
+        """Ranks of the best whole-name matches, then of the best word-only matches."""
+        names = self._best(self._matches(self.name_keys, self.name_ranks, prefix), limit)
+        if len(names) == limit:
+            return names
+        return names + self._best(self._matches(self.word_keys, self.word_ranks, prefix),
+                                  limit - len(names), names)
+
+    def _short_prefixes(self):
+        """
+        Answers for every prefix of up to SHORT_PREFIX characters: they
+        match the largest share of the index, so they're ranked once here.
+        """
+        prefixes = {k[:n] for keys in (self.name_keys, self.word_keys) for k in keys
+                    for n in range(1, SHORT_PREFIX + 1) if len(k) >= n}
+        return {p: self._ranked(p, SUGGEST_MAX) for p in prefixes}
+
+    def suggest(self, query, limit=10) -> list:
+        """Up to `limit` entries whose name (or a word in it) starts with `query`."""
+        prefix = normalize_ingredient(query)
+        if not prefix or limit <= 0:
+            return []
+        if len(prefix) <= SHORT_PREFIX and limit <= SUGGEST_MAX:
+            ranks = self._short.get(prefix, [])[:limit]
+        else:
+            ranks = self._ranked(prefix, limit)
+        return [self.record(self.by_rank[r]) for r in ranks]
+
+    def lookup(self, name):
+        """The entry for an exact (normalized) name or scientific name, or None."""
+        return self._exact.get(normalize_ingredient(name))
+
+    def record(self, entry) -> dict:
+        return {
+            "name": self.names[entry],
+            "product_count": int(self.counts[entry]),
+            "has_details": self.details[entry] is not None,
+        }
+
+    def describe(self, entry) -> dict:
+        """Name, product count and the cleaned ingredients_cleaned_preprocessed.csv fields."""
+        details = self.details[entry] or {
+            **dict.fromkeys(DESCRIPTION_FIELDS), **{f: [] for f in LIST_FIELDS},
+        }
+        return {"name": self.names[entry], "product_count": int(self.counts[entry]), **details}
+
+
+def build_ingredient_index(ingredients_df, incidence) -> IngredientIndex:
+    """
+    Entries from `ingredients_df` rows and every name the `incidence`
+    lists (product_ingredients + product_allergens), with product
+    counts from it too, so a segmented snapshot counts its live products.
+    """
+    entries = {}  # normalized name -> (display name, details, keys)
+    if ingredients_df is not None:
+        columns = [c for c in (*DESCRIPTION_FIELDS, *LIST_FIELDS) if c in ingredients_df.columns]
+        for row in ingredients_df[["name", *columns]].itertuples(index=False):
+            row = row._asdict()
+            key = normalize_ingredient(row["name"])
+            if not key or key in entries:
+                continue
+            details = {f: _text(row.get(f)) for f in DESCRIPTION_FIELDS}
+            details.update({f: clean_list_string(row.get(f)) for f in LIST_FIELDS})
+            keys = {key, normalize_ingredient(row.get("scientific_name"))} - {""}
+            entries[key] = (row["name"].strip(), details, keys)
+    counts_by_name = incidence.product_counts() if incidence is not None else {}
+    for key in (incidence.listed if incidence is not None else ()):
+        if key not in entries:
+            entries[key] = (key, None, {key})
+
+    # a scientific name that is also another entry's name stays with that entry
+    claimed = set(entries)
+    names, counts, details, name_pairs, word_pairs = [], [], [], [], []
+    for entry, key in enumerate(sorted(entries)):
+        display, info, keys = entries[key]
+        keys = {key} | {k for k in keys if k not in claimed}
+        names.append(display)
+        details.append(info)
+        counts.append(max(counts_by_name.get(k, 0) for k in keys))
+        for k in keys:
+            name_pairs.append((k, entry))
+            words = k.split(" ")
+            word_pairs.extend((" ".join(words[i:]).lstrip("("), entry) for i in range(1, len(words)))
+    return IngredientIndex(
+        names, np.array(counts, dtype=np.int64), details,
+        name_pairs, word_pairs,
+    )
@@ -0,0 +1,97 @@
+from collections import deque
+
+# ================================================================
+# 🔎 Multi-pattern Ingredient Matcher (Aho-Corasick)
+# ================================================================
+# Finds every pattern occurring in a text in a single left-to-right
+# pass, instead of testing `pattern in text` once per pattern.
+
+
+class AhoCorasick:
+    """
+    Substring matcher over a fixed set of lowercase patterns.
+    `find_all(text)` returns the same patterns as
+    `[p for p in patterns if p in text]`, ordered by first occurrence.
+    With `whole_words`, an occurrence only counts when it isn't glued to a
+    letter, digit or underscore on either side (a regex word boundary), so
+    "sulfur" doesn't match "sulfurized".
+    """
+
+    def __init__(self, patterns, whole_words=False):
+        self.whole_words = whole_words
+        self.patterns = []
+        self._goto = [{}]
+        self._fail = [0]
+        self._out = [[]]
+        self._always = []
+
+        for p in dict.fromkeys(patterns):
+            if not isinstance(p, str):
+                continue
+            self.patterns.append(p)
+            if p == "":
+                # the empty string is a substring of everything
+                self._always.append(p)
+                continue
+            node = 0
+            for ch in p:
+                nxt = self._goto[node].get(ch)
+                if nxt is None:
+                    nxt = len(self._goto)
+                    self._goto[node][ch] = nxt
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._out.append([])
+                node = nxt
+            self._out[node].append(p)
+
+        self._build_failure_links()
+
+    def _build_failure_links(self):
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for ch, nxt in self._goto[node].items():
+                queue.append(nxt)
+                f = self._fail[node]
+                while f and ch not in self._goto[f]:
+                    f = self._fail[f]
+                target = self._goto[f].get(ch, 0)
+                self._fail[nxt] = target if target != nxt else 0
+                self._out[nxt] = self._out[nxt] + self._out[self._fail[nxt]]
+
+    def find_all(self, text: str):
+        found = dict.fromkeys(self._always)
+        if len(self._goto) == 1:
+            return list(found)
+        goto, fail, out = self._goto, self._fail, self._out
+        node = 0
+        for i, ch in enumerate(text):
+            while node and ch not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(ch, 0)
+            if out[node]:
+                for p in out[node]:
+                    if not self.whole_words or _at_word_boundaries(text, i - len(p) + 1, i + 1):
+                        found.setdefault(p)
+        return list(found)
+
+
+def _is_word_char(ch):
+    return ch.isalnum() or ch == "_"
+
+
+def _at_word_boundaries(text, start, stop):
+    """True if text[start:stop] has no word character right before or after it."""
+    return ((start == 0 or not _is_word_char(text[start - 1]))
+            and (stop == len(text) or not _is_word_char(text[stop])))
+
+
+def pregnancy_unsafe_ingredients(ingredients_df):
+    """Lowercased names of ingredients whose `who_should_avoid` mentions pregnancy."""
+    if ingredients_df is None:
+        return []
+    unsafe = ingredients_df[
+        ingredients_df["who_should_avoid"].str.contains("Pregnancy", case=False, na=False)
+    ]["name"].dropna().str.lower()
+    return unsafe.tolist()
@@ -0,0 +1,263 @@
+import bisect
+import functools
+import os
+import threading
+import time
+from contextlib import nullcontext
+from contextvars import ContextVar
+
+# ================================================================
+# ⏱️ Metrics – per-stage timings, Server-Timing header, /metrics
+# ================================================================
+# `with stage("transform"): ...` times one step of a request. The
+# duration goes into a histogram (always) and into the current request's
+# Server-Timing header (when the request came through MetricsMiddleware).
+# Recording is a perf_counter() pair, a bisect and a short locked update,
+# so it can stay on in production.
+#
+# Counts are per process: with several uvicorn workers, each worker
+# serves its own /metrics.
+#
+# METRICS_ENABLED=0 turns every hook into a no-op and disables /metrics;
+# SERVER_TIMING=0 keeps the metrics but stops sending the header.
+
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "1").lower() in ("1", "true", "yes")
+SERVER_TIMING = os.getenv("SERVER_TIMING", "1").lower() in ("1", "true", "yes")
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+STAGE_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+REQUEST_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _labels(names, values):
+    if not names:
+        return ""
+    pairs = ",".join(f'{n}="{_escape(v)}"' for n, v in zip(names, values))
+    return "{" + pairs + "}"
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+class Counter:
+    """Monotonic counter, one value per label combination."""
+
+    def __init__(self, name, help, labels=()):
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *label_values, amount=1):
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0) + amount
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for values, total in sorted(self._values.items()):
+                lines.append(f"{self.name}{_labels(self.labels, values)} {total}")
+        return lines
+
+
+class Histogram:
+    """Prometheus-style histogram with fixed buckets, one series per label value."""
+
+    def __init__(self, name, help, label, buckets):
+        self.name = name
+        self.help = help
+        self.label = label
+        self.buckets = buckets
+        self._series = {}  # label value -> [bucket counts..., +Inf count, sum]
+        self._lock = threading.Lock()
+
+    def observe(self, label_value, seconds):
+        i = bisect.bisect_left(self.buckets, seconds)
+        with self._lock:
+            series = self._series.get(label_value)
+            if series is None:
+                series = self._series[label_value] = [0] * (len(self.buckets) + 1) + [0.0]
+            series[i] += 1
+            series[-1] += seconds
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            snapshot = {k: list(v) for k, v in self._series.items()}
+        for value, series in sorted(snapshot.items()):
+            cumulative = 0
+            for bound, count in zip((*self.buckets, "+Inf"), series):
+                cumulative += count
+                labels = _labels((self.label, "le"), (value, bound))
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = _labels((self.label,), (value,))
+            lines.append(f"{self.name}_sum{labels} {series[-1]:.6f}")
+            lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+STAGE_SECONDS = Histogram(
+    "veibelle_stage_seconds", "Time spent in one stage of a request.", "stage", STAGE_BUCKETS,
+)
+REQUEST_SECONDS = Histogram(
+    "veibelle_request_seconds", "Request latency until the response headers are sent.", "route",
+    REQUEST_BUCKETS,
+)
+REQUESTS = Counter("veibelle_requests_total", "HTTP requests served.", ("route", "method", "status"))
+ERRORS = Counter(
+    "veibelle_errors_total",
+    "Requests that failed, including errors an endpoint caught and reported in its body.",
+    ("route",),
+)
+
+
+# ================================================================
+# 🧭 Stage hooks
+# ================================================================
+class RequestTimings:
+    __slots__ = ("stages", "handler_end")
+
+    def __init__(self):
+        self.stages = {}
+        self.handler_end = None
+
+
+_current = ContextVar("request_timings", default=None)
+
+
+class _Stage:
+    __slots__ = ("name", "start")
+
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        elapsed = time.perf_counter() - self.start
+        STAGE_SECONDS.observe(self.name, elapsed)
+        timings = _current.get()
+        if timings is not None:
+            timings.stages[self.name] = timings.stages.get(self.name, 0.0) + elapsed
+        return False
+
+
+_NOOP = nullcontext()
+
+
+def stage(name):
+    """Context manager timing one named stage of the current request."""
+    return _Stage(name) if METRICS_ENABLED else _NOOP
+
+
+def count_error(route):
+    """For endpoints that catch their own errors and still answer 200."""
+    if METRICS_ENABLED:
+        ERRORS.inc(route)
+
+
+def timed_handler(fn):
+    """
+    Marks when a (sync) endpoint returned, so the middleware can report the
+    time FastAPI then spends validating and serializing the response.
+    """
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            timings = _current.get()
+            if timings is not None:
+                timings.handler_end = time.perf_counter()
+
+    return wrapper
+
+
+def server_timing_header(timings, total):
+    parts = [f"{name};dur={seconds * 1000:.3f}" for name, seconds in timings.stages.items()]
+    parts.append(f"total;dur={total * 1000:.3f}")
+    return ", ".join(parts)
+
+
+# ================================================================
+# 🧩 ASGI middleware
+# ================================================================
+class MetricsMiddleware:
+    """Counts and times every HTTP request and adds the Server-Timing header."""
+
+    def __init__(self, app, fastapi_app):
+        self.app = app
+        self.fastapi_app = fastapi_app
+        self._routes = None
+
+    def route_of(self, scope):
+        # label by route template, never the raw path, to keep series bounded
+        if self._routes is None:
+            self._routes = {
+                getattr(r, "endpoint", None): r.path for r in self.fastapi_app.routes
+            }
+        return self._routes.get(scope.get("endpoint"), "unmatched")
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        timings = RequestTimings()
+        token = _current.set(timings)
+        start = time.perf_counter()
+        status = 500
+        elapsed = None
+
+        async def send_with_timing(message):
+            nonlocal status, elapsed
+            if message["type"] == "http.response.start":
+                now = time.perf_counter()
+                status = message["status"]
+                elapsed = now - start
+                if timings.handler_end is not None:
+                    serialize = now - timings.handler_end
+                    timings.stages["serialize"] = serialize
+                    STAGE_SECONDS.observe("serialize", serialize)
+                if SERVER_TIMING:
+                    header = server_timing_header(timings, elapsed).encode("latin-1")
+                    message = {**message, "headers": [*message.get("headers", ()), (b"server-timing", header)]}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _current.reset(token)
+            route = self.route_of(scope)
+            if elapsed is None:
+                elapsed = time.perf_counter() - start
+            REQUESTS.inc(route, scope["method"], str(status))
+            REQUEST_SECONDS.observe(route, elapsed)
+            if status >= 500:
+                ERRORS.inc(route)
+
+
+# ================================================================
+# 📄 Prometheus text
+# ================================================================
+def gauge(name, help, value, labels=None, kind="gauge"):
+    """One sample read from elsewhere (cache, pool, catalog) at scrape time."""
+    labels = labels or {}
+    return [
+        f"# HELP {name} {help}",
+        f"# TYPE {name} {kind}",
+        f"{name}{_labels(tuple(labels), tuple(labels.values()))} {value}",
+    ]
+
+
+def render(extra_lines=()):
+    lines = []
+    for metric in (REQUESTS, ERRORS, REQUEST_SECONDS, STAGE_SECONDS):
+        lines.extend(metric.render())
+    lines.extend(extra_lines)
+    return "\n".join(lines) + "\n"
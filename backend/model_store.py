@@ -0,0 +1,480 @@
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import time
+from datetime import datetime, timezone
+
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+import sklearn
+from sklearn.feature_extraction import text
+from sklearn.feature_extraction.text import TfidfVectorizer
+
+from columnar import file_sha256, read_table
+from filter_index import SKIN_TYPE_COLUMNS
+from product_edits import ProductEdits, apply_edits, edits_path
+from product_table import build_product_table, load_product_table, save_product_table
+from ingredient_matcher import AhoCorasick, pregnancy_unsafe_ingredients
+from similar_index import DEFAULT_K, build_knn
+
+# ================================================================
+# 🏗️ Model Store – build, persist and load the TF-IDF model
+# ================================================================
+# `python model_store.py build` fits the model offline and writes a
+# versioned artifact directory:
+#
+#   artifacts/<version> -> <version>.<build>/
+#       manifest.json        input CSV hashes, params, shapes
+#       vocabulary.json      term -> column
+#       idf.npy              fitted IDF weights
+#       full_tfidf.*.npy     product × term matrix (CSR data / indices / indptr)
+#       similar.*.npy        top-k product neighbour graph (CSR, float32)
+#       products_*           array-backed product table (see product_table.py)
+#       *.pkl                product / ingredient / relation frames
+#
+# The API loads the artifact whose manifest matches the current input
+# files and only fits from scratch when there is none.
+#
+# The neighbour graph is the expensive part of a build (a product against
+# every other product), so only the offline build computes it. A model
+# fitted in-process (no matching artifact, or a refit folding in product
+# edits) carries an empty graph and /products/{id}/similar scores those
+# neighbours on request until the next artifact is built.
+#
+# A rebuild never touches a build directory that workers may have mapped:
+# it writes a fresh <version>.<build>/ and atomically repoints the
+# <version> symlink at it. Loaders resolve the link once, so a worker
+# reads every file from the same build; older builds are pruned, which
+# leaves already-mapped pages valid until the workers drop them.
+#
+# Admin product edits (processed/product_edits.jsonl, see product_edits.py)
+# are applied on top of the CSVs before fitting, and the manifest records
+# which prefix of the edit log the artifact includes. An artifact that is
+# behind the log is still loaded; the API serves newer edits from a delta.
+#
+# Product centrality scores (processed/product_centrality.csv, written by
+# the offline job in recommender.py) are optional: when present they are
+# attached to the product table and break ties between equally similar
+# products.
+#
+# The matrices, IDF weights and product table are plain .npy files
+# opened with np.load(mmap_mode="r") (MODEL_MMAP=0 to disable), so every
+# worker on a host maps the same read-only page-cache pages instead of
+# holding a private copy.
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+PROCESSED = os.getenv("PROCESSED_DIR", os.path.join(BASE_DIR, "processed"))
+ARTIFACTS_DIR = os.getenv("MODEL_ARTIFACTS_DIR", os.path.join(BASE_DIR, "artifacts"))
+
+# Bump when the artifact layout or the way the model is built changes.
+ARTIFACT_FORMAT = 9
+
+# Memory-map artifact arrays read-only instead of copying them into each process.
+MODEL_MMAP = os.getenv("MODEL_MMAP", "1").lower() in ("1", "true", "yes")
+
+# Neighbours kept per product in the "similar products" graph.
+SIMILAR_K = int(os.getenv("SIMILAR_K", str(DEFAULT_K)))
+
+DATASET_PATHS = {
+    "products": os.path.join(PROCESSED, "products_clean.csv"),
+    "ingredients": os.path.join(PROCESSED, "ingredients_cleaned_preprocessed.csv"),
+    "product_ingredients": os.path.join(PROCESSED, "product_ingredients.csv"),
+    "product_allergens": os.path.join(PROCESSED, "product_allergens.csv"),
+    "centrality": os.path.join(PROCESSED, "product_centrality.csv"),
+}
+
+# Inputs the model is built without when their file doesn't exist yet.
+OPTIONAL_DATASETS = ("centrality",)
+
+# ================================================================
+# 🧠 Improved TF-IDF Training (Model C)
+# ================================================================
+# Category synonyms to strengthen semantic signal
+CATEGORY_SYNONYMS = {
+    "cleanser": ["cleanser", "face wash", "foam cleanser", "gel cleanser"],
+    "toner": ["toner", "lotion", "skin softener"],
+    "serum": ["serum", "ampoule", "essence serum"],
+    "essence": ["essence", "treatment essence", "treatment lotion"],
+    "moisturizer": ["moisturizer", "cream", "gel cream", "lotion"],
+    "sunscreen": ["sunscreen", "sunblock", "uv protection", "spf"],
+}
+
+def expand_category_words(label: str) -> str:
+    if not label:
+        return ""
+    label_lower = label.lower()
+    base = [label_lower]
+    extra = []
+    for key, syns in CATEGORY_SYNONYMS.items():
+        if key in label_lower:
+            extra.extend(syns)
+    return " ".join(base + extra)
+
+# Domain-specific stopwords (extra noise words in skincare ingredients)
+domain_stopwords = {
+    "extract", "leaf", "root", "flower", "oil", "water",
+    "juice", "powder", "seed", "kernel", "fruit",
+}
+
+MY_STOP_WORDS = sorted(text.ENGLISH_STOP_WORDS.union(domain_stopwords))
+
+VECTORIZER_PARAMS = dict(
+    stop_words=MY_STOP_WORDS,
+    ngram_range=(1, 2),
+    min_df=2,
+    max_df=0.85,
+    sublinear_tf=True,
+    norm="l2",
+    lowercase=True,
+    smooth_idf=True,
+)
+
+
+def build_search_text(row):
+    ingredients = str(row.get("ingredients", "")).lower()
+    label = str(row.get("Label", "")).lower()
+    brand = str(row.get("brand", "")).lower()
+    name = str(row.get("name", "")).lower()
+
+    # clean label like "Serum/Essence"
+    category_clean = (
+        label.replace("/", " ")
+             .replace("-", " ")
+             .replace(",", " ")
+    )
+    category_expanded = expand_category_words(label)
+
+    parts = [
+        (ingredients + " ") * 2,        # ingredients, medium weight
+        (category_clean + " ") * 4,     # category words, strong weight
+        (category_expanded + " ") * 4,  # synonyms, strong weight
+        (label + " ") * 4,              # raw label repeated
+        brand,
+        name,
+    ]
+    return " ".join(parts)
+
+
+class Model:
+    """Everything the recommender needs from one load of the datasets."""
+
+    def __init__(self, products_df, ingredients_df, product_ing, product_allergens,
+                 vectorizer, full_tfidf, similar, products_table, version, source, edits=None):
+        self.products_df = products_df
+        self.ingredients_df = ingredients_df
+        self.product_ing = product_ing
+        self.product_allergens = product_allergens
+        self.vectorizer = vectorizer
+        self.full_tfidf = full_tfidf
+        self.similar = similar
+        self.products_table = products_table
+        self.version = version
+        self.source = source  # "artifact" or "fitted"
+        # product edit log prefix applied before fitting: {"seq", "bytes", "sha256"}
+        self.edits = edits or {"seq": 0, "bytes": 0, "sha256": None}
+        self.edits_seq = self.edits["seq"]
+
+
+# ================================================================
+# 🔨 Fitting
+# ================================================================
+# Only the columns the API uses are loaded (None = all columns).
+DATASET_COLUMNS = {
+    "products": ["Label", "brand", "name", "price", "rank", "ingredients", *SKIN_TYPE_COLUMNS],
+    "ingredients": ["name", "scientific_name", "short_description", "what_is_it", "what_does_it_do",
+                    "who_is_it_good_for", "who_should_avoid", "url"],
+    "product_ingredients": None,
+    "product_allergens": None,
+    "centrality": ["product_id", "centrality"],
+}
+
+
+def read_products(path, columns=None, source_hash=None):
+    """
+    products_clean.csv has no id column: a product's id is its 1-based row
+    number, which is what product_ingredients / product_allergens refer to.
+    """
+    products = read_table(path, columns, source_hash)
+    products.index = pd.RangeIndex(1, len(products) + 1, name="product_id")
+    return products
+
+
+def read_datasets(paths=DATASET_PATHS, hashes=None):
+    """Load the processed datasets; `hashes` are their already computed sha256s."""
+    hashes = hashes or {}
+    datasets = {
+        name: read_table(path, DATASET_COLUMNS.get(name), hashes.get(name))
+        for name, path in paths.items()
+        if name != "products" and (name not in OPTIONAL_DATASETS or os.path.exists(path))
+    }
+    datasets["products"] = read_products(
+        paths["products"], DATASET_COLUMNS["products"], hashes.get("products")
+    )
+    return datasets
+
+
+def add_pregnancy_flags(products_df, ingredients_df, matcher=None):
+    """
+    Pregnancy-unsafe ingredients never change between dataset loads, so
+    each product is matched against them once here.
+    """
+    matcher = matcher or AhoCorasick(pregnancy_unsafe_ingredients(ingredients_df))
+    products_df["pregnancy_unsafe_ingredients"] = [
+        matcher.find_all(x)
+        for x in products_df["ingredients"].fillna("").astype(str).str.lower()
+    ]
+    products_df["pregnancy_unsafe"] = products_df["pregnancy_unsafe_ingredients"].str.len() > 0
+
+
+def fit_model(datasets, version=None, edits=None) -> Model:
+    products_df = datasets["products"]
+    for col in ["ingredients", "Label", "brand", "name"]:
+        if col not in products_df.columns:
+            products_df[col] = ""
+
+    search_text = products_df.apply(build_search_text, axis=1)
+    vectorizer = TfidfVectorizer(**VECTORIZER_PARAMS)
+    full_tfidf = vectorizer.fit_transform(search_text.fillna("")).tocsr()
+
+    add_pregnancy_flags(products_df, datasets["ingredients"])
+    centrality = datasets.get("centrality")
+    if centrality is not None:
+        scores = centrality.set_index("product_id")["centrality"]
+        products_df["centrality"] = scores.reindex(products_df.index).astype(np.float32).fillna(0)
+    # no precomputed neighbours yet; build() adds them before saving
+    similar = sp.csr_matrix((0, full_tfidf.shape[0]), dtype=np.float32)
+
+    return Model(
+        products_df,
+        datasets["ingredients"],
+        datasets["product_ingredients"],
+        datasets["product_allergens"],
+        vectorizer,
+        full_tfidf,
+        similar,
+        build_product_table(products_df),
+        version,
+        "fitted",
+        edits,
+    )
+
+
+# ================================================================
+# 🔖 Versioning
+# ================================================================
+def input_hashes(paths=DATASET_PATHS):
+    return {
+        name: file_sha256(path) for name, path in paths.items()
+        if name not in OPTIONAL_DATASETS or os.path.exists(path)
+    }
+
+
+def artifact_version(hashes):
+    """Artifact id derived from the build format, params and input contents."""
+    h = hashlib.sha256()
+    h.update(f"format={ARTIFACT_FORMAT};sklearn={sklearn.__version__};k={SIMILAR_K};".encode())
+    h.update(json.dumps({k: v for k, v in VECTORIZER_PARAMS.items() if k != "stop_words"},
+                        sort_keys=True, default=str).encode())
+    h.update(",".join(MY_STOP_WORDS).encode())
+    for name in sorted(hashes):
+        h.update(f"{name}={hashes[name]};".encode())
+    return h.hexdigest()[:16]
+
+
+# ================================================================
+# 💾 Save / Load
+# ================================================================
+FRAME_FILES = {
+    "products_df": "products.pkl",
+    "ingredients_df": "ingredients.pkl",
+    "product_ing": "product_ingredients.pkl",
+    "product_allergens": "product_allergens.pkl",
+}
+
+
+# builds of one version kept on disk, the live one included
+KEEP_BUILDS = int(os.getenv("MODEL_ARTIFACTS_KEEP", "2"))
+
+
+def save_artifact(model: Model, hashes, artifacts_dir=ARTIFACTS_DIR):
+    """
+    Write the artifact to a new build dir, then switch the <version>
+    symlink to it; see the module comment.
+    """
+    out_dir = os.path.join(artifacts_dir, model.version)
+    build_name = f"{model.version}.{time.time_ns():x}{os.getpid():x}"
+    tmp_dir = os.path.join(artifacts_dir, build_name + ".tmp")
+    os.makedirs(tmp_dir)
+
+    vocabulary = {term: int(i) for term, i in model.vectorizer.vocabulary_.items()}
+    with open(os.path.join(tmp_dir, "vocabulary.json"), "w", encoding="utf-8") as f:
+        json.dump(vocabulary, f, ensure_ascii=False)
+    np.save(os.path.join(tmp_dir, "idf.npy"), model.vectorizer.idf_)
+    save_csr(tmp_dir, "full_tfidf", model.full_tfidf)
+    save_csr(tmp_dir, "similar", model.similar)
+    save_product_table(model.products_table, tmp_dir)
+    for attr, filename in FRAME_FILES.items():
+        getattr(model, attr).to_pickle(os.path.join(tmp_dir, filename))
+
+    manifest = {
+        "version": model.version,
+        "format": ARTIFACT_FORMAT,
+        "built_at": datetime.now(timezone.utc).isoformat(),
+        "sklearn_version": sklearn.__version__,
+        "inputs": hashes,
+        "n_products": int(model.full_tfidf.shape[0]),
+        "n_features": int(model.full_tfidf.shape[1]),
+        "similar_k": SIMILAR_K,
+        "edits": model.edits,
+        "shapes": {
+            "full_tfidf": list(model.full_tfidf.shape),
+            "similar": list(model.similar.shape),
+        },
+    }
+    with open(os.path.join(tmp_dir, "manifest.json"), "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+
+    build_dir = os.path.join(artifacts_dir, build_name)
+    os.replace(tmp_dir, build_dir)
+    switch_build(out_dir, build_name)
+    prune_builds(artifacts_dir, model.version)
+    return out_dir
+
+
+def switch_build(out_dir, build_name):
+    """Atomically point the `out_dir` symlink at `build_name` (a sibling dir)."""
+    if os.path.isdir(out_dir) and not os.path.islink(out_dir):
+        # artifact written before builds were versioned: keep it as a build
+        os.replace(out_dir, f"{out_dir}.0")
+    link_tmp = f"{out_dir}.{build_name}.link"
+    os.symlink(build_name, link_tmp)
+    os.replace(link_tmp, out_dir)
+
+
+def prune_builds(artifacts_dir, version, keep=None):
+    """Remove all but the newest `keep` builds of `version`, never the live one."""
+    keep = KEEP_BUILDS if keep is None else keep
+    live = os.path.basename(os.path.realpath(os.path.join(artifacts_dir, version)))
+    builds = sorted(
+        (e for e in os.scandir(artifacts_dir)
+         if e.name.startswith(version + ".") and not e.name.endswith(".tmp")
+         and e.is_dir(follow_symlinks=False)),
+        key=lambda e: e.stat(follow_symlinks=False).st_mtime_ns, reverse=True,
+    )
+    for e in builds[max(keep, 1):]:
+        if e.name != live:
+            shutil.rmtree(e.path, ignore_errors=True)
+
+
+CSR_PARTS = ("data", "indices", "indptr")
+
+
+def save_csr(out_dir, name, matrix):
+    """One .npy per CSR array, so each can be memory-mapped on load."""
+    matrix = matrix.tocsr()
+    for part in CSR_PARTS:
+        np.save(os.path.join(out_dir, f"{name}.{part}.npy"), getattr(matrix, part))
+
+
+def load_csr(artifact_dir, name, shape, mmap_mode="r"):
+    data, indices, indptr = (
+        np.load(os.path.join(artifact_dir, f"{name}.{part}.npy"), mmap_mode=mmap_mode)
+        for part in CSR_PARTS
+    )
+    return sp.csr_matrix((data, indices, indptr), shape=tuple(shape), copy=False)
+
+
+def read_manifest(artifact_dir):
+    path = os.path.join(artifact_dir, "manifest.json")
+    if not os.path.exists(path):
+        return None
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def load_artifact(artifact_dir, mmap=MODEL_MMAP) -> Model:
+    artifact_dir = os.path.realpath(artifact_dir)  # one build, even if relinked mid-load
+    manifest = read_manifest(artifact_dir)
+    mmap_mode = "r" if mmap else None
+
+    with open(os.path.join(artifact_dir, "vocabulary.json"), encoding="utf-8") as f:
+        vocabulary = json.load(f)
+    params = dict(VECTORIZER_PARAMS, vocabulary=vocabulary)
+    vectorizer = TfidfVectorizer(**params)
+    vectorizer.idf_ = np.load(os.path.join(artifact_dir, "idf.npy"), mmap_mode=mmap_mode)
+
+    shapes = manifest["shapes"]
+    full_tfidf = load_csr(artifact_dir, "full_tfidf", shapes["full_tfidf"], mmap_mode)
+    similar = load_csr(artifact_dir, "similar", shapes["similar"], mmap_mode)
+    products_table = load_product_table(artifact_dir, mmap_mode)
+    frames = {
+        attr: pd.read_pickle(os.path.join(artifact_dir, filename))
+        for attr, filename in FRAME_FILES.items()
+    }
+    return Model(vectorizer=vectorizer, full_tfidf=full_tfidf, similar=similar,
+                 products_table=products_table, version=manifest["version"],
+                 source="artifact", edits=manifest.get("edits"), **frames)
+
+
+def load_model(paths=DATASET_PATHS, artifacts_dir=ARTIFACTS_DIR) -> Model:
+    """
+    Load the artifact built from the current input files, or fit the model
+    in-process when no matching artifact exists.
+    """
+    hashes = input_hashes(paths)
+    version = artifact_version(hashes)
+    artifact_dir = os.path.join(artifacts_dir, version)
+    edits = ProductEdits.load(edits_path(paths))
+
+    manifest = read_manifest(artifact_dir)
+    if (manifest and manifest.get("inputs") == hashes
+            and edits.includes(manifest.get("edits"), edits_path(paths))):
+        try:
+            return load_artifact(artifact_dir)
+        except Exception as e:
+            print(f"⚠️ Artifact {version} is unreadable, refitting: {e}")
+    else:
+        print(f"⚠️ No model artifact matches the current datasets ({version}), fitting in-process.")
+
+    datasets = apply_edits(read_datasets(paths, hashes), edits, paths)
+    return fit_model(datasets, version=version, edits=edits.digest)
+
+
+def build(paths=DATASET_PATHS, artifacts_dir=ARTIFACTS_DIR, force=False):
+    hashes = input_hashes(paths)
+    version = artifact_version(hashes)
+    artifact_dir = os.path.join(artifacts_dir, version)
+    edits = ProductEdits.load(edits_path(paths))
+    manifest = read_manifest(artifact_dir) or {}
+    if not force and manifest.get("inputs") == hashes and manifest.get("edits") == edits.digest:
+        print(f"✅ Artifact {version} is up to date: {artifact_dir}")
+        return artifact_dir
+
+    start = time.perf_counter()
+    datasets = apply_edits(read_datasets(paths, hashes), edits, paths)
+    model = fit_model(datasets, version=version, edits=edits.digest)
+    knn_start = time.perf_counter()
+    model.similar = build_knn(model.full_tfidf, k=SIMILAR_K)
+    print(f"🧬 Similar-products graph: {model.similar.nnz} edges in {time.perf_counter() - knn_start:.2f}s")
+    out_dir = save_artifact(model, hashes, artifacts_dir)
+    print(f"✅ Built model artifact {version} in {time.perf_counter() - start:.2f}s: {out_dir}")
+    return out_dir
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the recommender model artifact.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    build_cmd = sub.add_parser("build", help="fit the model and write an artifact directory")
+    build_cmd.add_argument("--out", default=ARTIFACTS_DIR, help="artifacts root directory")
+    build_cmd.add_argument("--force", action="store_true", help="rebuild even if up to date")
+    args = parser.parse_args()
+
+    if args.command == "build":
+        build(artifacts_dir=args.out, force=args.force)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,485 @@
+import argparse
+import json
+import os
+import time
+from datetime import datetime, timezone
+
+import numpy as np
+import pandas as pd
+
+from clean_ingredients import clean_ingredients_frame
+from data_preprocessing import clean_allergens, clean_products
+from columnar import file_sha256, parquet_is_current, write_parquet
+
+# ================================================================
+# 🔁 Data Preparation Pipeline
+# ================================================================
+# One command for the whole raw -> processed -> model chain:
+#
+#   python pipeline.py [--force] [--only STAGE ...] [--chunksize N]
+#
+#   products            data/cosmetic_p.csv        -> processed/products_clean.csv
+#   allergens           data/allergen_dataset.csv  -> processed/allergens_clean.csv
+#   ingredients         data/ingredients_clean.csv -> processed/ingredients_cleaned_preprocessed.csv
+#   product_ingredients products_clean + ingredients -> processed/product_ingredients.csv
+#   product_allergens   products_clean + allergens   -> processed/product_allergens.csv
+#   centrality          products_clean               -> processed/product_centrality.csv
+#   model               processed/*                  -> artifacts/<version>/
+#
+# Every stage streams its inputs with read_csv(chunksize=...), so memory
+# stays flat however large the supplier dump is. processed/pipeline_manifest.json
+# records the sha256 of each stage's inputs and outputs; a stage whose
+# inputs and outputs are unchanged is skipped.
+#
+# Row-level stages also keep a hash per row (processed/.pipeline/*.npy).
+# When only some products changed, only those rows are re-cleaned and
+# only their relation rows are regenerated; everything else is copied
+# from the previous output.
+#
+# Each processed CSV also gets a Parquet copy with compact dtypes (see
+# columnar.py) when pyarrow is installed.
+#
+# A product's id is its 1-based row number in products_clean.csv.
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+DATA_DIR = os.path.join(BASE_DIR, "data")
+PROCESSED = os.path.join(BASE_DIR, "processed")
+STATE_DIR = os.path.join(PROCESSED, ".pipeline")
+MANIFEST_PATH = os.path.join(PROCESSED, "pipeline_manifest.json")
+
+CHUNK_SIZE = int(os.getenv("PIPELINE_CHUNK_SIZE", "50000"))
+
+# Bump when a stage's output format changes so every stage reruns once.
+PIPELINE_VERSION = 1
+
+PATHS = {
+    "raw_products": os.path.join(DATA_DIR, "cosmetic_p.csv"),
+    "raw_allergens": os.path.join(DATA_DIR, "allergen_dataset.csv"),
+    "raw_ingredients": os.path.join(DATA_DIR, "ingredients_clean.csv"),
+    "products": os.path.join(PROCESSED, "products_clean.csv"),
+    "allergens": os.path.join(PROCESSED, "allergens_clean.csv"),
+    "ingredients": os.path.join(PROCESSED, "ingredients_cleaned_preprocessed.csv"),
+    "product_ingredients": os.path.join(PROCESSED, "product_ingredients.csv"),
+    "product_allergens": os.path.join(PROCESSED, "product_allergens.csv"),
+    "centrality": os.path.join(PROCESSED, "product_centrality.csv"),
+}
+
+
+# ================================================================
+# 🧰 Helpers
+# ================================================================
+def read_chunks(path, chunksize, **kwargs):
+    """Stream a CSV as text so row hashes don't depend on per-chunk dtype guessing."""
+    return pd.read_csv(path, chunksize=chunksize, dtype=str, keep_default_na=False,
+                       encoding="utf-8-sig", **kwargs)
+
+
+def row_hashes(frame) -> np.ndarray:
+    return pd.util.hash_pandas_object(frame, index=False).to_numpy(dtype=np.uint64)
+
+
+def state_path(name):
+    return os.path.join(STATE_DIR, f"{name}_rows.npy")
+
+
+def load_row_state(name):
+    path = state_path(name)
+    return np.load(path) if os.path.exists(path) else None
+
+
+def save_row_state(name, hashes):
+    os.makedirs(STATE_DIR, exist_ok=True)
+    tmp = state_path(name) + ".tmp"
+    with open(tmp, "wb") as f:
+        np.save(f, hashes)
+    os.replace(tmp, state_path(name))
+
+
+class CsvSink:
+    """Write chunks to <path>.tmp and rename over <path> on commit."""
+
+    def __init__(self, path):
+        self.path = path
+        self.tmp = path + ".tmp"
+        self.rows = 0
+        self._header = True
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        open(self.tmp, "w").close()
+
+    def write(self, frame):
+        if frame.empty and not self._header:
+            return
+        frame.to_csv(self.tmp, mode="a", header=self._header, index=False)
+        self._header = False
+        self.rows += len(frame)
+
+    def commit(self):
+        os.replace(self.tmp, self.path)
+
+    def abort(self):
+        if os.path.exists(self.tmp):
+            os.remove(self.tmp)
+
+
+def changed_rows(hashes, previous, start):
+    """Boolean mask of rows whose hash differs from the previous run."""
+    if previous is None:
+        return np.ones(len(hashes), dtype=bool)
+    old = previous[start:start + len(hashes)]
+    changed = np.ones(len(hashes), dtype=bool)
+    changed[:len(old)] = hashes[:len(old)] != old
+    return changed
+
+
+# ================================================================
+# 🧼 Cleaning stages
+# ================================================================
+def run_products(ctx):
+    """
+    Clean products chunk by chunk. Rows whose raw hash is unchanged are
+    copied from the previous products_clean.csv instead of re-cleaned.
+    """
+    previous = None if ctx.full else load_row_state("products")
+    old_chunks = None
+    if previous is not None:
+        old_chunks = read_chunks(PATHS["products"], ctx.chunksize)
+
+    sink = CsvSink(PATHS["products"])
+    hashes, n_changed = [], 0
+    try:
+        start = 0
+        for raw in read_chunks(PATHS["raw_products"], ctx.chunksize):
+            raw.columns = raw.columns.str.strip()
+            h = row_hashes(raw)
+            changed = changed_rows(h, previous, start)
+            old = next(old_chunks, None) if old_chunks is not None else None
+
+            if old is None or len(old) < len(raw) or list(old.columns) != list(raw.columns):
+                # nothing (or not enough) to reuse for this chunk
+                changed[:] = True
+                out = clean_products(raw.replace("", np.nan))
+            else:
+                out = old.iloc[:len(raw)].copy()
+                if changed.any():
+                    fresh = clean_products(raw[changed].replace("", np.nan))
+                    out = out.astype(object)
+                    out.loc[changed] = fresh.astype(object).to_numpy()
+
+            sink.write(out)
+            hashes.append(h)
+            n_changed += int(changed.sum())
+            start += len(raw)
+    except Exception:
+        sink.abort()
+        raise
+    if old_chunks is not None:
+        old_chunks.close()
+    sink.commit()
+
+    hashes = np.concatenate(hashes) if hashes else np.empty(0, dtype=np.uint64)
+    removed = max(len(previous) - len(hashes), 0) if previous is not None else 0
+    save_row_state("products", hashes)
+    return {"rows": sink.rows, "rows_rebuilt": n_changed, "rows_removed": removed}
+
+
+def run_allergens(ctx):
+    sink = CsvSink(PATHS["allergens"])
+    for chunk in pd.read_csv(PATHS["raw_allergens"], chunksize=ctx.chunksize):
+        sink.write(clean_allergens(chunk))
+    sink.commit()
+    return {"rows": sink.rows}
+
+
+def run_ingredients(ctx):
+    """Clean ingredients chunk by chunk, keeping the first row per name."""
+    sink = CsvSink(PATHS["ingredients"])
+    seen = set()
+    for chunk in pd.read_csv(PATHS["raw_ingredients"], chunksize=ctx.chunksize):
+        chunk = clean_ingredients_frame(chunk)
+        if "name" in chunk.columns:
+            chunk = chunk.drop_duplicates(subset=["name"])
+            chunk = chunk[~chunk["name"].isin(seen)]
+            seen.update(chunk["name"])
+        sink.write(chunk)
+    sink.commit()
+    return {"rows": sink.rows}
+
+
+# ================================================================
+# 🔗 Relation stages
+# ================================================================
+def load_vocabulary(path, column, chunksize):
+    vocabulary = set()
+    for chunk in read_chunks(path, chunksize, usecols=[column]):
+        vocabulary.update(chunk[column].str.lower())
+    vocabulary.discard("")
+    return vocabulary
+
+
+def product_relations(ingredients, vocabulary):
+    """(position, name) for every comma-separated token found in `vocabulary`."""
+    positions, names = [], []
+    for pos, text in enumerate(ingredients):
+        for token in text.lower().split(","):
+            token = token.strip()
+            if token in vocabulary:
+                positions.append(pos)
+                names.append(token)
+    return positions, names
+
+
+def merge_relations(old_chunks, fresh, drop_ids, sink):
+    """
+    Stream the previous relation file, dropping rows of `drop_ids` and
+    splicing in `fresh` (sorted by product_id) so the output stays ordered.
+    """
+    pos = 0
+    fresh_ids = fresh["product_id"].to_numpy()
+    for old in old_chunks:
+        old["product_id"] = old["product_id"].astype(np.int64)
+        old = old[~old["product_id"].isin(drop_ids)]
+        if old.empty:
+            continue
+        upto = int(np.searchsorted(fresh_ids, old["product_id"].iloc[-1], side="right"))
+        window = pd.concat([old, fresh.iloc[pos:upto]], ignore_index=True)
+        sink.write(window.sort_values("product_id", kind="stable"))
+        pos = upto
+    sink.write(fresh.iloc[pos:])
+
+
+def relation_stage(name, vocabulary_key, vocabulary_column, name_column):
+    """
+    Build products × vocabulary relation rows. Only products whose
+    ingredient text changed are re-tokenized, unless the vocabulary changed.
+    """
+
+    def run(ctx):
+        out_path = PATHS[name]
+        vocab_changed = ctx.previous_input(PATHS[vocabulary_key]) != file_sha256(PATHS[vocabulary_key])
+        full = ctx.full or vocab_changed
+        previous = None if full else load_row_state(name)
+        vocabulary = load_vocabulary(PATHS[vocabulary_key], vocabulary_column, ctx.chunksize)
+
+        hashes, fresh_ids, fresh_names, drop_ids = [], [], [], []
+        start = 0
+        for chunk in read_chunks(PATHS["products"], ctx.chunksize, usecols=["ingredients"]):
+            h = row_hashes(chunk)
+            changed = changed_rows(h, previous, start)
+            rows = np.flatnonzero(changed)
+            positions, names = product_relations(chunk["ingredients"].to_numpy()[rows], vocabulary)
+            fresh_ids.extend(int(start + rows[i] + 1) for i in positions)
+            fresh_names.extend(names)
+            drop_ids.extend((start + rows + 1).tolist())
+            hashes.append(h)
+            start += len(chunk)
+
+        hashes = np.concatenate(hashes) if hashes else np.empty(0, dtype=np.uint64)
+        if previous is not None and len(previous) > len(hashes):
+            drop_ids.extend(range(len(hashes) + 1, len(previous) + 1))
+
+        fresh = pd.DataFrame({
+            "product_id": np.array(fresh_ids, dtype=np.int64),
+            name_column: pd.Series(fresh_names, dtype=object),
+        })
+        sink = CsvSink(out_path)
+        try:
+            if previous is None:
+                sink.write(fresh)
+            else:
+                merge_relations(read_chunks(out_path, ctx.chunksize), fresh, drop_ids, sink)
+        except Exception:
+            sink.abort()
+            raise
+        sink.commit()
+        save_row_state(name, hashes)
+        return {
+            "rows": sink.rows,
+            "products_rebuilt": len(hashes) if previous is None else len(set(drop_ids)),
+        }
+
+    return run
+
+
+def run_centrality(ctx):
+    import recommender
+
+    _, rows = recommender.build_centrality(processed=PROCESSED)
+    return {"rows": rows}
+
+
+def run_model(ctx):
+    import model_store
+
+    out_dir = model_store.build(force=ctx.force)
+    return {"artifact": os.path.basename(out_dir)}
+
+
+# ================================================================
+# 🗺️ DAG
+# ================================================================
+class Stage:
+    def __init__(self, name, inputs, outputs, run, after=()):
+        self.name = name
+        self.inputs = inputs
+        self.outputs = outputs
+        self.run = run
+        self.after = after
+
+
+class StageContext:
+    def __init__(self, previous, chunksize, full, force):
+        self.previous = previous or {}
+        self.chunksize = chunksize
+        self.full = full  # previous outputs can't be reused
+        self.force = force
+
+    def previous_input(self, path):
+        return self.previous.get("inputs", {}).get(relpath(path))
+
+
+STAGES = [
+    Stage("products", [PATHS["raw_products"]], [PATHS["products"]], run_products),
+    Stage("allergens", [PATHS["raw_allergens"]], [PATHS["allergens"]], run_allergens),
+    Stage("ingredients", [PATHS["raw_ingredients"]], [PATHS["ingredients"]], run_ingredients),
+    Stage(
+        "product_ingredients",
+        [PATHS["products"], PATHS["ingredients"]],
+        [PATHS["product_ingredients"]],
+        relation_stage("product_ingredients", "ingredients", "name", "ingredient_name"),
+        after=("products", "ingredients"),
+    ),
+    Stage(
+        "product_allergens",
+        [PATHS["products"], PATHS["allergens"]],
+        [PATHS["product_allergens"]],
+        relation_stage("product_allergens", "allergens", "ingredient_name", "allergen_name"),
+        after=("products", "allergens"),
+    ),
+    Stage("centrality", [PATHS["products"]], [PATHS["centrality"]], run_centrality, after=("products",)),
+    Stage(
+        "model",
+        [PATHS[k] for k in ("products", "ingredients", "product_ingredients", "product_allergens", "centrality")],
+        [],
+        run_model,
+        after=("product_ingredients", "product_allergens", "centrality"),
+    ),
+]
+
+
+def relpath(path):
+    return os.path.relpath(path, BASE_DIR).replace(os.sep, "/")
+
+
+def topological_order(stages):
+    by_name = {s.name: s for s in stages}
+    order, state = [], {}
+
+    def visit(stage):
+        if state.get(stage.name) == "done":
+            return
+        if state.get(stage.name) == "visiting":
+            raise ValueError(f"Pipeline has a cycle at stage '{stage.name}'")
+        state[stage.name] = "visiting"
+        for dep in stage.after:
+            visit(by_name[dep])
+        state[stage.name] = "done"
+        order.append(stage)
+
+    for stage in stages:
+        visit(stage)
+    return order
+
+
+def downstream(stages, names):
+    """`names` plus every stage that depends on them."""
+    selected = set(names)
+    for stage in topological_order(stages):
+        if selected.intersection(stage.after):
+            selected.add(stage.name)
+    return selected
+
+
+def load_manifest():
+    if not os.path.exists(MANIFEST_PATH):
+        return {"version": PIPELINE_VERSION, "stages": {}}
+    with open(MANIFEST_PATH, encoding="utf-8") as f:
+        manifest = json.load(f)
+    if manifest.get("version") != PIPELINE_VERSION:
+        return {"version": PIPELINE_VERSION, "stages": {}}
+    return manifest
+
+
+def save_manifest(manifest):
+    tmp = MANIFEST_PATH + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(tmp, MANIFEST_PATH)
+
+
+def hashes_of(paths):
+    return {relpath(p): file_sha256(p) for p in paths if os.path.exists(p)}
+
+
+def write_columnar_copies(stage, outputs, chunksize):
+    """(Re)write the Parquet copy of every CSV output that lacks a current one."""
+    for path in stage.outputs:
+        if path.endswith(".csv") and not parquet_is_current(path, outputs.get(relpath(path))):
+            write_parquet(path, chunksize)
+
+
+def run_pipeline(stages=STAGES, force=False, only=None, chunksize=CHUNK_SIZE):
+    """Run stages in dependency order, skipping the ones that are up to date."""
+    manifest = load_manifest()
+    selected = downstream(stages, only) if only else None
+    summary = {}
+
+    for stage in topological_order(stages):
+        if selected is not None and stage.name not in selected:
+            continue
+        missing = [p for p in stage.inputs if not os.path.exists(p)]
+        if missing:
+            raise FileNotFoundError(f"❌ Stage '{stage.name}' is missing inputs: {missing}")
+
+        inputs = hashes_of(stage.inputs)
+        outputs = hashes_of(stage.outputs)
+        entry = manifest["stages"].get(stage.name)
+        if not force and entry and entry.get("inputs") == inputs and outputs == entry.get("outputs"):
+            write_columnar_copies(stage, outputs, chunksize)
+            print(f"⏭️  {stage.name}: up to date")
+            summary[stage.name] = "skipped"
+            continue
+
+        # only reuse previous outputs that are exactly what the last run wrote
+        full = force or entry is None or outputs != entry.get("outputs")
+
+        start = time.perf_counter()
+        info = stage.run(StageContext(entry, chunksize, full=full, force=force))
+        outputs = hashes_of(stage.outputs)
+        write_columnar_copies(stage, outputs, chunksize)
+        seconds = time.perf_counter() - start
+        manifest["stages"][stage.name] = {
+            "inputs": inputs,
+            "outputs": outputs,
+            "built_at": datetime.now(timezone.utc).isoformat(),
+            "seconds": round(seconds, 3),
+            **info,
+        }
+        save_manifest(manifest)
+        print(f"✅ {stage.name}: {info} in {seconds:.2f}s")
+        summary[stage.name] = info
+
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the data preparation pipeline.")
+    parser.add_argument("--force", action="store_true", help="rebuild every stage from scratch")
+    parser.add_argument("--only", nargs="+", choices=[s.name for s in STAGES],
+                        help="run these stages (and everything downstream of them)")
+    parser.add_argument("--chunksize", type=int, default=CHUNK_SIZE, help="rows per read_csv chunk")
+    args = parser.parse_args()
+    run_pipeline(force=args.force, only=args.only, chunksize=args.chunksize)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,9 +1,12 @@
 import os
+import sys
 import pandas as pd
 from fastapi import FastAPI, Query
 from fastapi.middleware.cors import CORSMiddleware
 from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.metrics.pairwise import cosine_similarity
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from similar_index import build_knn, neighbours
 
 app = FastAPI()
 
@@ -55,11 +58,12 @@ if products is not None:
     print("🔹 Building TF-IDF matrix...")
     tfidf = TfidfVectorizer(stop_words="english")
     tfidf_matrix = tfidf.fit_transform(merged["combined_text"])
-    cosine_sim = cosine_similarity(tfidf_matrix)
-    print(f"✅ TF-IDF matrix shape: {cosine_sim.shape}")
+    # sparse top-5 neighbours (incl. the row itself) instead of a dense N × N matrix
+    similar = build_knn(tfidf_matrix, k=5, exclude_self=False)
+    print(f"✅ TF-IDF matrix shape: {tfidf_matrix.shape}, neighbour graph nnz: {similar.nnz}")
 else:
     merged = None
-    cosine_sim = None
+    similar = None
 
 @app.get("/")
 def home():
@@ -101,8 +105,7 @@ def recommend(
     # Fallback if too few results
     if len(df) < 5:
         print("⚠️ Few matches found, using cosine similarity fallback.")
-        sim_scores = cosine_sim[:5]
-        indices = sim_scores.argsort()[0][-5:][::-1]
+        indices, _ = neighbours(similar, 0)
         df = merged.iloc[indices]
 
     top = df.head(5)
@@ -0,0 +1,242 @@
+import hashlib
+import json
+import os
+from contextlib import contextmanager
+
+import numpy as np
+import pandas as pd
+
+from columnar import SKIN_FLAG_COLUMNS
+from data_preprocessing import clean_products
+from pipeline import product_relations
+
+try:
+    import fcntl
+except ImportError:  # not POSIX: edits are only coordinated within one process
+    fcntl = None
+
+# ================================================================
+# ✏️ Product Edits – admin upserts / deletes layered over the CSVs
+# ================================================================
+# /admin/products never rewrites products_clean.csv (the pipeline owns
+# it). Edits are appended next to it, one line per admin request, to
+# processed/product_edits.jsonl:
+#
+#   {"seq": 5, "products": {"12": {...}}}            replaced
+#   {"seq": 6, "products": {"40": null}}             deleted
+#   {"seq": 7, "products": {"10000001": {...}}}      added
+#
+# Replaying the file gives each edited product's latest state.
+# Model builds apply every edit on top of the CSVs (apply_edits) and the
+# artifact records the highest `seq` it contains. Edits newer than that
+# are served from a delta segment (delta_segment.py) until the next build.
+#
+# Added products get ids from NEW_PRODUCT_ID_START up, so they never
+# collide with CSV row numbers, even when the pipeline appends rows.
+#
+# Several API workers can share one log. A writer holds an exclusive
+# flock on product_edits.jsonl.lock while it reads the lines other
+# workers appended, picks the next id / seq and appends its own line.
+# Readers don't lock: they only consume complete lines, and a line is
+# written with its newline in one write.
+
+EDITS_FILE = "product_edits.jsonl"
+NEW_PRODUCT_ID_START = 10_000_001
+
+PRODUCT_FIELDS = ["Label", "brand", "name", "price", "rank", "ingredients", *SKIN_FLAG_COLUMNS]
+
+
+def edits_path(paths):
+    return os.path.join(os.path.dirname(paths["products"]), EDITS_FILE)
+
+
+def allergens_path(paths):
+    return os.path.join(os.path.dirname(paths["products"]), "allergens_clean.csv")
+
+
+@contextmanager
+def locked(path):
+    """Exclusive flock on `path`.lock, across processes, until the block exits."""
+    if fcntl is None:
+        yield
+        return
+    with open(path + ".lock", "a+b") as f:
+        fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+
+class ProductEdits:
+    """
+    Replayed edit log: product id -> (seq, product dict or None if deleted).
+    `apply` returns a new log, so a published snapshot's edits never change.
+    """
+
+    __slots__ = ("seq", "entries", "digest", "offset")
+
+    def __init__(self, seq=0, entries=None, digest=None, offset=0):
+        self.seq = seq
+        self.entries = entries or {}
+        self.digest = digest or {"seq": 0, "bytes": 0, "sha256": None}
+        self.offset = offset  # bytes of the log file replayed into this one
+
+    @classmethod
+    def load(cls, path):
+        if not os.path.exists(path):
+            return cls()
+        with open(path, "rb") as f:
+            data = f.read()
+        edits = cls()._replay(data, path)
+        # identifies exactly which edits a model was fitted with (see model_store)
+        edits.digest = {"seq": edits.seq, "bytes": len(data), "sha256": hashlib.sha256(data).hexdigest()}
+        return edits
+
+    def read_new(self, path):
+        """This log plus the edits other processes appended to `path` since it was read."""
+        try:
+            with open(path, "rb") as f:
+                if f.seek(0, os.SEEK_END) < self.offset:
+                    return ProductEdits.load(path)  # the log was replaced
+                f.seek(self.offset)
+                data = f.read()
+        except FileNotFoundError:
+            return self
+        return self._replay(data, path)
+
+    def behind(self, path) -> bool:
+        """True if `path` holds bytes this log has not read (one stat call)."""
+        try:
+            return os.stat(path).st_size != self.offset
+        except FileNotFoundError:
+            return False
+
+    def _replay(self, data, path):
+        # a line without its newline is still being written, or was torn by a
+        # crash mid-append and never acknowledged; leave it for the next read
+        end = data.rfind(b"\n") + 1
+        edits = self
+        for line in data[:end].splitlines():
+            if not line.strip():
+                continue
+            try:
+                entry = json.loads(line)
+            except json.JSONDecodeError:
+                print(f"⚠️ Skipping unreadable line in {path}")
+                continue
+            edits = edits.apply(entry["products"], seq=entry["seq"])
+        return ProductEdits(edits.seq, edits.entries, offset=self.offset + end)
+
+    def append(self, path, changes):
+        """
+        Durably append `changes` as edit number `self.seq` (call on the log
+        `apply` returned, holding `locked(path)` since it was read).
+        """
+        line = json.dumps({"seq": self.seq, "products": {str(pid): p for pid, p in changes.items()}},
+                          ensure_ascii=False)
+        with open(path, "a+b") as f:
+            if f.seek(0, os.SEEK_END) > 0:
+                f.seek(-1, os.SEEK_END)
+                if f.read(1) != b"\n":
+                    f.write(b"\n")  # never glue an edit onto a torn last line
+            f.write(line.encode("utf-8") + b"\n")
+            f.flush()
+            os.fsync(f.fileno())
+            self.offset = f.tell()
+
+    def apply(self, changes, seq=None):
+        """New log with `changes` ({id: product or None}) recorded under one seq."""
+        seq = self.seq + 1 if seq is None else seq
+        entries = dict(self.entries)
+        for pid, product in changes.items():
+            entries[int(pid)] = (seq, product)
+        return ProductEdits(seq, entries, offset=self.offset)
+
+    def includes(self, digest, path):
+        """True if the edits in `digest` are a prefix of this log (read from `path`)."""
+        if not digest or not digest["bytes"]:
+            return True
+        if digest["seq"] > self.seq or digest["bytes"] > self.digest["bytes"]:
+            return False
+        with open(path, "rb") as f:
+            return hashlib.sha256(f.read(digest["bytes"])).hexdigest() == digest["sha256"]
+
+    def since(self, seq):
+        """{id: product or None} for edits made after `seq`."""
+        return {pid: product for pid, (s, product) in self.entries.items() if s > seq}
+
+    def next_id(self):
+        return max([NEW_PRODUCT_ID_START - 1, *self.entries]) + 1
+
+    def __len__(self):
+        return len(self.entries)
+
+
+# ================================================================
+# 🧱 Frames for edited products
+# ================================================================
+def edits_frame(products) -> pd.DataFrame:
+    """products_df-shaped frame (indexed by product_id) for {id: product}."""
+    ids = sorted(products)
+    frame = pd.DataFrame(
+        [{field: products[pid].get(field) for field in PRODUCT_FIELDS} for pid in ids],
+        columns=PRODUCT_FIELDS,
+        index=pd.Index(np.asarray(ids, dtype=np.int64), name="product_id"),
+    )
+    frame = clean_products(frame)
+    for col in SKIN_FLAG_COLUMNS:
+        frame[col] = np.array([products[pid].get(col) or 0 for pid in ids], dtype=np.uint8)
+    for col in ("price", "rank"):
+        frame[col] = frame[col].astype(np.float32)
+    return frame
+
+
+def relation_frame(products_df, vocabulary, name_column) -> pd.DataFrame:
+    """Relation rows for `products_df`, tokenized exactly like the pipeline does."""
+    positions, names = product_relations(products_df["ingredients"].fillna("").to_numpy(), vocabulary)
+    return pd.DataFrame({
+        "product_id": products_df.index.to_numpy()[np.asarray(positions, dtype=np.intp)],
+        name_column: pd.Series(names, dtype=object),
+    })
+
+
+def relation_vocabularies(paths, ingredients_df):
+    """(ingredient names, allergen names) the relation files are matched against."""
+    ingredients = set(ingredients_df["name"].dropna().astype(str).str.lower())
+    allergens = set()
+    path = allergens_path(paths)
+    if os.path.exists(path):
+        names = pd.read_csv(path, usecols=["ingredient_name"])["ingredient_name"]
+        allergens = set(names.dropna().astype(str).str.lower())
+    ingredients.discard("")
+    allergens.discard("")
+    return ingredients, allergens
+
+
+def apply_edits(datasets, edits, paths):
+    """Apply every edit in `edits` to the loaded datasets (in place)."""
+    if not len(edits):
+        return datasets
+    changed = np.fromiter(edits.entries, dtype=np.int64)
+    upserts = {pid: product for pid, (_, product) in edits.entries.items() if product is not None}
+    added = edits_frame(upserts)
+
+    products = datasets["products"]
+    kept = products[~products.index.isin(changed)]
+    datasets["products"] = pd.concat([kept, added]).sort_index(kind="stable")
+
+    ingredient_vocabulary, allergen_vocabulary = relation_vocabularies(paths, datasets["ingredients"])
+    for key, vocabulary, name_column in (
+        ("product_ingredients", ingredient_vocabulary, "ingredient_name"),
+        ("product_allergens", allergen_vocabulary, "allergen_name"),
+    ):
+        frame = datasets[key]
+        frame = frame[~frame["product_id"].isin(changed)].astype({name_column: object})
+        fresh = relation_frame(added, vocabulary, name_column)
+        datasets[key] = pd.concat([frame, fresh], ignore_index=True)
+    if datasets.get("centrality") is not None:
+        # scores of edited products are stale until recommender.py runs again
+        centrality = datasets["centrality"]
+        datasets["centrality"] = centrality[~centrality["product_id"].isin(changed)]
+    return datasets
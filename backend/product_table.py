@@ -0,0 +1,268 @@
+import json
+import os
+import sys
+
+import numpy as np
+
+# ================================================================
+# 🗂️ Product Table – array-backed serving catalog
+# ================================================================
+# Built once per model from products_df; requests then only index
+# NumPy arrays, never pandas. Label, brand and the pregnancy-unsafe
+# lists are interned (distinct values + a small integer code per
+# product), names are one packed UTF-8 buffer, numbers are fixed-width,
+# and returned rows are __slots__ views.
+#
+# Every per-product column is a plain array, so the table is saved with
+# the model artifact and can be memory-mapped read-only: all workers on
+# a host then share the same physical pages.
+
+TABLE_FILE = "products_table.json"
+ARRAY_FILES = {
+    "ids": "products_ids.npy",
+    "price": "products_price.npy",
+    "rank": "products_rank.npy",
+    "centrality": "products_centrality.npy",
+    "label_codes": "products_label_codes.npy",
+    "brand_codes": "products_brand_codes.npy",
+    "unsafe_codes": "products_unsafe_codes.npy",
+    "name_offsets": "products_name_offsets.npy",
+    "name_blob": "products_name_blob.npy",
+    "name_missing": "products_name_missing.npy",
+}
+
+
+def _readonly(arr):
+    # plain ndarray view: np.memmap's per-item indexing is several times slower
+    arr = np.asarray(arr)
+    if arr.flags.writeable:
+        arr.flags.writeable = False
+    return arr
+
+
+class InternedStrings:
+    """Column of repeated values stored as codes into a tuple of values."""
+
+    __slots__ = ("codes", "values")
+
+    def __init__(self, codes, values):
+        self.codes = _readonly(codes)
+        self.values = values
+
+    @classmethod
+    def from_items(cls, items):
+        lookup = {}
+        codes = [lookup.setdefault(s, len(lookup)) for s in items]
+        dtype = np.uint16 if len(lookup) <= np.iinfo(np.uint16).max else np.int32
+        return cls(np.asarray(codes, dtype=dtype), tuple(lookup))
+
+    def __getitem__(self, i):
+        return self.values[self.codes[i]]
+
+    def nbytes(self):
+        values = sys.getsizeof(self.values) + sum(sys.getsizeof(v) for v in self.values)
+        return self.codes.nbytes + values
+
+
+class PackedStrings:
+    """Mostly-unique strings packed into one UTF-8 buffer plus offsets."""
+
+    __slots__ = ("offsets", "blob", "missing")
+
+    def __init__(self, offsets, blob, missing):
+        self.offsets = _readonly(offsets)
+        self.blob = _readonly(blob)
+        self.missing = _readonly(missing)
+
+    @classmethod
+    def from_items(cls, items):
+        encoded = [b"" if s is None else s.encode("utf-8") for s in items]
+        offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+        np.cumsum([len(b) for b in encoded], out=offsets[1:])
+        blob = np.frombuffer(b"".join(encoded), dtype=np.uint8).copy()
+        missing = np.array([s is None for s in items], dtype=bool)
+        return cls(offsets, blob, missing)
+
+    def __getitem__(self, i):
+        if self.missing[i]:
+            return None
+        return self.blob[self.offsets[i]:self.offsets[i + 1]].tobytes().decode("utf-8")
+
+    def nbytes(self):
+        return self.offsets.nbytes + self.blob.nbytes + self.missing.nbytes
+
+
+class ProductRow:
+    """Read-only view of one product; holds only the table and a position."""
+
+    __slots__ = ("_table", "_i")
+
+    def __init__(self, table, i):
+        self._table = table
+        self._i = i
+
+    @property
+    def product_id(self):
+        return int(self._table.ids[self._i])
+
+    @property
+    def label(self):
+        return self._table.label[self._i]
+
+    @property
+    def brand(self):
+        return self._table.brand[self._i]
+
+    @property
+    def name(self):
+        return self._table.names[self._i]
+
+    @property
+    def price(self):
+        return float(self._table.price[self._i])
+
+    @property
+    def rank(self):
+        return float(self._table.rank[self._i])
+
+    @property
+    def pregnancy_unsafe_ingredients(self):
+        return list(self._table.unsafe[self._i])
+
+    def to_record(self, score):
+        """The response dict /recommend has always returned for a product."""
+        return {
+            "Label": self.label,
+            "brand": self.brand,
+            "name": self.name,
+            "pregnancy_unsafe_ingredients": self.pregnancy_unsafe_ingredients,
+            "similarity": float(score),
+        }
+
+
+class ProductTable:
+    """
+    Fixed-schema, read-only product columns, one entry per row of the
+    TF-IDF matrix. `ids` are the product ids (products_df index labels).
+    """
+
+    __slots__ = ("n", "ids", "label", "brand", "names", "price", "rank", "unsafe", "centrality")
+
+    def __init__(self, ids, label, brand, names, price, rank, unsafe, centrality):
+        self.n = len(ids)
+        self.ids = _readonly(ids)
+        self.label = label
+        self.brand = brand
+        self.names = names
+        self.price = _readonly(price)
+        self.rank = _readonly(rank)
+        self.unsafe = unsafe
+        # mean similarity to the catalog (recommender.py), 0 if not scored
+        self.centrality = _readonly(centrality)
+
+    def __len__(self):
+        return self.n
+
+    def position(self, product_id) -> int:
+        """Row position of `product_id`, or -1 if it isn't in the table."""
+        pos = int(np.searchsorted(self.ids, product_id))
+        if pos < self.n and self.ids[pos] == product_id:
+            return pos
+        return -1
+
+    def row(self, i) -> ProductRow:
+        return ProductRow(self, i)
+
+    def records(self, rows, scores):
+        """Response dicts for `rows`; `scores` is aligned with `rows`."""
+        return [ProductRow(self, i).to_record(s) for i, s in zip(rows.tolist(), scores)]
+
+    def nbytes(self) -> int:
+        """Approximate memory held by the table, including Python objects."""
+        arrays = self.ids.nbytes + self.price.nbytes + self.rank.nbytes + self.centrality.nbytes
+        interned = self.label.nbytes() + self.brand.nbytes() + self.unsafe.nbytes()
+        return arrays + interned + self.names.nbytes()
+
+
+def _clean(value):
+    """Missing values (None / NaN) become None, everything else a str."""
+    if value is None or value != value:
+        return None
+    return str(value)
+
+
+def build_product_table(products_df) -> ProductTable:
+    """Conversion from the model's DataFrame; the only place pandas is touched."""
+    n = len(products_df)
+
+    def column(name, default):
+        if name in products_df.columns:
+            return products_df[name].to_numpy(dtype=object)
+        return [default] * n
+
+    # ids must be sorted for position(); products_df is indexed 1..n
+    ids = np.asarray(products_df.index, dtype=np.int64)
+    if n and np.any(np.diff(ids) <= 0):
+        raise ValueError("products_df index must be strictly increasing product ids")
+
+    return ProductTable(
+        ids=ids,
+        label=InternedStrings.from_items([_clean(v) for v in column("Label", None)]),
+        brand=InternedStrings.from_items([_clean(v) for v in column("brand", None)]),
+        names=PackedStrings.from_items([_clean(v) for v in column("name", None)]),
+        price=np.asarray(column("price", np.nan), dtype=np.float32),
+        rank=np.asarray(column("rank", np.nan), dtype=np.float32),
+        unsafe=InternedStrings.from_items([
+            tuple(v) if isinstance(v, (list, tuple)) else ()
+            for v in column("pregnancy_unsafe_ingredients", ())
+        ]),
+        centrality=np.nan_to_num(np.asarray(column("centrality", 0.0), dtype=np.float32)),
+    )
+
+
+# ================================================================
+# 💾 Save / Load (inside a model artifact directory)
+# ================================================================
+def save_product_table(table, out_dir):
+    arrays = {
+        "ids": table.ids,
+        "price": table.price,
+        "rank": table.rank,
+        "centrality": table.centrality,
+        "label_codes": table.label.codes,
+        "brand_codes": table.brand.codes,
+        "unsafe_codes": table.unsafe.codes,
+        "name_offsets": table.names.offsets,
+        "name_blob": table.names.blob,
+        "name_missing": table.names.missing,
+    }
+    for key, filename in ARRAY_FILES.items():
+        np.save(os.path.join(out_dir, filename), arrays[key])
+    values = {
+        "n": table.n,
+        "label": list(table.label.values),
+        "brand": list(table.brand.values),
+        "unsafe": [list(t) for t in table.unsafe.values],
+    }
+    with open(os.path.join(out_dir, TABLE_FILE), "w", encoding="utf-8") as f:
+        json.dump(values, f, ensure_ascii=False)
+
+
+def load_product_table(artifact_dir, mmap_mode="r") -> ProductTable:
+    """Load a saved table; with mmap_mode="r" the arrays stay file-backed."""
+    with open(os.path.join(artifact_dir, TABLE_FILE), encoding="utf-8") as f:
+        values = json.load(f)
+    a = {
+        key: np.load(os.path.join(artifact_dir, filename), mmap_mode=mmap_mode)
+        for key, filename in ARRAY_FILES.items()
+    }
+    return ProductTable(
+        ids=a["ids"],
+        label=InternedStrings(a["label_codes"], tuple(values["label"])),
+        brand=InternedStrings(a["brand_codes"], tuple(values["brand"])),
+        names=PackedStrings(a["name_offsets"], a["name_blob"], a["name_missing"]),
+        price=a["price"],
+        rank=a["rank"],
+        unsafe=InternedStrings(a["unsafe_codes"], tuple(tuple(t) for t in values["unsafe"])),
+        centrality=a["centrality"],
+    )
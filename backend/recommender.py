@@ -1,43 +1,120 @@
+import argparse
+import os
+import time
+
+import numpy as np
 import pandas as pd
+import scipy.sparse as sp
 from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.metrics.pairwise import cosine_similarity
 
-# === Load cleaned datasets ===
-products = pd.read_csv("processed/products_clean.csv")
-allergens = pd.read_csv("processed/allergens_clean.csv")
+from columnar import read_table, write_parquet
+from skin_conditions import condition_key, condition_masks, load_skin_conditions
+
+# ================================================================
+# 🎯 Product Centrality – offline scoring job
+# ================================================================
+#   python recommender.py [--block-rows N]
+#
+# A product's centrality is its mean cosine similarity to every product
+# in the catalog, computed over ingredient TF-IDF vectors. TF-IDF rows are
+# L2-normalized, so that mean is just the product's dot product with the
+# mean TF-IDF row:
+#
+#     mean_j cos(x_i, x_j) = x_i · (Σ_j x_j) / N
+#
+# The N × N similarity matrix is never built: one pass sums the rows,
+# a second scores them block by block (O(nnz) time, memory flat in N).
+# label_centrality is the same against the mean row of the product's own
+# Label (how typical a moisturizer is among moisturizers).
+#
+# The scores go to processed/product_centrality.csv (+ Parquet copy),
+# keyed by product_id; the model build attaches them to the product
+# table and the API uses centrality to break similarity ties.
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+PROCESSED = os.getenv("PROCESSED_DIR", os.path.join(BASE_DIR, "processed"))
+
+CENTRALITY_FILE = "product_centrality.csv"
+BLOCK_ROWS = int(os.getenv("CENTRALITY_BLOCK_ROWS", "8192"))
+
+
+def ingredient_tfidf(products):
+    vectorizer = TfidfVectorizer(stop_words="english")
+    return vectorizer.fit_transform(products["ingredients"].fillna("").astype(str)).tocsr()
+
+
+def centrality_scores(matrix, block_rows=BLOCK_ROWS) -> np.ndarray:
+    """Mean cosine similarity of each row to all rows (rows must be L2-normalized)."""
+    n = matrix.shape[0]
+    mean_row = np.asarray(matrix.sum(axis=0)).ravel() / max(n, 1)
+    scores = np.empty(n, dtype=np.float64)
+    for start in range(0, n, block_rows):
+        scores[start:start + block_rows] = matrix[start:start + block_rows] @ mean_row
+    return scores
 
-# === Normalize column names ===
-allergens.columns = allergens.columns.str.lower()
-products.columns = products.columns.str.lower()
 
-# === TF-IDF Vectorization ===
-vectorizer = TfidfVectorizer(stop_words="english")
-tfidf_matrix = vectorizer.fit_transform(products["ingredients"].fillna(""))
+def label_centrality_scores(matrix, labels, block_rows=BLOCK_ROWS) -> np.ndarray:
+    """Mean cosine similarity of each row to the rows sharing its label."""
+    n = matrix.shape[0]
+    codes, uniques = pd.factorize(pd.Series(labels).fillna(""))
+    n_groups = len(uniques)
+    members = sp.csr_matrix(
+        (np.ones(n), (codes, np.arange(n))), shape=(n_groups, n)
+    )
+    counts = np.bincount(codes, minlength=n_groups)
+    # one dense mean row per label: labels are few, so this stays small
+    centroids = (members @ matrix).toarray() / np.maximum(counts, 1)[:, None]
+    scores = np.empty(n, dtype=np.float64)
+    for start in range(0, n, block_rows):
+        stop = min(start + block_rows, n)
+        per_label = matrix[start:stop] @ centroids.T
+        scores[start:stop] = per_label[np.arange(stop - start), codes[start:stop]]
+    return scores
+
+
+def build_centrality(processed=PROCESSED, block_rows=BLOCK_ROWS):
+    """Score every product in products_clean.csv and write product_centrality.csv."""
+    products = read_table(os.path.join(processed, "products_clean.csv"), ["Label", "ingredients"])
+    matrix = ingredient_tfidf(products)
+    frame = pd.DataFrame({
+        # a product's id is its 1-based row number in products_clean.csv
+        "product_id": np.arange(1, len(products) + 1, dtype=np.int64),
+        "centrality": centrality_scores(matrix, block_rows),
+        "label_centrality": label_centrality_scores(matrix, products["Label"].astype(object), block_rows),
+    })
+    out_path = os.path.join(processed, CENTRALITY_FILE)
+    tmp = out_path + ".tmp"
+    frame.to_csv(tmp, index=False, float_format="%.6g")
+    os.replace(tmp, out_path)
+    write_parquet(out_path)
+    return out_path, len(frame)
 
-# === Similarity Matrix ===
-cosine_sim = cosine_similarity(tfidf_matrix, tfidf_matrix)
-products["similarity_score"] = cosine_sim.mean(axis=1)
 
 # === Recommendation Function ===
 def recommend_products(skin_condition=None, top_n=5):
     """
-    Recommend skincare products, optionally filtering by skin condition.
+    Recommend skincare products, optionally excluding ingredients to avoid
+    for a skin condition, most central first. Run the centrality job once
+    beforehand.
     """
-    filtered_products = products.copy()
+    products = read_table(os.path.join(PROCESSED, "products_clean.csv"), ["name", "brand", "ingredients"])
+    products.columns = products.columns.str.lower()
+    # a product's id is its 1-based row number in products_clean.csv
+    products.index = pd.RangeIndex(1, len(products) + 1, name="product_id")
+    centrality = read_table(os.path.join(PROCESSED, CENTRALITY_FILE), ["product_id", "centrality"])
+    # joined on product_id: scores from before the catalog changed may miss
+    # products (scored 0) or list ids that no longer exist (dropped)
+    scores = centrality.set_index("product_id")["centrality"]
+    products["similarity_score"] = scores.reindex(products.index).fillna(0).to_numpy()
+    filtered_products = products
 
     if skin_condition:
-        skin_condition = skin_condition.lower()
-        allergens["skin_condition"] = allergens["skin_condition"].str.lower()
-
-        condition_allergens = allergens[
-            allergens["skin_condition"] == skin_condition
-        ]["ingredient_name"].dropna().tolist()
-
-        if condition_allergens:
-            pattern = "|".join([f"\\b{a}\\b" for a in condition_allergens if isinstance(a, str)])
-            filtered_products = filtered_products[
-                ~filtered_products["ingredients"].str.contains(pattern, case=False, na=False, regex=True)
-            ]
+        # same compiled avoidance masks as /recommend?skin_condition=
+        conditions = load_skin_conditions(os.path.join(PROCESSED, "allergens_clean.csv"))
+        key = condition_key(skin_condition)
+        if key in conditions:
+            avoid_masks, _, _ = condition_masks(products, {key: conditions[key]})
+            filtered_products = filtered_products[~avoid_masks[key]]
 
     # Sort by similarity score
     recommendations = filtered_products.sort_values(by="similarity_score", ascending=False).head(top_n)
@@ -45,6 +122,20 @@ def recommend_products(skin_condition=None, top_n=5):
     return recommendations[["name", "brand", "ingredients"]]
 
 
+def main():
+    parser = argparse.ArgumentParser(description="Score product centrality into processed/.")
+    parser.add_argument("--block-rows", type=int, default=BLOCK_ROWS)
+    parser.add_argument("--demo", metavar="SKIN_CONDITION", help="print top products for a skin condition")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    out_path, n = build_centrality(block_rows=args.block_rows)
+    print(f"✅ Scored centrality for {n} products in {time.perf_counter() - start:.2f}s: {out_path}")
+
+    if args.demo:
+        print(f"\nRecommended products for {args.demo}:\n")
+        print(recommend_products(skin_condition=args.demo, top_n=5))
+
+
 if __name__ == "__main__":
-    print("\nRecommended products for Cystic Acne:\n")
-    print(recommend_products(skin_condition="Cystic Acne", top_n=5))
+    main()
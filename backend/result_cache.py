@@ -0,0 +1,142 @@
+import sys
+import threading
+import time
+from collections import OrderedDict
+
+# ================================================================
+# 🧊 Result Cache – bounded LRU + TTL with request coalescing
+# ================================================================
+
+
+def approx_size(obj) -> int:
+    """Rough deep size in bytes of JSON-like values (dicts, lists, scalars)."""
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        size += sum(approx_size(k) + approx_size(v) for k, v in obj.items())
+    elif isinstance(obj, (list, tuple)):
+        size += sum(approx_size(v) for v in obj)
+    return size
+
+
+class _InFlight:
+    def __init__(self):
+        self.done = threading.Event()
+        self.value = None
+        self.error = None
+
+
+class ResultCache:
+    """
+    Thread-safe LRU cache whose entries also expire after `ttl` seconds.
+
+    `get_or_compute(key, fn)` returns a cached value or calls `fn()`. While
+    a key is being computed, other callers asking for the same key wait for
+    that result instead of computing it again, unless `invalidate()` ran in
+    between; they then compute it afresh. Cached values are shared
+    between callers and must be treated as read-only.
+
+    `maxsize=0` disables caching (every call computes).
+    """
+
+    def __init__(self, maxsize=1024, ttl=600.0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries = OrderedDict()  # key -> (expires_at, value, nbytes)
+        self._in_flight = {}
+        self._lock = threading.Lock()
+        self._generation = 0
+        self._memory = 0
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    def get_or_compute(self, key, fn):
+        if self.maxsize <= 0:
+            return fn()
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry[0] > time.monotonic():
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return entry[1]
+                self._remove(key)
+                self.expirations += 1
+
+            # a computation started before invalidate() must not be joined:
+            # it may be reading the snapshot that was just replaced
+            generation = self._generation
+            flight_key = (generation, key)
+            call = self._in_flight.get(flight_key)
+            if call is not None:
+                self.coalesced += 1
+                leader = False
+            else:
+                call = self._in_flight[flight_key] = _InFlight()
+                self.misses += 1
+                leader = True
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.value
+
+        try:
+            call.value = fn()
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                self._in_flight.pop(flight_key, None)
+                # results computed against data that was reloaded meanwhile are not kept
+                if call.error is None and generation == self._generation:
+                    self._store(key, call.value)
+            call.done.set()
+        return call.value
+
+    def _store(self, key, value):
+        if key in self._entries:
+            self._remove(key)
+        nbytes = approx_size(value)
+        self._entries[key] = (time.monotonic() + self.ttl, value, nbytes)
+        self._memory += nbytes
+        while len(self._entries) > self.maxsize:
+            oldest = next(iter(self._entries))
+            self._remove(oldest)
+            self.evictions += 1
+
+    def _remove(self, key):
+        _, _, nbytes = self._entries.pop(key)
+        self._memory -= nbytes
+
+    def invalidate(self):
+        """Drop every entry, e.g. after the datasets were reloaded."""
+        with self._lock:
+            self._entries.clear()
+            self._memory = 0
+            self._generation += 1
+            self.invalidations += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses + self.coalesced
+            return {
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+                "ttl_seconds": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "coalesced": self.coalesced,
+                "hit_rate": round((self.hits + self.coalesced) / lookups, 4) if lookups else 0.0,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "invalidations": self.invalidations,
+                "in_flight": len(self._in_flight),
+                "memory_bytes": self._memory,
+            }
@@ -0,0 +1,198 @@
+import numpy as np
+
+# ================================================================
+# 📈 Scoring Engine – one mat-vec + partial top-k selection
+# ================================================================
+# TF-IDF rows are already L2-normalized (norm="l2"), so cosine
+# similarity against a normalized query is a plain dot product.
+
+
+def score_all(full_tfidf, user_vector) -> np.ndarray:
+    """Similarity of every product row to one (1 × vocab) query vector."""
+    query = np.asarray(user_vector.toarray()).ravel()
+    return np.asarray(full_tfidf @ query).ravel()
+
+
+def transpose_segments(*matrices) -> tuple:
+    """
+    (vocab × n) CSR copies of product × term matrices, in product order:
+    the `products_t` argument of score_batch, built once per snapshot.
+    """
+    return tuple(m.T.tocsr() for m in matrices)
+
+
+def score_batch(products_t, query_matrix, max_cells=16_000_000):
+    """
+    Score many (P × vocab) queries with sparse matrix products against the
+    transposed TF-IDF matrix, given as a tuple of (vocab × n) CSR segments
+    whose columns are consecutive products (CatalogSnapshot.tfidf_t).
+    Yields (first_profile_index, dense block of shape (b, n_products)),
+    with blocks sized so that b × n_products stays under `max_cells`.
+    """
+    n_products = sum(t.shape[1] for t in products_t)
+    block = max(1, max_cells // max(n_products, 1))
+    for start in range(0, query_matrix.shape[0], block):
+        queries = query_matrix[start:start + block]
+        parts = [(queries @ t).toarray() for t in products_t]
+        yield start, parts[0] if len(parts) == 1 else np.concatenate(parts, axis=1)
+
+
+def top_k_rows(scores: np.ndarray, mask: np.ndarray, k: int, prior=None) -> np.ndarray:
+    """
+    Row positions of the `k` best-scoring rows allowed by `mask`, ordered by
+    score descending and then by row position. A negative `k` keeps all but
+    the last |k| candidates, mirroring `DataFrame.head`. With a `prior`
+    (e.g. product centrality), equal scores are ordered by prior descending
+    before row position.
+    """
+    n_candidates = int(np.count_nonzero(mask))
+    if k < 0:
+        k = max(n_candidates + k, 0)
+    k = min(k, n_candidates)
+    if k == 0:
+        return np.empty(0, dtype=np.intp)
+
+    masked = np.where(mask, scores, -np.inf)
+    if k < n_candidates:
+        part = np.argpartition(-masked, k - 1)[:k]
+        kth = masked[part].min()
+        above = np.flatnonzero(masked > kth)
+        ties = np.flatnonzero(masked == kth)
+        if prior is not None:
+            ties = ties[np.lexsort((ties, -prior[ties]))]
+        picked = np.concatenate([above, ties[: k - above.size]])
+    else:
+        picked = np.flatnonzero(mask)
+
+    return picked[_ranked_order(picked, masked[picked], prior)]
+
+
+def _ranked_order(rows, scores, prior):
+    if prior is None:
+        return np.lexsort((rows, -scores))
+    return np.lexsort((rows, -prior[rows], -scores))
+
+
+def iter_ranked_rows(scores: np.ndarray, mask: np.ndarray, chunk: int, prior=None):
+    """
+    Every row allowed by `mask`, in top_k_rows order, as arrays of at most
+    `chunk` rows. Each chunk costs one partition of the rows not yet
+    yielded, so nothing past the current chunk is ever sorted.
+    """
+    rows = np.flatnonzero(mask)
+    keys = [rows, -scores[rows]] if prior is None else [rows, -prior[rows], -scores[rows]]
+    for positions in iter_sorted(keys, chunk):
+        yield rows[positions]
+
+
+def iter_reranked_rows(scores, mask, chunk, price, rank, mode, rank_weight=0.3, price_weight=0.2,
+                       prior=None):
+    """
+    Every row allowed by `mask` in the order rerank() gives the full
+    similarity-ordered candidate list, `chunk` rows at a time like
+    iter_ranked_rows; "blend" is scaled over all the allowed rows.
+    """
+    rows = np.flatnonzero(mask)
+    similarity = scores[rows]
+    key = sort_key(similarity, price[rows], rank[rows], mode, rank_weight, price_weight)
+    # ties on `key` fall back to the similarity order, as in rerank()
+    keys = [rows, -similarity] if prior is None else [rows, -prior[rows], -similarity]
+    if key is not None:
+        keys.append(key)
+    for positions in iter_sorted(keys, chunk):
+        yield rows[positions]
+
+
+def iter_sorted(keys, chunk: int):
+    """
+    Positions 0..n-1 in np.lexsort(keys) order (last key most significant),
+    as arrays of `chunk` positions (the last may be shorter). Each round
+    partitions the positions not yet yielded on the last key and sorts
+    only the ones it takes: one chunk's worth first, then twice as many
+    each round, so the first chunk costs O(n) and draining all of them
+    O(n log n).
+    """
+    primary = keys[-1]
+    remaining = np.arange(len(primary))
+    carry = remaining[:0]  # sorted positions that come before all of `remaining`
+    take = chunk
+    while True:
+        need = take - carry.size
+        take *= 2
+        if remaining.size <= need:
+            tail = remaining[np.lexsort([k[remaining] for k in keys])]
+            run = np.concatenate([carry, tail])
+            for start in range(0, run.size, chunk):
+                yield run[start:start + chunk]
+            return
+        values = primary[remaining]
+        kth = np.partition(values, need - 1)[need - 1]
+        head = remaining[values < kth]
+        ties = remaining[values == kth]
+        run = np.concatenate([
+            carry,
+            head[np.lexsort([k[head] for k in keys])],
+            ties[np.lexsort([k[ties] for k in keys[:-1]])],
+        ])
+        full = run.size - run.size % chunk
+        for start in range(0, full, chunk):
+            yield run[start:start + chunk]
+        carry = run[full:]
+        remaining = remaining[values > kth]
+
+
+# ================================================================
+# 🔀 Re-ranking on price / rank
+# ================================================================
+SORT_MODES = ("similarity", "rank", "price", "blend")
+
+
+def _unit_scale(values):
+    """Min-max scale to [0, 1] over the candidates; missing values become 0."""
+    if np.isnan(values).all():
+        return np.zeros(len(values))
+    lo, hi = np.nanmin(values), np.nanmax(values)
+    if hi == lo:
+        return np.zeros(len(values))
+    return np.nan_to_num((values - lo) / (hi - lo), nan=0.0)
+
+
+def sort_key(similarity, price, rank, mode, rank_weight=0.3, price_weight=0.2):
+    """
+    Ascending key that orders candidates for `mode` (see rerank), or None
+    for "similarity". Candidates missing the value get +inf.
+    """
+    if mode == "rank":
+        return np.where(np.isnan(rank), np.inf, -rank)
+    if mode == "price":
+        return np.where(np.isnan(price), np.inf, price)
+    if mode == "blend":
+        similarity_weight = max(1.0 - rank_weight - price_weight, 0.0)
+        blended = (
+            similarity_weight * _unit_scale(similarity)
+            + rank_weight * _unit_scale(rank)
+            + price_weight * np.where(np.isnan(price), 0.0, 1.0 - _unit_scale(price))
+        )
+        return -blended
+    return None
+
+
+def rerank(similarity, price, rank, mode, rank_weight=0.3, price_weight=0.2) -> np.ndarray:
+    """
+    Order (positions into the candidate arrays) for `mode`:
+      rank        highest rank first
+      price       cheapest first
+      blend       weighted mix of similarity, rank and cheapness, each
+                  min-max scaled over the candidates; similarity gets the
+                  weight left over from rank_weight + price_weight
+    Ties fall back to similarity; products missing the value go last.
+    Candidates come in similarity order, so that order also breaks ties.
+    """
+    n = len(similarity)
+    position = np.arange(n)
+    if n == 0:
+        return position
+    key = sort_key(similarity, price, rank, mode, rank_weight, price_weight)
+    if key is None:
+        return position
+    return np.lexsort((position, key))
@@ -0,0 +1,62 @@
+import numpy as np
+import scipy.sparse as sp
+
+# ================================================================
+# 🧬 Similar Products – sparse top-k neighbour graph
+# ================================================================
+# Instead of a dense N × N cosine matrix, keep only the k most similar
+# products per row. Rows are scored in blocks so peak memory is bounded
+# by `max_cells` dense scores no matter how large the catalog gets.
+
+DEFAULT_K = 20
+
+
+def build_knn(matrix, k=DEFAULT_K, max_cells=8_000_000, exclude_self=True, n_query=None):
+    """
+    Top-k cosine neighbours for every row of an L2-normalized sparse matrix.
+
+    Returns an N × N CSR matrix with at most k float32 scores per row,
+    sorted by descending score. Only positive similarities are kept.
+    `n_query` limits the build to the first rows (used for benchmarking).
+    """
+    matrix = sp.csr_matrix(matrix, dtype=np.float32)
+    n = matrix.shape[0]
+    n_query = n if n_query is None else min(n_query, n)
+    k = max(0, min(k, n - 1 if exclude_self else n))
+    indptr = np.zeros(n_query + 1, dtype=np.int64)
+    if n == 0 or k == 0:
+        return sp.csr_matrix((n_query, n), dtype=np.float32)
+
+    block = max(1, max_cells // n)
+    matrix_t = matrix.T.tocsc()
+    all_indices, all_scores = [], []
+
+    for start in range(0, n_query, block):
+        stop = min(start + block, n_query)
+        scores = (matrix[start:stop] @ matrix_t).toarray()
+        if exclude_self:
+            scores[np.arange(stop - start), np.arange(start, stop)] = -np.inf
+
+        top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        top_scores = np.take_along_axis(scores, top, axis=1)
+        # descending score, then ascending column for stable ties
+        order = np.lexsort((top, -top_scores), axis=1)
+        top = np.take_along_axis(top, order, axis=1)
+        top_scores = np.take_along_axis(top_scores, order, axis=1)
+
+        keep = top_scores > 0
+        indptr[start + 1:stop + 1] = keep.sum(axis=1)
+        all_indices.append(top[keep].astype(np.int32))
+        all_scores.append(top_scores[keep].astype(np.float32))
+
+    np.cumsum(indptr, out=indptr)
+    return sp.csr_matrix(
+        (np.concatenate(all_scores), np.concatenate(all_indices), indptr),
+        shape=(n_query, n),
+    )
+
+
+def neighbours(knn, row):
+    """(indices, scores) of one row's neighbours, best first."""
+    start, stop = knn.indptr[row], knn.indptr[row + 1]
+    return knn.indices[start:stop], knn.data[start:stop]
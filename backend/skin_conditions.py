@@ -0,0 +1,174 @@
+import os
+import re
+
+import numpy as np
+import pandas as pd
+
+from ingredient_matcher import AhoCorasick
+
+# ================================================================
+# 🩺 Skin Conditions – per-condition avoid / recommended product masks
+# ================================================================
+# allergens_clean.csv lists, per skin_condition (Cystic Acne, Rosacea, ...),
+# ingredients to avoid (ingredient_type "Avoidance") and ingredients that
+# help ("Recommendation"). Every condition is compiled once per snapshot
+# into two product masks, so ?skin_condition= is a dict lookup and one &.
+#
+# The ingredient names are descriptive ("Heavy waxes (beeswax, paraffin)",
+# "Algae extract/seaweed"), so each one is split into search terms: the
+# name outside the parentheses plus every listed item, split on "," and
+# "/". Parenthesised qualifiers such as "(synthetic)" or "(raw, unrefined)"
+# are dropped rather than searched for, and descriptive terms ("harsh
+# physical scrubs", "retinoids", "sunscreen") are replaced by the INCI
+# names products actually list (TERM_ALIASES). All terms are found in one
+# whole-word Aho-Corasick pass per distinct comma-separated ingredient, so
+# the cost grows with the ingredient vocabulary, not the catalog text.
+#
+# Terms that still match no product are reported per condition
+# (condition_masks' `unmatched`, GET /skin-conditions) instead of quietly
+# compiling into an empty mask.
+
+AVOID_TYPES = {"avoidance", "avoid"}
+RECOMMENDED_TYPES = {"recommendation", "recommended"}
+
+# parenthesised words in allergens_clean.csv that qualify a name instead of naming an ingredient
+QUALIFIERS = {
+    "synthetic", "raw", "unrefined", "heavy grades", "derivatives", "topical", "rx topical",
+    "prescribed", "low strength", "low–mid strength", "high-strength", "unsupervised use",
+    "gentle aha", "mineral spf", "modern filters",
+}
+
+# descriptive or abbreviated terms -> the INCI names they stand for; () drops a
+# term whose concrete ingredients are already listed next to it
+TERM_ALIASES = {
+    "harsh physical scrubs": ("juglans regia shell powder", "juglans regia (walnut) shell powder",
+                              "prunus armeniaca seed powder", "prunus armeniaca (apricot) seed powder"),
+    "apricot shell": ("prunus armeniaca seed powder", "prunus armeniaca (apricot) seed powder",
+                      "apricot seed powder"),
+    "walnut": ("juglans regia shell powder", "juglans regia (walnut) shell powder", "walnut shell powder"),
+    "heavy waxes": ("cera alba",),
+    "high % alcohol": ("alcohol denat", "sd alcohol"),
+    "denat. alcohol": ("alcohol denat", "sd alcohol"),
+    "sunscreen": ("avobenzone", "butyl methoxydibenzoylmethane", "octocrylene", "homosalate",
+                  "octisalate", "ethylhexyl salicylate", "octinoxate", "ethylhexyl methoxycinnamate",
+                  "bis-ethylhexyloxyphenol methoxyphenyl triazine"),
+    "retinoids": ("retinol", "retinal", "retinyl palmitate", "retinyl propionate", "retinyl acetate",
+                  "retinyl retinoate", "hydroxypinacolone retinoate", "tretinoin", "adapalene"),
+    "ceramides": ("ceramide",),
+    "cocoa butter": ("theobroma cacao seed butter", "theobroma cacao (cocoa) seed butter", "cocoa butter"),
+    "eucalyptus oil": ("eucalyptus globulus leaf oil", "eucalyptus globulus (eucalyptus) leaf oil",
+                       "eucalyptus oil"),
+    "vitamin c": ("ascorbic acid", "sodium ascorbyl phosphate", "magnesium ascorbyl phosphate",
+                  "ascorbyl glucoside", "3-o-ethyl ascorbic acid", "tetrahexyldecyl ascorbate"),
+    "vitamin b5": ("panthenol",),
+    "cica": ("centella asiatica",),
+    "sls": ("sodium lauryl sulfate",),
+    # BHA in an INCI list is butylated hydroxyanisole, not salicylic acid
+    "bha": (),
+}
+
+_PARENS = re.compile(r"\(([^)]*)\)")
+_SEPARATORS = re.compile(r"[,/]")
+
+
+def condition_key(name) -> str:
+    return " ".join(str(name).lower().split())
+
+
+def ingredient_terms(name) -> list:
+    """Lowercase search terms for one allergens_clean.csv ingredient name."""
+    if not isinstance(name, str):
+        return []
+    name = name.lower()
+    parts = _SEPARATORS.split(_PARENS.sub(" ", name))
+    for inner in _PARENS.findall(name):
+        parts.extend(p for p in _SEPARATORS.split(inner) if p.strip() not in QUALIFIERS)
+    terms = []
+    for part in parts:
+        term = " ".join(part.split())
+        if term:
+            terms.extend(TERM_ALIASES.get(term, (term,)))
+    return list(dict.fromkeys(terms))
+
+
+class SkinCondition:
+    """Search terms of one condition's avoid / recommended ingredients."""
+
+    __slots__ = ("name", "avoid", "recommended")
+
+    def __init__(self, name, avoid, recommended):
+        self.name = name
+        self.avoid = avoid
+        self.recommended = recommended
+
+
+def load_skin_conditions(path) -> dict:
+    """condition_key -> SkinCondition, from allergens_clean.csv ({} if it's missing)."""
+    if not os.path.exists(path):
+        return {}
+    rows = pd.read_csv(path, usecols=["skin_condition", "ingredient_name", "ingredient_type"])
+    rows = rows.dropna(subset=["skin_condition", "ingredient_name"])
+    conditions = {}
+    for condition, group in rows.groupby("skin_condition", sort=True):
+        kinds = group["ingredient_type"].fillna("").astype(str).str.strip().str.lower()
+        avoid, recommended = [], []
+        for name, kind in zip(group["ingredient_name"], kinds):
+            if kind in AVOID_TYPES:
+                avoid.extend(ingredient_terms(name))
+            elif kind in RECOMMENDED_TYPES:
+                recommended.extend(ingredient_terms(name))
+        conditions[condition_key(condition)] = SkinCondition(
+            str(condition).strip(), tuple(dict.fromkeys(avoid)), tuple(dict.fromkeys(recommended)),
+        )
+    return conditions
+
+
+def condition_masks(products_df, conditions):
+    """
+    (avoid_masks, recommended_masks, unmatched): condition_key -> boolean
+    mask over products_df rows containing any of the condition's avoid /
+    recommended terms, and condition_key -> the terms no row contains.
+    """
+    n = len(products_df)
+    terms = {t for c in conditions.values() for t in (*c.avoid, *c.recommended)}
+    term_rows = {t: [] for t in terms}
+    if terms and n:
+        matcher = AhoCorasick(sorted(terms), whole_words=True)
+        # terms never contain a comma, so each distinct ingredient is matched once
+        item_terms = {}
+        texts = products_df["ingredients"].fillna("").astype(str).str.lower()
+        for row, text in enumerate(texts):
+            for item in text.split(","):
+                found = item_terms.get(item)
+                if found is None:
+                    found = item_terms[item] = matcher.find_all(item)
+                for term in found:
+                    term_rows[term].append(row)
+
+    def mask_for(condition_terms):
+        mask = np.zeros(n, dtype=bool)
+        for t in condition_terms:
+            mask[term_rows[t]] = True
+        mask.flags.writeable = False
+        return mask
+
+    avoid_masks = {key: mask_for(c.avoid) for key, c in conditions.items()}
+    recommended_masks = {key: mask_for(c.recommended) for key, c in conditions.items()}
+    unmatched = {key: _unmatched((*c.avoid, *c.recommended), term_rows) for key, c in conditions.items()}
+    return avoid_masks, recommended_masks, unmatched
+
+
+def _unmatched(terms, term_rows):
+    """
+    `terms` no row contains. An alias (TERM_ALIASES) is reported under its
+    own name, and only when none of its spellings matched.
+    """
+    unmatched = []
+    for t in terms:
+        if term_rows[t]:
+            continue
+        groups = [g for g, aliases in TERM_ALIASES.items() if t in aliases]
+        if any(term_rows.get(other) for g in groups for other in TERM_ALIASES[g]):
+            continue
+        unmatched.append(groups[0] if groups else t)
+    return tuple(dict.fromkeys(unmatched))
@@ -0,0 +1,26 @@
+-- Schema for the /history endpoints.
+-- Apply to a local Postgres to run the API (and its pool) without Supabase:
+--   createdb veibelle && psql veibelle -f sql/recommendation_history.sql
+--   DATABASE_URL=postgresql://localhost/veibelle uvicorn api:app
+
+create table if not exists recommendation_history (
+    id              bigint generated by default as identity primary key,
+    user_id         text,
+    email           text        not null,
+    quiz_answers    jsonb       not null,
+    recommendations jsonb       not null,
+    created_at      timestamptz not null default now()
+);
+
+-- Write-behind mode (HISTORY_WRITE_BEHIND=1) inserts rows in batches keyed by a
+-- client-generated id, so retried batches and resubmitted sessions are not duplicated.
+alter table recommendation_history add column if not exists client_id uuid;
+create unique index if not exists recommendation_history_client_id_key
+    on recommendation_history (client_id);
+
+-- GET /history filters by email and pages newest-first with a keyset cursor:
+--   where email = $1 and (created_at, id) < ($2, $3)
+--   order by created_at desc, id desc limit $4
+-- This index serves that query as a single ordered range scan, with no sort.
+create index if not exists recommendation_history_email_created_id_idx
+    on recommendation_history (email, created_at desc, id desc);
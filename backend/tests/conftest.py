@@ -0,0 +1,79 @@
+import asyncio
+import os
+import shutil
+import sys
+import tempfile
+from urllib.parse import urlencode
+
+import pytest
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# The backend modules read their data directories (and api.py its database
+# and admin settings) at import time, so point them at a scratch copy of
+# processed/ before any test imports them. Nothing here needs Postgres.
+_scratch = tempfile.mkdtemp(prefix="veibelle-tests-")
+shutil.copytree(os.path.join(BACKEND_DIR, "processed"), os.path.join(_scratch, "processed"),
+                ignore=shutil.ignore_patterns("product_edits.jsonl", "*.parquet", ".pipeline"))
+os.environ.update({
+    "PROCESSED_DIR": os.path.join(_scratch, "processed"),
+    "MODEL_ARTIFACTS_DIR": os.path.join(_scratch, "artifacts"),
+    "DATABASE_URL": "",
+    "ADMIN_TOKEN": "test-admin-token",
+    "HISTORY_WRITE_BEHIND": "0",
+    "CATALOG_WATCH_INTERVAL": "0",
+    "CATALOG_REFIT_INTERVAL": "0",
+})
+
+# the backend is a flat set of modules run from backend/
+sys.path.insert(0, BACKEND_DIR)
+
+
+def pytest_sessionfinish(session, exitstatus):
+    shutil.rmtree(_scratch, ignore_errors=True)
+
+
+@pytest.fixture
+def asgi_get():
+    """
+    `asgi_get(path, **query)` -> (status, body bytes), calling api.app
+    directly (no HTTP client or server needed).
+    """
+    import api
+
+    def get(path, **query):
+        return asyncio.run(_asgi_get(api.app, path, query))
+
+    return get
+
+
+async def _asgi_get(app, path, query):
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET",
+        "scheme": "http", "path": path, "raw_path": path.encode(), "root_path": "",
+        "query_string": urlencode(query).encode(), "headers": [(b"host", b"testserver")],
+        "client": ("127.0.0.1", 50000), "server": ("testserver", 80),
+    }
+    disconnected = asyncio.Event()
+    sent_request = False
+
+    async def receive():
+        nonlocal sent_request
+        if not sent_request:
+            sent_request = True
+            return {"type": "http.request", "body": b"", "more_body": False}
+        await disconnected.wait()  # the client stays connected until the response is done
+        return {"type": "http.disconnect"}
+
+    status, body = None, []
+
+    async def send(message):
+        nonlocal status
+        if message["type"] == "http.response.start":
+            status = message["status"]
+        elif message["type"] == "http.response.body":
+            body.append(message.get("body", b""))
+
+    await app(scope, receive, send)
+    disconnected.set()
+    return status, b"".join(body)
@@ -0,0 +1,66 @@
+import time
+
+import pytest
+
+import api
+import metrics
+from catalog import with_edits
+from product_edits import ProductEdits
+
+PROFILES = [
+    {"skin_type": "Oily Skin", "concerns": ["acne"], "top_n": 5},
+    {"product_type": "Moisturizer", "concerns": ["dry", "wrinkle"], "top_n": 8},
+    {"allergens_list": ["niacinamide"], "pregnancy_safe": "yes", "top_n": 3},
+    {"skin_conditions": ["Rosacea"], "recommended_boost": 0.2, "top_n": 5},
+    {"sort": "rank", "min_price": 10, "max_price": 60, "top_n": 5},
+    {"skin_type": "Dry Skin", "product_type": "Cleanser", "concerns": ["hydrating"], "top_n": 4},
+]
+
+NEW_PRODUCT = {
+    "Label": "Moisturizer", "brand": "TEST", "name": "Ceramide Barrier Cream", "price": 20.0,
+    "rank": 4.5, "ingredients": "water, glycerin, ceramide np, niacinamide",
+    "Combination": 1, "Dry": 1, "Normal": 1, "Oily": 0, "Sensitive": 1,
+}
+
+
+def edited_snapshot():
+    base = api.catalog.current.fitted
+    edits = ProductEdits().apply({10_000_001: NEW_PRODUCT, 1: None})
+    return with_edits(base, edits)
+
+
+@pytest.mark.parametrize("edited", [False, True], ids=["base", "with-delta"])
+def test_batch_matches_single_requests(monkeypatch, edited):
+    if edited:
+        monkeypatch.setattr(api.catalog, "current", edited_snapshot())
+    batch = api.get_batch_recommendations(PROFILES)
+    single = [api.get_recommendations(**p) for p in PROFILES]
+    # the sparse matrix product may differ from the mat-vec in the last bits
+    strip = lambda results: [[{k: v for k, v in r.items() if k != "similarity"} for r in rs] for rs in results]
+    assert strip(batch) == strip(single)
+    similarity = lambda results: [r["similarity"] for rs in results for r in rs]
+    assert similarity(batch) == pytest.approx(similarity(single))
+
+
+def test_batch_does_not_transpose_the_catalog_per_call(monkeypatch):
+    snap = api.catalog.current
+    assert sum(t.shape[1] for t in snap.tfidf_t) == snap.full_tfidf.shape[0]
+
+    def no_transpose(self, *args, **kwargs):
+        raise AssertionError(f"transposed a {self.shape} matrix during a batch call")
+
+    monkeypatch.setattr(type(snap.full_tfidf), "transpose", no_transpose)
+    assert len(api.get_batch_recommendations(PROFILES)) == len(PROFILES)
+
+
+def test_batch_stages_are_not_counted_twice():
+    timings = metrics.RequestTimings()
+    token = metrics._current.set(timings)
+    try:
+        start = time.perf_counter()
+        api.get_batch_recommendations(PROFILES * 50)
+        elapsed = time.perf_counter() - start
+    finally:
+        metrics._current.reset(token)
+    assert {"score", "top_k", "records"} <= set(timings.stages)
+    assert sum(timings.stages.values()) <= elapsed
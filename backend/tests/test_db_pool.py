@@ -0,0 +1,152 @@
+import threading
+
+import psycopg2
+import pytest
+
+import db
+from db import ConnectionPool, PoolTimeout
+
+
+class FakeCursor:
+    def __init__(self, conn):
+        self.conn = conn
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def execute(self, query, params=None):
+        if self.conn.broken:
+            raise psycopg2.OperationalError("server closed the connection unexpectedly")
+        self.conn.queries.append(query)
+
+
+class FakeConnection:
+    """Just enough of a psycopg2 connection for the pool."""
+
+    def __init__(self):
+        self.closed = 0
+        self.broken = False
+        self.queries = []
+        self.rollbacks = 0
+
+    def cursor(self):
+        return FakeCursor(self)
+
+    def rollback(self):
+        if self.broken:
+            raise psycopg2.InterfaceError("connection already closed")
+        self.rollbacks += 1
+
+    def close(self):
+        self.closed = 1
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self):
+        return self.now
+
+
+def make_pool(**kwargs):
+    made = []
+
+    def connect():
+        made.append(FakeConnection())
+        return made[-1]
+
+    return ConnectionPool("postgresql://stand-in", connect=connect, **kwargs), made
+
+
+def test_checkout_and_return_reuses_the_connection():
+    pool, made = make_pool(minconn=1, maxconn=2)
+    with pool.connection() as first:
+        assert pool.stats()["in_use"] == 1
+    with pool.connection() as second:
+        pass
+    assert first is second
+    assert len(made) == 1
+    assert first.rollbacks == 2  # rolled back on every return
+    stats = pool.stats()
+    assert (stats["in_use"], stats["idle"], stats["acquisitions"]) == (0, 1, 2)
+
+
+def test_opens_up_to_maxconn_then_times_out():
+    pool, made = make_pool(minconn=0, maxconn=2, timeout=0.05)
+    with pool.connection(), pool.connection():
+        with pytest.raises(PoolTimeout):
+            with pool.connection():
+                pass
+    assert len(made) == 2
+    assert pool.stats()["timeouts"] == 1
+
+
+def test_waiter_gets_the_connection_that_is_returned():
+    pool, made = make_pool(minconn=1, maxconn=1, timeout=5)
+    got = []
+
+    def borrow():
+        with pool.connection() as conn:
+            got.append(conn)
+
+    with pool.connection() as held:
+        waiter = threading.Thread(target=borrow)
+        waiter.start()
+        while pool.stats()["waiting"] == 0:
+            pass
+    waiter.join(5)
+    assert got == [held]
+    assert len(made) == 1
+
+
+def test_connections_past_max_lifetime_are_recycled(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(db.time, "monotonic", clock.monotonic)
+    pool, made = make_pool(minconn=1, maxconn=1, max_lifetime=60, check_after=1e9)
+    with pool.connection() as old:
+        pass
+    clock.now += 61
+    with pool.connection() as new:
+        pass
+    assert new is not old and old.closed
+    stats = pool.stats()
+    assert (stats["connections_recycled"], stats["connections_created"], stats["size"]) == (1, 2, 1)
+
+
+def test_idle_connection_failing_the_ping_is_replaced(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(db.time, "monotonic", clock.monotonic)
+    pool, made = make_pool(minconn=1, maxconn=1, check_after=30)
+    with pool.connection() as conn:
+        pass
+    conn.broken = True
+    clock.now += 31
+    with pool.connection() as fresh:
+        assert fresh is not conn
+    assert conn.closed
+    assert pool.stats()["connections_discarded"] == 1
+
+
+def test_broken_connection_is_discarded_not_returned():
+    pool, made = make_pool(minconn=1, maxconn=1)
+    with pytest.raises(psycopg2.OperationalError):
+        with pool.connection() as conn:
+            conn.broken = True
+            with conn.cursor() as cur:
+                cur.execute("select 1")
+    assert conn.closed
+    stats = pool.stats()
+    assert (stats["size"], stats["idle"], stats["in_use"], stats["connections_discarded"]) == (0, 0, 0, 1)
+    with pool.connection() as fresh:
+        assert fresh is not conn
+
+
+def test_missing_dsn_is_an_error():
+    pool = ConnectionPool(None, connect=FakeConnection)
+    with pytest.raises(RuntimeError):
+        with pool.connection():
+            pass
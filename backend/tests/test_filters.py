@@ -0,0 +1,50 @@
+import os
+import sys
+
+import pytest
+
+import api
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "benchmarks"))
+from legacy import legacy_get_recommendations, same_ranking  # noqa: E402
+
+# the filter combinations benchmarks/bench_filter_index.py times
+COMBINATIONS = {
+    "none": {},
+    "skin": {"skin_type": "Oily Skin"},
+    "product": {"product_type": "Moisturizer"},
+    "allergens": {"allergens_list": ["niacinamide", "aloe vera"]},
+    "pregnancy": {"pregnancy_safe": "yes"},
+    "skin+product": {"skin_type": "Dry Skin", "product_type": "Cleanser,Face Mask"},
+    "all": {
+        "skin_type": "Sensitive Skin",
+        "product_type": "Moisturizer/Treatment",
+        "concerns": ["acne", "dry"],
+        "allergens_list": ["niacinamide", "sulfur"],
+        "pregnancy_safe": "yes",
+    },
+}
+
+
+def indexed(**kwargs):
+    keep = ("Label", "brand", "name", "similarity")
+    return [{k: r[k] for k in keep} for r in api.get_recommendations(**kwargs)]
+
+
+@pytest.mark.parametrize("top_n", [5, 50])
+@pytest.mark.parametrize("name", COMBINATIONS)
+def test_filter_masks_match_the_pandas_baseline(name, top_n):
+    kwargs = dict(COMBINATIONS[name], top_n=top_n)
+    expected = legacy_get_recommendations(api, **kwargs)
+    actual = indexed(**kwargs)
+    assert same_ranking(expected, actual), name
+
+
+def test_filter_mask_selects_the_same_products_as_the_baseline():
+    # every match, not just the top: top_n beyond the catalog returns them all
+    n = len(api.catalog.current.products)
+    for name, kwargs in COMBINATIONS.items():
+        expected = legacy_get_recommendations(api, **kwargs, top_n=n)
+        actual = indexed(**kwargs, top_n=n)
+        key = lambda r: (r["Label"], r["brand"], r["name"])
+        assert sorted(map(key, expected)) == sorted(map(key, actual)), name
@@ -0,0 +1,92 @@
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from fastapi import HTTPException
+
+import api
+
+T0 = datetime(2026, 1, 1, tzinfo=timezone.utc)
+
+
+class HistoryTable:
+    """
+    Stands in for db_pool: answers get_history's select from a list of rows,
+    reading the keyset bound and limit from the query parameters.
+    """
+
+    def __init__(self, rows):
+        self.rows = rows
+        self.queries = []
+
+    @contextmanager
+    def connection(self):
+        yield self
+
+    @contextmanager
+    def cursor(self):
+        yield self
+
+    def execute(self, query, params):
+        self.queries.append(params)
+        email, *after, limit = params
+        rows = [r for r in self.rows if r["email"] == email]
+        if after:
+            rows = [r for r in rows if (r["created_at"], r["id"]) < tuple(after)]
+        rows.sort(key=lambda r: (r["created_at"], r["id"]), reverse=True)
+        self.result = [dict(r) for r in rows[:limit]]
+
+    def fetchall(self):
+        return self.result
+
+
+@pytest.fixture
+def table(monkeypatch):
+    rows = []
+    for i in range(1, 24):
+        # groups of three rows share a timestamp, so ties are split on id
+        rows.append({
+            "id": i, "user_id": None, "email": "a@example.com", "quiz_answers": {},
+            "recommendations": [], "created_at": T0 + timedelta(minutes=i // 3),
+        })
+    rows.append({**rows[0], "id": 99, "email": "b@example.com"})
+    fake = HistoryTable(rows)
+    monkeypatch.setattr(api, "db_pool", fake)
+    return fake
+
+
+def test_pages_cover_every_row_once_newest_first(table):
+    seen, cursor, pages = [], None, 0
+    while True:
+        page = api.get_history(email="a@example.com", limit=5, cursor=cursor, fields=None)
+        seen.extend(r["id"] for r in page["data"])
+        pages += 1
+        cursor = page["next_cursor"]
+        if cursor is None:
+            break
+    assert pages == 5
+    expected = sorted((r for r in table.rows if r["email"] == "a@example.com"),
+                      key=lambda r: (r["created_at"], r["id"]), reverse=True)
+    assert seen == [r["id"] for r in expected]
+
+
+def test_last_full_page_has_no_cursor(table):
+    page = api.get_history(email="a@example.com", limit=23, cursor=None, fields=None)
+    assert len(page["data"]) == 23 and page["next_cursor"] is None
+    assert table.queries[-1][-1] == 24  # one extra row tells whether there's a next page
+
+
+def test_cursor_round_trips_and_rejects_garbage():
+    created_at = T0 + timedelta(seconds=1.5)
+    assert api.decode_history_cursor(api.encode_history_cursor(created_at, 42)) == (created_at, 42)
+    with pytest.raises(HTTPException) as e:
+        api.decode_history_cursor("not-a-cursor")
+    assert e.value.status_code == 400
+
+
+def test_fields_always_keep_the_cursor_columns(table):
+    page = api.get_history(email="a@example.com", limit=2, cursor=None, fields="quiz_answers")
+    assert page["next_cursor"] is not None
+    with pytest.raises(HTTPException) as e:
+        api.get_history(email="a@example.com", limit=2, cursor=None, fields="password")
+    assert e.value.status_code == 400
@@ -0,0 +1,108 @@
+import threading
+from contextlib import contextmanager
+
+import pytest
+
+import history_writer
+from history_writer import HistoryWriter, QueueFull
+
+
+class RecordingPool:
+    """Stands in for db.ConnectionPool; collects every inserted batch."""
+
+    def __init__(self):
+        self.rows = []
+
+    @contextmanager
+    def connection(self):
+        class Conn:
+            def cursor(self):
+                return self
+
+            def __enter__(self):
+                return self
+
+            def __exit__(self, *exc):
+                return False
+
+            def commit(self):
+                pass
+
+        yield Conn()
+
+
+@pytest.fixture
+def pool(monkeypatch):
+    pool = RecordingPool()
+    monkeypatch.setattr(history_writer, "execute_values",
+                        lambda cur, query, batch, page_size: pool.rows.extend(batch))
+    return pool
+
+
+def submit(writer, i):
+    writer.submit(f"client-{i}", None, None, {}, [], "2026-01-01T00:00:00Z")
+
+
+def test_rows_are_written_in_batches(pool):
+    writer = HistoryWriter(pool, batch_size=10, flush_interval=0.01)
+    writer.start()
+    for i in range(25):
+        submit(writer, i)
+    writer.stop()
+    assert [row[0] for row in pool.rows] == [f"client-{i}" for i in range(25)]
+    assert writer.stats()["written"] == 25
+
+
+def test_submit_after_stop_is_rejected(pool):
+    writer = HistoryWriter(pool)
+    writer.start()
+    writer.stop()
+    with pytest.raises(QueueFull):
+        submit(writer, 0)
+    assert writer.stats()["rejected"] == 1
+
+
+def test_no_accepted_row_is_lost_when_stopping_mid_submit(pool):
+    # a small queue keeps submitters blocked in put() while stop() runs
+    writer = HistoryWriter(pool, max_queue=4, batch_size=2, flush_interval=0.01, enqueue_timeout=5)
+    writer.start()
+    accepted, lock = [], threading.Lock()
+
+    def worker(start):
+        for i in range(start, start + 200):
+            try:
+                submit(writer, i)
+            except QueueFull:
+                return
+            with lock:
+                accepted.append(f"client-{i}")
+
+    threads = [threading.Thread(target=worker, args=(n * 1000,)) for n in range(8)]
+    for t in threads:
+        t.start()
+    writer.stop()
+    for t in threads:
+        t.join()
+    assert sorted(row[0] for row in pool.rows) == sorted(accepted)
+    assert writer.stats()["enqueued"] == len(accepted)
+
+
+def test_stop_that_times_out_keeps_the_thread_to_finish_later(pool, monkeypatch):
+    release = threading.Event()
+
+    def slow_insert(cur, query, batch, page_size):
+        release.wait(5)
+        pool.rows.extend(batch)
+
+    monkeypatch.setattr(history_writer, "execute_values", slow_insert)
+    writer = HistoryWriter(pool, batch_size=5, flush_interval=0.01)
+    writer.start()
+    for i in range(20):
+        submit(writer, i)
+    writer.stop(timeout=0.05)
+    assert writer.stats()["queued"] > 0 and writer._thread.is_alive()
+
+    release.set()
+    writer.stop()
+    assert writer._thread is None
+    assert sorted(row[0] for row in pool.rows) == sorted(f"client-{i}" for i in range(20))
@@ -0,0 +1,60 @@
+import json
+import re
+
+import pandas as pd
+import pytest
+
+import api
+from incidence import build_incidence
+from model_store import DATASET_PATHS
+
+
+def contains(text, name):
+    return re.search(rf"(?<!\w){re.escape(name)}(?!\w)", str(text).lower()) is not None
+
+
+@pytest.fixture(scope="module")
+def products():
+    return pd.read_csv(DATASET_PATHS["products"])
+
+
+def test_vocabulary_covers_ingredient_lists_not_just_relations():
+    products = pd.DataFrame({"ingredients": [
+        "Water, Parfum (Fragrance), glycerin",
+        "water,  Fragrance.",
+        "aqua, niacinamide",
+    ]}, index=pd.RangeIndex(1, 4, name="product_id"))
+    relation = pd.DataFrame({"product_id": [3], "ingredient_name": ["Niacinamide"]})
+    incidence = build_incidence(products, (relation, "ingredient_name"))
+    assert incidence.rows_with_any(["fragrance"]).tolist() == [True, True, False]
+    assert incidence.rows_with_all(["water", "glycerin"]).tolist() == [True, False, False]
+    # names match whole words only, so "fra" is unknown
+    assert incidence.unknown(["FRAGRANCE", "fra", "aqua", ""]) == ["fra"]
+    assert incidence.listed == {"niacinamide"}
+
+
+def test_exclude_fragrance_leaves_no_product_listing_it(products):
+    snap = api.catalog.current
+    has_fragrance = products["ingredients"].map(lambda t: contains(t, "fragrance")).to_numpy()
+    assert has_fragrance.sum() > 400
+    mask = api.filter_mask(snap, exclude_ingredients=["Fragrance"])
+    assert mask.any() and not (mask & has_fragrance).any()
+    assert mask.sum() == (~has_fragrance).sum()
+
+
+def test_exclude_fragrance_through_the_app(asgi_get, products):
+    status, body = asgi_get("/recommend", exclude_ingredients="fragrance", top_n=200)
+    assert status == 200
+    returned = {(r["brand"], r["name"]) for r in json.loads(body)["results"]}
+    scented = {(b, n) for b, n, t in products[["brand", "name", "ingredients"]].itertuples(index=False)
+               if contains(t, "fragrance")}
+    assert len(returned) > 100 and not returned & scented
+
+
+@pytest.mark.parametrize("path", ["/recommend", "/recommend/export"])
+@pytest.mark.parametrize("param", ["include_ingredients", "exclude_ingredients"])
+def test_unknown_ingredient_is_a_400(asgi_get, path, param):
+    status, body = asgi_get(path, **{param: "glycerin,moon dust"})
+    assert status == 400
+    detail = json.loads(body)["detail"]
+    assert param in detail and "moon dust" in detail and "glycerin" not in detail
@@ -0,0 +1,61 @@
+import os
+
+import numpy as np
+import pytest
+
+import model_store
+from model_store import DATASET_PATHS, fit_model, load_artifact, read_datasets, save_artifact
+
+
+@pytest.fixture(scope="module")
+def model():
+    return fit_model(read_datasets(DATASET_PATHS), version="testversion")
+
+
+def test_rebuild_leaves_the_mapped_build_untouched(tmp_path, model):
+    link = save_artifact(model, {}, str(tmp_path))
+    first_build = os.path.realpath(link)
+    live = load_artifact(link, mmap=True)
+    first_files = sorted(os.listdir(first_build))
+
+    assert save_artifact(model, {}, str(tmp_path)) == link
+    second_build = os.path.realpath(link)
+    assert second_build != first_build
+    # the build a worker has mapped is still complete and readable
+    assert sorted(os.listdir(first_build)) == first_files
+    assert float(live.full_tfidf.data.sum()) == pytest.approx(model.full_tfidf.data.sum())
+    assert np.array_equal(load_artifact(link).full_tfidf.indptr, model.full_tfidf.indptr)
+
+
+def test_old_builds_are_pruned_but_never_the_live_one(tmp_path, model, monkeypatch):
+    monkeypatch.setattr(model_store, "KEEP_BUILDS", 2)
+    for _ in range(4):
+        link = save_artifact(model, {}, str(tmp_path))
+    builds = [e for e in os.listdir(tmp_path) if e.startswith("testversion.")]
+    assert len(builds) == 2
+    assert os.path.basename(os.path.realpath(link)) in builds
+
+
+def test_unversioned_artifact_dir_is_replaced_by_a_link(tmp_path, model):
+    legacy = tmp_path / "testversion"
+    legacy.mkdir()
+    (legacy / "manifest.json").write_text("{}")
+    link = save_artifact(model, {}, str(tmp_path))
+    assert os.path.islink(link)
+    assert load_artifact(link).version == "testversion"
+
+
+def test_only_the_offline_build_computes_the_neighbour_graph(tmp_path, model):
+    n = model.full_tfidf.shape[0]
+    assert model.similar.shape == (0, n)
+    built = load_artifact(model_store.build(DATASET_PATHS, str(tmp_path)))
+    assert built.similar.shape == (n, n) and built.similar.nnz > 0
+
+    # the on-request fallback of an in-process fit finds the same neighbours
+    import api
+    snap = api.catalog.current
+    assert snap.similar.shape[0] == 0
+    for row in (0, n // 2, n - 1):
+        rows, scores = api.live_neighbours(snap, row)
+        start, stop = built.similar.indptr[row], built.similar.indptr[row + 1]
+        assert scores[:stop - start] == pytest.approx(built.similar.data[start:stop], abs=1e-6)
@@ -0,0 +1,74 @@
+import json
+
+import pytest
+
+import api
+from catalog import with_edits
+from product_edits import NEW_PRODUCT_ID_START, ProductEdits
+
+PRODUCT = {
+    "Label": "Cleanser", "brand": "TEST", "name": "Replay Gel Cleanser", "price": 12.0,
+    "rank": 4.2, "ingredients": "water, glycerin, salicylic acid",
+    "Combination": 1, "Dry": 0, "Normal": 1, "Oily": 1, "Sensitive": 0,
+}
+
+
+@pytest.fixture
+def log(tmp_path):
+    return tmp_path / "product_edits.jsonl"
+
+
+def write(log, *entries, tail=b""):
+    log.write_bytes(b"".join(json.dumps(e).encode() + b"\n" for e in entries) + tail)
+
+
+def test_replay_keeps_each_products_latest_state(log):
+    new_id = NEW_PRODUCT_ID_START
+    write(
+        log,
+        {"seq": 1, "products": {"12": PRODUCT}},
+        {"seq": 2, "products": {"40": None, str(new_id): PRODUCT}},
+        {"seq": 3, "products": {"12": {**PRODUCT, "price": 9.0}}},
+    )
+    edits = ProductEdits.load(str(log))
+    assert edits.seq == 3 and len(edits) == 3
+    assert edits.entries[12] == (3, {**PRODUCT, "price": 9.0})
+    assert edits.entries[40] == (2, None)
+    assert edits.since(1) == {12: {**PRODUCT, "price": 9.0}, 40: None, new_id: PRODUCT}
+    assert edits.since(3) == {}
+    assert edits.next_id() == new_id + 1
+    assert edits.digest["seq"] == 3 and edits.digest["bytes"] == log.stat().st_size
+
+
+def test_torn_last_line_is_skipped_and_the_next_append_starts_a_new_line(log):
+    write(log, {"seq": 1, "products": {"12": None}}, tail=b'{"seq": 2, "produ')
+    edits = ProductEdits.load(str(log))
+    assert edits.seq == 1
+    edits = edits.apply({40: None})
+    edits.append(str(log), {40: None})
+    replayed = ProductEdits.load(str(log))
+    assert replayed.seq == 2 and set(replayed.entries) == {12, 40}
+
+
+def test_prefix_check_detects_a_rewritten_log(log):
+    write(log, {"seq": 1, "products": {"12": None}})
+    digest = ProductEdits.load(str(log)).digest
+    write(log, {"seq": 1, "products": {"12": None}}, {"seq": 2, "products": {"40": None}})
+    assert ProductEdits.load(str(log)).includes(digest, str(log))
+    write(log, {"seq": 1, "products": {"13": None}}, {"seq": 2, "products": {"40": None}})
+    assert not ProductEdits.load(str(log)).includes(digest, str(log))
+
+
+def test_replayed_edits_are_served_from_a_delta(log):
+    base = api.catalog.current.fitted
+    new_id = NEW_PRODUCT_ID_START
+    write(
+        log,
+        {"seq": 1, "products": {"2": None}},
+        {"seq": 2, "products": {str(new_id): PRODUCT}},
+    )
+    snap = with_edits(base, ProductEdits.load(str(log)))
+    assert snap.products.position(2) < 0
+    row = snap.products.position(new_id)
+    assert row >= 0 and snap.products.row(row).to_record(0.0)["name"] == PRODUCT["name"]
+    assert snap.info()["n_products"] == base.info()["n_products"]
@@ -0,0 +1,65 @@
+import numpy as np
+import pytest
+
+import api
+from filter_index import SortedColumn
+
+BOUNDS = [(None, None), (5, None), (None, 5), (5, 7), (7, 5), (6.5, 6.5), (-1, 100), (100, None)]
+
+
+def with_gaps(dtype, n=400, seed=0):
+    rng = np.random.default_rng(seed)
+    values = rng.integers(0, 12, n).astype(dtype)
+    values[rng.random(n) < 0.1] = np.nan
+    return values
+
+
+@pytest.mark.parametrize("dtype", [np.float32, np.float64])
+@pytest.mark.parametrize("lo,hi", BOUNDS)
+def test_range_mask_matches_a_scan(dtype, lo, hi):
+    values = with_gaps(dtype)
+    expected = ~np.isnan(values)
+    if lo is not None:
+        expected &= values >= dtype(lo)
+    if hi is not None:
+        expected &= values <= dtype(hi)
+    assert np.array_equal(SortedColumn(values).range_mask(lo, hi), expected)
+
+
+def test_float32_bound_matches_its_own_value():
+    values = np.array([4.2, 4.1, np.nan, 4.3], dtype=np.float32)
+    assert SortedColumn(values).range_mask(4.2).tolist() == [True, False, False, True]
+
+
+@pytest.mark.parametrize("min_price,max_price,min_rank", [
+    (20, None, None), (None, 30, None), (20, 60, None), (None, None, 4.5), (15, 40, 4.0),
+])
+def test_filter_mask_applies_price_and_rank_ranges(min_price, max_price, min_rank):
+    snap = api.catalog.current
+    price = snap.products.price
+    rank = snap.products.rank
+    expected = api.filter_mask(snap)
+    if min_price is not None:
+        expected = expected & (price >= np.float32(min_price))
+    if max_price is not None:
+        expected = expected & (price <= np.float32(max_price))
+    if min_rank is not None:
+        expected = expected & (rank >= np.float32(min_rank))
+    mask = api.filter_mask(snap, min_price=min_price, max_price=max_price, min_rank=min_rank)
+    assert mask.any()
+    assert np.array_equal(mask, expected)
+
+
+@pytest.mark.parametrize("sort,column,direction", [("price", "price", 1), ("rank", "rank", -1)])
+def test_sort_modes_order_the_pool_on_price_and_rank(sort, column, direction):
+    snap = api.catalog.current
+    rng = np.random.default_rng(1)
+    scores = rng.random(snap.products.n).astype(np.float32)
+    mask = api.filter_mask(snap, min_price=10)
+    top = api.select_rows(snap, scores, mask, 20, sort)
+    assert len(top) == 20 and mask[top].all()
+    values = getattr(snap.products, column)[top]
+    known = values[~np.isnan(values)]
+    assert np.all(np.diff(known) * direction >= 0)
+    # products missing the value go after every product that has it
+    assert not np.isnan(values[:len(known)]).any()
@@ -0,0 +1,20 @@
+import pandas as pd
+
+import recommender
+
+
+def test_centrality_is_joined_on_product_id(tmp_path, monkeypatch):
+    pd.DataFrame({
+        "name": ["Alpha", "Beta", "Gamma", "Delta"],
+        "brand": ["A", "B", "C", "D"],
+        "ingredients": ["water", "water, glycerin", "glycerin", "water"],
+    }).to_csv(tmp_path / "products_clean.csv", index=False)
+    # written for an older catalog: out of order, product 3 missing, product 9 gone
+    pd.DataFrame({
+        "product_id": [4, 9, 2, 1],
+        "centrality": [0.9, 1.0, 0.5, 0.1],
+    }).to_csv(tmp_path / recommender.CENTRALITY_FILE, index=False)
+    monkeypatch.setattr(recommender, "PROCESSED", str(tmp_path))
+
+    top = recommender.recommend_products(top_n=4)
+    assert top["name"].tolist() == ["Delta", "Beta", "Alpha", "Gamma"]
@@ -0,0 +1,47 @@
+import threading
+
+import api
+from result_cache import ResultCache
+
+
+def test_invalidate_drops_entries():
+    cache = ResultCache(maxsize=8, ttl=60)
+    calls = []
+    compute = lambda: calls.append(1) or len(calls)
+    assert cache.get_or_compute("k", compute) == 1
+    assert cache.get_or_compute("k", compute) == 1
+    cache.invalidate()
+    assert cache.get_or_compute("k", compute) == 2
+    assert cache.stats()["invalidations"] == 1
+
+
+def test_result_computed_across_an_invalidate_is_not_stored_or_joined():
+    cache = ResultCache(maxsize=8, ttl=60)
+    started, release = threading.Event(), threading.Event()
+
+    def stale():
+        started.set()
+        release.wait(5)
+        return "stale"
+
+    leader = threading.Thread(target=cache.get_or_compute, args=("k", stale))
+    leader.start()
+    started.wait(5)
+    cache.invalidate()
+    # a caller after the invalidate computes afresh instead of waiting on `stale`
+    assert cache.get_or_compute("k", lambda: "fresh") == "fresh"
+    release.set()
+    leader.join(5)
+    assert cache.get_or_compute("k", lambda: "recomputed") == "fresh"
+
+
+def test_catalog_swap_invalidates_recommendations():
+    calls = []
+    key = ("test-catalog-swap",)
+    compute = lambda: calls.append(1) or ["result"]
+    api.recommendation_cache.get_or_compute(key, compute)
+    api.recommendation_cache.get_or_compute(key, compute)
+    assert len(calls) == 1
+    api.catalog._publish(api.catalog.current)
+    api.recommendation_cache.get_or_compute(key, compute)
+    assert len(calls) == 2
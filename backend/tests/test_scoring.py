@@ -0,0 +1,44 @@
+import numpy as np
+import pytest
+
+from scoring import SORT_MODES, iter_ranked_rows, iter_reranked_rows, rerank, top_k_rows
+
+
+def catalog(seed, n=500):
+    rng = np.random.default_rng(seed)
+    # few distinct values, so ties (and runs of ties across chunks) are common
+    scores = rng.integers(0, 6, n) / 5.0
+    prior = rng.integers(0, 3, n).astype(np.float32)
+    price = np.where(rng.random(n) < 0.1, np.nan, rng.integers(5, 15, n)).astype(np.float32)
+    rank = np.where(rng.random(n) < 0.1, np.nan, rng.integers(1, 6, n)).astype(np.float32)
+    mask = rng.random(n) < 0.8
+    return scores, prior, price, rank, mask
+
+
+@pytest.mark.parametrize("chunk", [1, 7, 64, 1000])
+@pytest.mark.parametrize("with_prior", [False, True])
+def test_ranked_chunks_match_one_full_sort(chunk, with_prior):
+    scores, prior, _, _, mask = catalog(chunk)
+    prior = prior if with_prior else None
+    chunks = list(iter_ranked_rows(scores, mask, chunk, prior))
+    assert all(0 < len(c) <= chunk for c in chunks)
+    assert all(len(c) == chunk for c in chunks[:-1])
+    expected = top_k_rows(scores, mask, int(mask.sum()), prior)
+    assert np.array_equal(np.concatenate(chunks), expected)
+
+
+@pytest.mark.parametrize("mode", SORT_MODES)
+@pytest.mark.parametrize("chunk", [1, 13, 100, 1000])
+def test_reranked_chunks_match_rerank_of_all_matches(mode, chunk):
+    scores, prior, price, rank, mask = catalog(len(mode) * chunk)
+    chunks = list(iter_reranked_rows(scores, mask, chunk, price, rank, mode, 0.3, 0.2, prior))
+    rows = top_k_rows(scores, mask, int(mask.sum()), prior)
+    expected = rows[rerank(scores[rows], price[rows], rank[rows], mode, 0.3, 0.2)]
+    assert np.array_equal(np.concatenate(chunks), expected)
+
+
+def test_empty_mask_yields_nothing():
+    scores, prior, price, rank, _ = catalog(0)
+    mask = np.zeros(len(scores), dtype=bool)
+    assert list(iter_ranked_rows(scores, mask, 10, prior)) == []
+    assert list(iter_reranked_rows(scores, mask, 10, price, rank, "price")) == []
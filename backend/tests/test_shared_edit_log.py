@@ -0,0 +1,101 @@
+import json
+import os
+import shutil
+import threading
+
+import pytest
+
+from catalog import CatalogManager
+from model_store import DATASET_PATHS
+from product_edits import NEW_PRODUCT_ID_START, edits_path
+
+PRODUCT = {
+    "Label": "Moisturizer", "brand": "TEST", "name": "Shared Log Cream", "price": 20.0,
+    "rank": 4.0, "ingredients": "water, glycerin, ceramide np",
+    "Combination": 1, "Dry": 1, "Normal": 1, "Oily": 0, "Sensitive": 0,
+}
+
+
+@pytest.fixture(scope="module")
+def workers(tmp_path_factory):
+    """Two managers over one processed dir, like two uvicorn workers."""
+    processed = tmp_path_factory.mktemp("processed")
+    source = os.path.dirname(DATASET_PATHS["products"])
+    paths = {}
+    for name, path in DATASET_PATHS.items():
+        paths[name] = str(processed / os.path.basename(path))
+        if os.path.exists(path):
+            shutil.copy(path, paths[name])
+    shutil.copy(os.path.join(source, "allergens_clean.csv"), processed)
+    artifacts = str(tmp_path_factory.mktemp("artifacts"))
+    first = CatalogManager(paths, artifacts)
+    first.load_initial()
+    second = CatalogManager(paths, artifacts)
+    second.load_initial()
+    return first, second
+
+
+def log_lines(manager):
+    with open(edits_path(manager.paths), encoding="utf-8") as f:
+        return [json.loads(line) for line in f]
+
+
+def test_concurrent_adds_from_two_workers_get_distinct_ids_and_seqs(workers):
+    ids = []
+
+    def add(manager, n):
+        for i in range(n):
+            product_id, _ = manager.add_product({**PRODUCT, "name": f"{PRODUCT['name']} {i}"})
+            ids.append(product_id)
+
+    threads = [threading.Thread(target=add, args=(m, 4)) for m in workers]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert sorted(ids) == list(range(NEW_PRODUCT_ID_START, NEW_PRODUCT_ID_START + 8))
+    seqs = [entry["seq"] for entry in log_lines(workers[0])]
+    assert seqs == list(range(1, 9))
+
+
+def test_a_worker_serves_edits_made_through_another(workers):
+    first, second = workers
+    first.sync_edits()
+    second.sync_edits()
+    product_id, _ = first.add_product(PRODUCT)
+    assert second.current.products.position(product_id) < 0
+
+    assert second.edits_behind()
+    snapshot = second.sync_edits()
+    assert not second.edits_behind()
+    assert snapshot.products.position(product_id) >= 0
+    assert snapshot.edits_seq == first.current.edits_seq
+
+    first.apply_product_edits({product_id: None})
+    assert second.sync_edits().products.position(product_id) < 0
+
+
+def test_edits_validate_against_other_workers_deletes(workers):
+    first, second = workers
+    product_id, _ = first.add_product(PRODUCT)
+    second.sync_edits()
+    first.apply_product_edits({product_id: None})
+    # the delete hasn't been synced yet; the write path catches up first
+    with pytest.raises(KeyError):
+        second.apply_product_edits({product_id: PRODUCT})
+
+
+def test_a_line_still_being_written_is_left_for_the_next_read(workers):
+    first, second = workers
+    second.sync_edits()
+    path = edits_path(first.paths)
+    seq = first.edits.seq + 1
+    line = json.dumps({"seq": seq, "products": {"1": None}}).encode()
+    with open(path, "ab") as f:
+        f.write(line[:10])
+    second.sync_edits()
+    assert second.edits.seq == seq - 1
+    with open(path, "ab") as f:
+        f.write(line[10:] + b"\n")
+    assert second.sync_edits().products.position(1) < 0
@@ -0,0 +1,69 @@
+import json
+
+import pandas as pd
+import pytest
+
+import api
+from skin_conditions import SkinCondition, condition_masks, ingredient_terms
+
+
+def test_descriptive_names_become_inci_terms():
+    scrubs = ingredient_terms("Harsh physical scrubs (apricot shell, walnut)")
+    assert "harsh physical scrubs" not in scrubs
+    assert "juglans regia (walnut) shell powder" in scrubs
+    assert "alcohol denat" in ingredient_terms("High % alcohol (denat. alcohol)")
+    sunscreen = ingredient_terms("Sunscreen (Zinc oxide / Titanium dioxide / modern filters)")
+    assert "sunscreen" not in sunscreen
+    assert {"zinc oxide", "titanium dioxide", "avobenzone"} <= set(sunscreen)
+    assert ingredient_terms("Salicylic acid (BHA)") == ["salicylic acid"]
+
+
+def test_condition_masks_match_inci_lists_and_report_unmatched_terms():
+    products = pd.DataFrame({"ingredients": [
+        "water, juglans regia (walnut) shell powder, glycerin",
+        "alcohol denat., fragrance",
+        "water, bha, tocopherol",
+        "water, salicylic acid",
+    ]})
+    conditions = {
+        "acne": SkinCondition(
+            "Acne",
+            avoid=tuple(ingredient_terms("Harsh physical scrubs (apricot shell, walnut)")
+                        + ingredient_terms("High % alcohol (denat. alcohol)")
+                        + ingredient_terms("Ivermectin (Rx topical)")),
+            recommended=tuple(ingredient_terms("Salicylic acid (BHA)")),
+        ),
+    }
+    avoid, recommended, unmatched = condition_masks(products, conditions)
+    assert avoid["acne"].tolist() == [True, True, False, False]
+    assert recommended["acne"].tolist() == [False, False, False, True]
+    # an alias is reported by name once none of its spellings matched
+    assert unmatched["acne"] == ("apricot shell", "ivermectin")
+
+
+def test_skin_conditions_endpoint_lists_terms_and_unmatched():
+    listed = {c["name"]: c for c in api.list_skin_conditions()}
+    assert "Rosacea" in listed
+    rosacea = listed["Rosacea"]
+    assert rosacea["avoid"] and rosacea["recommended"]
+    assert "metronidazole" in rosacea["unmatched"]
+    terms = {t for c in listed.values() for t in (*c["avoid"], *c["recommended"])}
+    assert not terms & {"harsh physical scrubs", "high % alcohol", "sunscreen", "bha"}
+
+
+@pytest.mark.parametrize("path", ["/recommend", "/recommend/export"])
+def test_unknown_skin_condition_is_a_400(asgi_get, path):
+    status, body = asgi_get(path, skin_condition="Rosacea,Moon Rash")
+    assert status == 400
+    detail = json.loads(body)["detail"]
+    assert "Moon Rash" in detail and "Rosacea" in detail.split("known:")[1]
+
+
+def test_known_skin_condition_filters_out_avoided_ingredients(asgi_get):
+    status, body = asgi_get("/recommend", skin_condition="rosacea", top_n=50)
+    assert status == 200
+    snap = api.catalog.current
+    avoid = snap.filter_index.condition_avoid_mask(["Rosacea"])
+    returned = {(r["brand"], r["name"]) for r in json.loads(body)["results"]}
+    avoided = {(snap.products.brand[i], snap.products.names[i]) for i in avoid.nonzero()[0]}
+    assert returned and not returned & avoided
@@ -1,10 +1,23 @@
+import os
+import sys
+
 from fastapi import FastAPI
-import pandas as pd
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(BASE_DIR, "backend"))
+from columnar import read_table
 
 app = FastAPI()
 
-skincare_df = pd.read_csv("processed/products_clean.csv")
-allergen_df = pd.read_csv("processed/allergens_clean.csv")
+# only the columns this service serves
+skincare_df = read_table(
+    os.path.join(BASE_DIR, "processed", "products_clean.csv"),
+    ["Label", "brand", "name", "price", "rank"],
+)
+allergen_df = read_table(
+    os.path.join(BASE_DIR, "processed", "allergens_clean.csv"),
+    ["skin_condition", "ingredient_name", "ingredient_type"],
+)
 
 @app.get("/")
 def root():